@@ -1,17 +1,23 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response
 from flask_cors import CORS
+import os
 import threading
 import requests
 from routes.market_routes import market_bp
 from routes.tools_routes import tools_bp
 from routes.langgraph_routes import rag_bp
 from config import Config
+from serving import apply_route_timeouts
+from utils.metrics import REGISTRY
+from utils.tracing import install_flask_tracing
+from utils.serialization import install_json_provider
 
 BACKEND_URL = "https://portfolio-insight-backend.onrender.com"
 PING_INTERVAL = 300  # seconds
 
 def create_app():
     app = Flask(__name__)
+    install_json_provider(app)
     CORS(app, origins="*", supports_credentials=True)
     
     # Validate configuration
@@ -26,6 +32,7 @@ def create_app():
     app.register_blueprint(market_bp)
     app.register_blueprint(tools_bp)  
     app.register_blueprint(rag_bp)
+    install_flask_tracing(app)
 
     @app.route("/health")
     def health():
@@ -38,10 +45,24 @@ def create_app():
                 "ingest": "/rag/ingest",
                 "health": "/health",
                 "market": "/market/*",
-                "tools": "/tools/*"
+                "tools": "/tools/*",
+                "metrics": "/metrics"
             }
         })
 
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/health/upstreams")
+    def health_upstreams():
+        from utils.resilience import breaker_states
+        return jsonify(breaker_states())
+
+    @app.route("/metrics/summary")
+    def metrics_summary():
+        return jsonify(REGISTRY.snapshot())
+
     @app.route("/")
     def root():
         return jsonify({
@@ -60,6 +81,8 @@ def create_app():
             }
         })
 
+    apply_route_timeouts(app)
+
     def ping_backend():
         try:
             response = requests.get(BACKEND_URL)
@@ -88,4 +111,8 @@ if __name__ == "__main__":
     print("📚 Knowledge base ready with embedded financial books")
     print("🔧 Live market data tools available")
     print("✅ ALL FIXES APPLIED")
+    # The debug reloader runs this block in the watcher and in the serving child; start the jobs once
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from serving import start_background_jobs
+        start_background_jobs()
     app.run(host="0.0.0.0", port=5000, debug=True)
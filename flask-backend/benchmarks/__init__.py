@@ -0,0 +1 @@
+"""Offline benchmarks with recorded/synthetic upstreams. See benchmarks/run.py."""
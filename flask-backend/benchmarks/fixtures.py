@@ -0,0 +1,430 @@
+"""
+Record/replay stubs for every upstream the backend talks to.
+
+- yfinance: `yf.download` / `yf.Ticker` replaced by FakeYFinance. In replay mode it
+  serves recorded frames from benchmarks/fixtures/ and falls back to a
+  deterministic synthetic random walk per symbol. In record mode it calls the
+  real yfinance and pickles the result for later replays.
+- IndianAPI: `requests` in the IndianAPI services replaced by FakeRequests.
+- Gemini: ScriptedChatModel emits scripted tool calls, then a final answer.
+- Pinecone / embeddings: FakeRetriever, FakeEmbeddings and FakePinecone;
+  build_partitioned_kb() for the partition-routing scenarios (synthetic corpus,
+  bag-of-words embeddings, brute-force per-namespace store).
+
+`offline_upstreams()` installs all of them for the duration of a block.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import zlib
+from contextlib import contextmanager, ExitStack
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 22, "3mo": 66, "6mo": 126, "1y": 252, "2y": 504, "3y": 756, "5y": 1260, "max": 2520}
+_BARS_PER_SESSION = {"1m": 375, "2m": 188, "5m": 75, "15m": 25, "30m": 13, "60m": 7, "1h": 7}
+_FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.encode("utf-8"))
+
+
+def _as_list(tickers) -> list[str]:
+    if isinstance(tickers, str):
+        return [t for t in tickers.replace(",", " ").split() if t]
+    return list(tickers)
+
+
+# --- yfinance -------------------------------------------------------------------
+
+def synthetic_ohlcv(symbol: str, period: str = "1mo", interval: str = "1d", end: str = "2025-06-30") -> pd.DataFrame:
+    """Deterministic OHLCV for `symbol` shaped like a single-ticker yfinance frame."""
+    rng = np.random.default_rng(_seed(symbol))
+    days = _PERIOD_DAYS.get(period, 22)
+    sessions = pd.bdate_range(end=end, periods=days)
+    if interval in _BARS_PER_SESSION:
+        bars = _BARS_PER_SESSION[interval]
+        step = pd.Timedelta(minutes=375 // bars)
+        index = pd.DatetimeIndex(
+            [s + pd.Timedelta(hours=9, minutes=15) + i * step for s in sessions for i in range(bars)]
+        ).tz_localize("Asia/Kolkata")
+        index.name = "Datetime"
+        vol = 0.002
+    else:
+        index = sessions
+        index.name = "Date"
+        vol = 0.015
+    n = len(index)
+    start = 100.0 + (_seed(symbol) % 4900)
+    close = start * np.exp(np.cumsum(rng.normal(0.0003, vol, n)))
+    spread = np.abs(rng.normal(0, vol, n)) * close
+    open_ = close * (1 + rng.normal(0, vol / 2, n))
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(10_000, 5_000_000, n).astype(float)
+    return pd.DataFrame({"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume}, index=index)
+
+
+def synthetic_download(tickers, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+    """Multi-ticker frame with (Price, Ticker) MultiIndex columns, like yf.download."""
+    syms = _as_list(tickers)
+    frames = {s: synthetic_ohlcv(s, period, interval) for s in syms}
+    df = pd.concat(frames, axis=1)  # (Ticker, Price)
+    df = df.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0)
+    df.columns.names = ["Price", "Ticker"]
+    return df
+
+
+class _FakeTicker:
+    def __init__(self, symbol: str):
+        self.ticker = symbol
+        rng = np.random.default_rng(_seed(symbol) + 1)
+        idx = pd.bdate_range(end="2025-06-30", periods=2520)
+        div_days = idx[::126][-20:]
+        self.dividends = pd.Series(np.round(rng.uniform(1, 20, len(div_days)), 2), index=div_days, name="Dividends")
+        self.splits = pd.Series([2.0], index=[idx[800]], name="Stock Splits")
+        self.info = {
+            "symbol": symbol,
+            "currency": "INR",
+            "exDividendDate": int(pd.Timestamp("2025-08-01").timestamp()),
+            "dividendDate": int(pd.Timestamp("2025-08-20").timestamp()),
+            "dividendYield": float(np.round(rng.uniform(0.2, 3.5), 2)),
+            "dividendRate": float(np.round(rng.uniform(1, 30), 2)),
+            "sector": "Synthetic",
+        }
+        months = pd.date_range(end="2025-06-30", periods=4, freq="MS")
+        self.recommendations = pd.DataFrame({
+            "period": ["0m", "-1m", "-2m", "-3m"],
+            "strongBuy": rng.integers(0, 10, 4), "buy": rng.integers(0, 15, 4),
+            "hold": rng.integers(0, 10, 4), "sell": rng.integers(0, 5, 4), "strongSell": rng.integers(0, 3, 4),
+        }, index=months)
+        self.recommendationTrend = None
+
+
+class FakeYFinance:
+    """Drop-in for the `yf` module attribute of services.* modules."""
+
+    def __init__(self, mode: str = "replay", real=None, fixtures_dir: str = FIXTURES_DIR):
+        self.mode = mode
+        self.real = real
+        self.fixtures_dir = fixtures_dir
+        self.calls = {"download": 0, "Ticker": 0}
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.fixtures_dir, f"yf_{kind}_{hashlib.sha1(key.encode()).hexdigest()[:16]}.pkl")
+
+    def download(self, tickers, period="1mo", interval="1d", **kwargs):
+        self.calls["download"] += 1
+        syms = _as_list(tickers)
+        path = self._path("download", f"{sorted(syms)}|{period}|{interval}")
+        if self.mode == "record":
+            df = self.real.download(tickers, period=period, interval=interval, **kwargs)
+            os.makedirs(self.fixtures_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                pickle.dump(df, f)
+            return df
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        return synthetic_download(syms, period, interval)
+
+    def Ticker(self, symbol: str):
+        self.calls["Ticker"] += 1
+        if self.mode == "record":
+            tk = self.real.Ticker(symbol)
+            snap = _FakeTicker(symbol)
+            for attr in ("dividends", "splits", "info", "recommendations"):
+                try:
+                    setattr(snap, attr, getattr(tk, attr))
+                except Exception:
+                    pass
+            os.makedirs(self.fixtures_dir, exist_ok=True)
+            with open(self._path("ticker", symbol), "wb") as f:
+                pickle.dump(snap.__dict__, f)
+            return snap
+        path = self._path("ticker", symbol)
+        if os.path.exists(path):
+            snap = _FakeTicker.__new__(_FakeTicker)
+            with open(path, "rb") as f:
+                snap.__dict__.update(pickle.load(f))
+            return snap
+        return _FakeTicker(symbol)
+
+
+# --- IndianAPI --------------------------------------------------------------------
+
+class _FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeRequests:
+    """Replaces `requests` in the IndianAPI services."""
+
+    RequestException = Exception
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        if url.endswith("/trending"):
+            mk = lambda name, pct: {"ticker_id": name, "company_name": name.title(), "price": "100.0", "percent_change": pct}
+            return _FakeResponse({"trending_stocks": {
+                "top_gainers": [mk(f"GAIN{i}", f"{5 - i}.0") for i in range(10)],
+                "top_losers": [mk(f"LOSE{i}", f"-{5 - i}.0") for i in range(10)],
+            }})
+        if url.endswith("/stock_forecasts"):
+            return _FakeResponse({"data": [{"fiscalYear": 2026 + i, "value": 50.0 + i} for i in range(3)]})
+        return _FakeResponse({}, 404)
+
+
+# --- LLM, embeddings, Pinecone ------------------------------------------------------
+
+class ScriptedChatModel:
+    """Deterministic chat model: returns scripted tool calls in order, then a final answer."""
+
+    def __init__(self, script: list[list[dict]] | None = None, answer: str = "Scripted answer."):
+        self.script = script or []
+        self.answer = answer
+        self._turn = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    def reset(self):
+        self._turn = 0
+
+    def invoke(self, messages, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+        if self._turn < len(self.script):
+            calls = [{"name": c["name"], "args": c.get("args", {}), "id": f"call_{self._turn}_{i}"}
+                     for i, c in enumerate(self.script[self._turn])]
+            self._turn += 1
+            return AIMessage(content="", tool_calls=calls)
+        self._turn = 0
+        return AIMessage(content=self.answer)
+
+
+def _hash_vector(text: str, dim: int) -> list[float]:
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+    v = rng.normal(size=dim)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+class FakeEmbeddings:
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        return [_hash_vector(t, self.dim) for t in texts]
+
+    def embed_query(self, text):
+        return _hash_vector(text, self.dim)
+
+
+class FakeRetriever:
+    def __init__(self, n_docs: int = 6):
+        self.n_docs = n_docs
+
+    def invoke(self, query, *args, **kwargs):
+        from langchain_core.documents import Document
+        return [
+            Document(
+                page_content=(f"{query} — passage {i}. " * 40),
+                metadata={"source": f"book_{i % 3}", "category": "investment_principles", "page": i},
+            )
+            for i in range(self.n_docs)
+        ]
+
+
+class FakeVectorStore:
+    def __init__(self, index=None, embedding=None, **kwargs):
+        self.embedding = embedding
+        self.added = 0
+
+    def add_documents(self, docs, ids=None, **kwargs):
+        if self.embedding is not None:
+            self.embedding.embed_documents([d.page_content for d in docs])
+        self.added += len(docs)
+        return ids or []
+
+
+class FakePinecone:
+    def __init__(self, api_key=None, **kwargs):
+        self._indexes = {"advisor-kg"}
+
+    def has_index(self, name):
+        return name in self._indexes
+
+    def create_index(self, name, **kwargs):
+        self._indexes.add(name)
+
+    def Index(self, name):
+        return {"name": name}
+
+
+# --- partitioned knowledge base --------------------------------------------------------
+
+KB_CATEGORIES = ("investment_principles", "market_reports", "company_filings", "tax_guides", "macro_outlooks")
+
+
+class BagOfWordsEmbeddings:
+    """Sum of fixed random word vectors, normalised: texts sharing words are close."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._words: dict[str, np.ndarray] = {}
+
+    def _vec(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for w in text.lower().split():
+            wv = self._words.get(w)
+            if wv is None:
+                wv = self._words[w] = np.asarray(_hash_vector(w, self.dim), dtype=np.float32)
+            v += wv
+        n = np.linalg.norm(v)
+        return v / n if n else v
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+class FakePartitionedStore:
+    """Pinecone stand-in with namespaces: brute-force cosine + MMR, so cost grows with the namespace searched."""
+
+    def __init__(self, embedding):
+        self.embeddings = embedding
+        self._ns: dict = {}
+
+    def add_documents(self, docs, ids=None, namespace=None, **kwargs):
+        mat, stored = self._ns.get(namespace, (np.zeros((0, self.embeddings.dim), dtype=np.float32), []))
+        vecs = np.vstack(self.embeddings.embed_documents([d.page_content for d in docs]))
+        self._ns[namespace] = (np.vstack([mat, vecs]), stored + list(docs))
+        return ids or []
+
+    def describe_index_stats(self):
+        return {"namespaces": {ns or "": {"vector_count": len(docs)} for ns, (_, docs) in self._ns.items()}}
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5, filter=None, namespace=None, **kwargs):
+        mat, docs = self._ns.get(namespace, (None, []))
+        if not docs:
+            return []
+        sims = mat @ np.asarray(embedding, dtype=np.float32)
+        if filter:
+            keep = np.array([all(str(d.metadata.get(f)) in c["$in"] for f, c in filter.items()) for d in docs])
+            sims = np.where(keep, sims, -np.inf)
+        cand = np.argsort(-sims)[:fetch_k]
+        cand = cand[np.isfinite(sims[cand])]
+        picked = []
+        while cand.size and len(picked) < k:
+            div = (mat[cand] @ mat[picked].T).max(axis=1) if picked else np.zeros(len(cand))
+            best = int(np.argmax(lambda_mult * sims[cand] - (1 - lambda_mult) * div))
+            picked.append(int(cand[best]))
+            cand = np.delete(cand, best)
+        return [docs[i] for i in picked]
+
+
+def synthetic_kb(docs_per_category: int = 2000, words: int = 60, seed: int = 0):
+    """(chunks [{"id", "text", "metadata"}], queries [(text, category, source chunk text)]): per-category
+    vocabularies plus shared words; each query is 8 words sampled from one chunk."""
+    rng = np.random.default_rng(seed)
+    shared = [f"common{i}" for i in range(400)]
+    chunks, queries = [], []
+    for c, cat in enumerate(KB_CATEGORIES):
+        vocab = [f"{cat.split('_')[0][:5]}{i}" for i in range(400)]
+        for d in range(docs_per_category):
+            n_cat = int(words * 0.6)
+            text = " ".join(list(rng.choice(vocab, n_cat)) + list(rng.choice(shared, words - n_cat)))
+            chunks.append({"id": f"{cat}-{d}", "text": text,
+                           "metadata": {"category": cat, "source": f"{cat}_vol{d % 4}", "page": d}})
+    for i in rng.choice(len(chunks), 200, replace=False):
+        toks = chunks[i]["text"].split()
+        queries.append((" ".join(rng.choice(toks, 8)), chunks[i]["metadata"]["category"], chunks[i]["text"]))
+    return chunks, queries
+
+
+def build_partitioned_kb(partitioned: bool, docs_per_category: int = 2000):
+    """A HybridRetriever over synthetic_kb(), with BM25 index and (if partitioned) one namespace per category."""
+    import tempfile
+    from langchain_core.documents import Document
+    from config import Config
+    from rag.lexical import update_lexical_index
+    from rag.partitions import namespace_for, record_partitions
+    from rag.retriever import HybridRetriever
+
+    d = tempfile.mkdtemp(prefix="bench_kb_")
+    Config.RAG_LEXICAL_DIR = os.path.join(d, "lexical")
+    Config.RAG_PARTITIONS_PATH = os.path.join(d, "partitions.json")
+    Config.RAG_PARTITIONS_ENABLED = partitioned
+    Config.RERANK_ENABLED = False
+    chunks, queries = synthetic_kb(docs_per_category)
+    store = FakePartitionedStore(BagOfWordsEmbeddings())
+    groups: dict = {}
+    for c in chunks:
+        groups.setdefault(namespace_for(c["metadata"]) if partitioned else None, []).append(c)
+    for ns, group in groups.items():
+        store.add_documents([Document(page_content=c["text"], metadata=c["metadata"]) for c in group], namespace=ns)
+    update_lexical_index(chunks)
+    if partitioned:
+        record_partitions([c["metadata"] for c in chunks])
+    return HybridRetriever(store=store, index=store, k=6, candidates=6, fetch_k=24), queries
+
+
+# --- install -------------------------------------------------------------------------
+
+def _service_modules(attr: str):
+    return [m for name, m in list(sys.modules.items())
+            if m is not None and (name.startswith("services.") or name.startswith("rag.")) and hasattr(m, attr)]
+
+
+@contextmanager
+def offline_upstreams(mode: str = "replay", llm: ScriptedChatModel | None = None):
+    """Patch yfinance, IndianAPI, Gemini and Pinecone for every loaded service module."""
+    import importlib
+    for name in ("services.market_data_service", "services.pricemap_service",
+                 "services.corporate_actions_service", "services.analyst_service", "services.fundamentals_service",
+                 "services.trending_service", "services.stock_forecasts_service",
+                 "services.price_history_service"):
+        importlib.import_module(name)
+
+    real_yf = None
+    if mode == "record":
+        import yfinance as real_yf
+    fake_yf = FakeYFinance(mode=mode, real=real_yf)
+    fake_requests = FakeRequests()
+    os.environ.setdefault("PINECONE_API_KEY", "offline")
+
+    with ExitStack() as stack:
+        for m in _service_modules("yf"):
+            stack.enter_context(mock.patch.object(m, "yf", fake_yf))
+        if mode != "record":
+            for m in _service_modules("requests"):
+                stack.enter_context(mock.patch.object(m, "requests", fake_requests))
+        if "rag.langgraph_agent" in sys.modules and llm is not None:
+            stack.enter_context(mock.patch.object(sys.modules["rag.langgraph_agent"], "_llm_with_tools", llm))
+        if "rag.retriever" in sys.modules:
+            stack.enter_context(mock.patch.object(sys.modules["rag.retriever"], "_retriever", FakeRetriever()))
+        if "rag.ingestion" in sys.modules:
+            ing = sys.modules["rag.ingestion"]
+            stack.enter_context(mock.patch.object(ing, "make_embedder", lambda: FakeEmbeddings()))
+            stack.enter_context(mock.patch.object(ing, "Pinecone", FakePinecone))
+            stack.enter_context(mock.patch.object(ing, "PineconeVectorStore", FakeVectorStore))
+        yield {"yf": fake_yf, "requests": fake_requests, "llm": llm}
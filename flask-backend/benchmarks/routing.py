@@ -0,0 +1,62 @@
+"""
+Recall and latency of partition-routed retrieval vs searching the whole corpus.
+
+    python -m benchmarks.routing [--docs-per-category 2000]
+
+Builds the synthetic 5-category knowledge base twice (one namespace, and one
+namespace per category), runs the same queries through both retrievers and
+reports, for each: how often the chunk a query was sampled from is in the
+top k, and p50 latency; plus the overlap of routed and unrouted results and
+how often routing kept the query's own category.
+"""
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs-per-category", type=int, default=2000)
+    args = ap.parse_args()
+
+    from benchmarks.fixtures import build_partitioned_kb
+    from benchmarks.run import _percentile, _quiet
+    from rag.lexical import get_lexical_index
+    from rag.partitions import route
+
+    real_stdout, sys.stdout = sys.stdout, _quiet()
+    try:
+        results, timings, hits, kept = {}, {}, {}, 0
+        for routed in (False, True):
+            retriever, queries = build_partitioned_kb(routed, args.docs_per_category)
+            out, lat, hit = [], [], 0
+            for q, cat, src in queries:
+                t0 = time.perf_counter()
+                out.append([d.page_content for d in retriever.search(q)])
+                lat.append((time.perf_counter() - t0) * 1000)
+                hit += src in out[-1]
+                if routed:
+                    namespaces, _ = route(q, lexical=get_lexical_index(), index=retriever.index)
+                    kept += cat in (namespaces or [])
+            results[routed], timings[routed], hits[routed] = out, lat, hit / len(queries)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    k = len(results[False][0]) or 1
+    overlap = sum(len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(results[False], results[True])) / len(queries)
+    p50_all, p50_routed = _percentile(timings[False], 50), _percentile(timings[True], 50)
+    print(f"queries={len(queries)} chunks={5 * args.docs_per_category} k={k}")
+    print(f"source chunk in top {k}: all={hits[False]:.3f} routed={hits[True]:.3f}")
+    print(f"routed/all overlap:    {overlap:.3f}")
+    print(f"own category routed:   {kept / len(queries):.3f}")
+    print(f"p50 ms all={p50_all:.2f} routed={p50_routed:.2f} speedup={p50_all / p50_routed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Offline benchmark runner.
+
+    python -m benchmarks.run                          # all scenarios, compare with baseline.json
+    python -m benchmarks.run --scenario pricemap_100  # one scenario
+    python -m benchmarks.run --update-baseline        # store current numbers as the baseline
+    python -m benchmarks.run --check                  # exit 1 on regressions or a missing baseline (CI)
+    python -m benchmarks.run --record                 # call live upstreams once and save fixtures
+
+Run from flask-backend/. Each scenario runs in its own interpreter so peak RSS
+is per scenario. No network is used unless --record is given.
+
+baseline.json holds machine-specific numbers: create it with --update-baseline
+on the machine that runs --check, and commit it.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _percentile(values, p):
+    s = sorted(values)
+    if not s:
+        return 0.0
+    k = (len(s) - 1) * p / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def _quiet():
+    # Services print progress; keep benchmark output readable.
+    return open(os.devnull, "w")
+
+
+def measure(name: str, iterations: int, warmup: int, mode: str) -> dict:
+    from benchmarks.fixtures import offline_upstreams
+    from benchmarks.scenarios import all_scenarios
+
+    scenario = next((s for s in all_scenarios() if s.name == name), None)
+    if scenario is None:
+        raise SystemExit(f"unknown scenario: {name}")
+
+    real_stdout = sys.stdout
+    sys.stdout = _quiet()
+    try:
+        scenario.prepare()
+        with offline_upstreams(mode=mode, llm=scenario.llm) as upstreams:
+            state = scenario.setup()
+            for _ in range(warmup):
+                scenario.run(state)
+
+            latencies = []
+            t_start = time.perf_counter()
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                scenario.run(state)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            wall = time.perf_counter() - t_start
+
+            # Separate pass for allocations: tracemalloc would distort the latencies above.
+            alloc_iters = max(1, min(3, iterations))
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            for _ in range(alloc_iters):
+                scenario.run(state)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            diff = after.compare_to(before, "filename")
+            alloc_blocks = sum(max(0, d.count_diff) for d in diff) / alloc_iters
+
+            upstream_calls = {"yf." + k: v for k, v in upstreams["yf"].calls.items()}
+            upstream_calls["indianapi"] = upstreams["requests"].calls
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    return {
+        "scenario": name,
+        "group": scenario.group,
+        "iterations": iterations,
+        "ops_per_s": round(iterations / wall, 2) if wall else None,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "alloc_peak_kb": round(peak / 1024, 1),
+        "alloc_blocks_per_op": round(alloc_blocks, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "upstream_calls": upstream_calls,
+    }
+
+
+def run_isolated(name: str, args) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.run", "--child", name,
+           "--iterations", str(args.iterations), "--warmup", str(args.warmup)]
+    if args.record:
+        cmd.append("--record")
+    # Fundamentals snapshots persist to disk; keep benchmark runs cold and out of the real cache dir
+    env = dict(os.environ, ENV="BENCH", WARMUP_ENABLED="false", REFRESH_ENABLED="false",
+               FUNDAMENTALS_DIR=os.path.join(tempfile.gettempdir(), f"bench_fundamentals_{os.getpid()}_{name}"))
+    proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"scenario": name, "error": (proc.stderr or proc.stdout).strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for r in results:
+        b = baseline.get(r["scenario"])
+        if not b or "error" in r:
+            continue
+        for key in ("p50_ms", "p99_ms", "peak_rss_mb", "alloc_peak_kb"):
+            if b.get(key) and r.get(key) is not None and r[key] > b[key] * (1 + tolerance):
+                regressions.append(f"{r['scenario']}: {key} {b[key]} -> {r[key]} (+{(r[key] / b[key] - 1) * 100:.0f}%)")
+        if b.get("ops_per_s") and r.get("ops_per_s") and r["ops_per_s"] < b["ops_per_s"] / (1 + tolerance):
+            regressions.append(f"{r['scenario']}: ops_per_s {b['ops_per_s']} -> {r['ops_per_s']}")
+    return regressions
+
+
+def print_table(results: list[dict], baseline: dict):
+    head = f"{'scenario':<26}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KB':>10}{'blocks/op':>11}{'RSS MB':>9}{'vs base p50':>13}"
+    print(head)
+    print("-" * len(head))
+    for r in results:
+        if "error" in r:
+            print(f"{r['scenario']:<26} ERROR {r['error']}")
+            continue
+        b = baseline.get(r["scenario"], {})
+        delta = f"{(r['p50_ms'] / b['p50_ms'] - 1) * 100:+.0f}%" if b.get("p50_ms") else "-"
+        print(f"{r['scenario']:<26}{r['ops_per_s']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['alloc_peak_kb']:>10}{r['alloc_blocks_per_op']:>11}{r['peak_rss_mb']:>9}{delta:>13}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenario", action="append", help="scenario name (repeatable); default all")
+    ap.add_argument("--group", help="scenario group (see --list); default all")
+    ap.add_argument("--iterations", type=int, default=20)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true")
+    ap.add_argument("--record", action="store_true", help="hit live upstreams and save fixtures")
+    ap.add_argument("--list", action="store_true")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        result = measure(args.child, args.iterations, args.warmup, "record" if args.record else "replay")
+        print(json.dumps(result))
+        return
+
+    from benchmarks.scenarios import all_scenarios
+    scenarios = all_scenarios()
+    groups = sorted({s.group for s in scenarios})
+    if args.group and args.group not in groups:
+        ap.error(f"argument --group: invalid choice: {args.group!r} (choose from {', '.join(groups)})")
+    if args.list:
+        for s in scenarios:
+            print(f"{s.group:<11}{s.name}")
+        return
+
+    names = args.scenario or [s.name for s in scenarios if not args.group or s.group == args.group]
+    results = [run_isolated(n, args) for n in names]
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        for r in results:
+            if "error" not in r:
+                baseline[r["scenario"]] = {k: r[k] for k in ("ops_per_s", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kb", "peak_rss_mb")}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline updated: {BASELINE_PATH}")
+        return
+
+    # A scenario without a baseline entry cannot regress, so --check treats it as a failure
+    missing = [r["scenario"] for r in results if "error" not in r and r["scenario"] not in baseline]
+    if missing:
+        print(f"no baseline for {', '.join(missing)}; run with --update-baseline to add them to benchmarks/baseline.json")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if args.check and (regressions or missing or any("error" in r for r in results)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark scenarios for the market, RAG and agent paths.
+
+Each scenario has:
+- prepare(): import the modules under test (before upstream patches are installed)
+- setup():   build inputs; runs with upstreams patched
+- run(state): one measured operation
+"""
+import os
+import shutil
+import tempfile
+
+PORTFOLIO_SIZES = (10, 100, 1000)
+
+
+def synthetic_portfolio(n: int) -> list[str]:
+    """Real symbols from the symbol master first, then synthetic SYNxxxx tickers."""
+    from utils.symbol_index import get_symbol_index
+    real = [s for s in get_symbol_index().symbols if not s.startswith("^")]
+    return (real + [f"SYN{i:04d}" for i in range(max(0, n - len(real)))])[:n]
+
+
+def _clear_market_caches():
+    from config import Config
+    from utils.cache_utils import clear_cache
+    import services.pricemap_service as pm
+    import services.fundamentals_service as fs
+    import services.price_history_service as ph
+    clear_cache()
+    ph._history.clear()
+    pm._price_cache.clear()
+    pm._monthly_cache.clear()
+    fs._snapshots.clear()
+    shutil.rmtree(Config.FUNDAMENTALS_DIR, ignore_errors=True)
+
+
+class Scenario:
+    name = ""
+    group = ""
+    llm = None
+
+    def prepare(self):
+        pass
+
+    def setup(self):
+        return None
+
+    def run(self, state):
+        raise NotImplementedError
+
+
+class Quotes(Scenario):
+    group = "market"
+
+    def __init__(self, n: int, cold: bool = True):
+        self.n, self.cold = n, cold
+        self.name = f"quotes_{n}" + ("" if cold else "_warm")
+
+    def prepare(self):
+        import services.market_data_service  # noqa: F401
+
+    def setup(self):
+        return synthetic_portfolio(self.n)
+
+    def run(self, tickers):
+        from services.market_data_service import get_quotes
+        if self.cold:
+            _clear_market_caches()
+        get_quotes(tickers)
+
+
+class Pricemap(Scenario):
+    group = "market"
+
+    def __init__(self, n: int, cold: bool = True):
+        self.n, self.cold = n, cold
+        self.name = f"pricemap_{n}" + ("" if cold else "_warm")
+
+    def prepare(self):
+        import services.pricemap_service  # noqa: F401
+
+    def setup(self):
+        return synthetic_portfolio(self.n)
+
+    def run(self, tickers):
+        from services.pricemap_service import get_detailed_pricemap
+        if self.cold:
+            _clear_market_caches()
+        get_detailed_pricemap(tickers)
+
+
+class CorporateActions(Scenario):
+    group = "market"
+
+    def __init__(self, n: int):
+        self.n = n
+        self.name = f"corporate_actions_{n}"
+
+    def prepare(self):
+        import services.corporate_actions_service  # noqa: F401
+
+    def setup(self):
+        return synthetic_portfolio(self.n)
+
+    def run(self, tickers):
+        from services.corporate_actions_service import get_dividends_and_splits
+        _clear_market_caches()
+        get_dividends_and_splits(tickers)
+
+
+class IntradaySerialize(Scenario):
+    """Encoding a large intraday payload: the old tool-route round trip vs the direct path."""
+    group = "market"
+
+    def __init__(self, n: int, direct: bool):
+        self.n, self.direct = n, direct
+        self.name = f"intraday_json_{n}_" + ("direct" if direct else "roundtrip")
+
+    def prepare(self):
+        import services.market_data_service  # noqa: F401
+        import utils.serialization  # noqa: F401
+
+    def setup(self):
+        from services.market_data_service import get_intraday
+        return get_intraday(synthetic_portfolio(self.n), "5m", "5d")
+
+    def run(self, payload):
+        if self.direct:
+            from utils.serialization import dumps_bytes
+            dumps_bytes(payload)
+        else:
+            # tool_get_intraday -> json.loads in the route -> jsonify
+            import json
+            json.dumps(json.loads(json.dumps(payload, default=str)), default=str).encode("utf-8")
+
+
+class Backtest(Scenario):
+    """Many candidate weightings over 5 years, every rebalance schedule, in one call."""
+    group = "analytics"
+
+    def __init__(self, n: int, candidates: int):
+        self.n, self.k = n, candidates
+        self.name = f"backtest_{n}x{candidates}"
+
+    def prepare(self):
+        import services.backtest_service  # noqa: F401
+
+    def setup(self):
+        import numpy as np
+        symbols = synthetic_portfolio(self.n)
+        rng = np.random.default_rng(0)
+        candidates = [{"name": f"c{i}", "weights": dict(zip(symbols, rng.dirichlet(np.ones(self.n))))} for i in range(self.k)]
+        return symbols, candidates
+
+    def run(self, state):
+        from services.backtest_service import get_backtest
+        from utils.backtest import SCHEDULES
+        symbols, candidates = state
+        _clear_market_caches()
+        get_backtest(symbols, years=5, strategies=list(SCHEDULES), candidates=candidates, cost_bps=10)
+
+
+class Ingest(Scenario):
+    group = "rag"
+
+    def __init__(self, n_docs: int = 20, words_per_doc: int = 20000):
+        self.n_docs, self.words = n_docs, words_per_doc
+        self.name = f"ingest_{n_docs}docs"
+
+    def prepare(self):
+        import rag.ingestion  # noqa: F401
+
+    def setup(self):
+        d = tempfile.mkdtemp(prefix="bench_ingest_")
+        manifest = []
+        vocab = ["equity", "valuation", "dividend", "EBITDA", "margin", "portfolio", "risk", "beta", "yield", "cash"]
+        for i in range(self.n_docs):
+            path = os.path.join(d, f"doc_{i}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(" ".join(vocab[(i + j) % len(vocab)] for j in range(self.words)))
+            manifest.append({"type": "text", "path": path, "metadata": {"category": "bench", "source": f"doc_{i}"}})
+        return manifest
+
+    def run(self, manifest):
+        from rag.ingestion import ingest
+        ingest(manifest)
+
+
+class KnowledgeBaseSearch(Scenario):
+    group = "rag"
+    name = "search_knowledge_base"
+
+    def prepare(self):
+        import rag.retriever  # noqa: F401
+        import tools.rag_tool  # noqa: F401
+
+    def run(self, state):
+        from tools.rag_tool import search_knowledge_base
+        search_knowledge_base.invoke({"query": "What is the Graham number?", "num_results": 4})
+
+
+class KnowledgeBaseRouting(Scenario):
+    """Hybrid retrieval over a 5-category synthetic corpus, searched whole or routed to partitions."""
+    group = "rag"
+
+    def __init__(self, routed: bool):
+        self.routed = routed
+        self.name = "kb_search_routed" if routed else "kb_search_all"
+
+    def prepare(self):
+        import rag.retriever  # noqa: F401
+
+    def setup(self):
+        from benchmarks.fixtures import build_partitioned_kb
+        retriever, queries = build_partitioned_kb(self.routed)
+        return {"retriever": retriever, "queries": queries, "i": 0}
+
+    def run(self, state):
+        query = state["queries"][state["i"] % len(state["queries"])][0]
+        state["i"] += 1
+        state["retriever"].search(query)
+
+
+class AgentQuery(Scenario):
+    group = "agent"
+
+    def __init__(self, n_holdings: int = 10):
+        from benchmarks.fixtures import ScriptedChatModel
+        self.n = n_holdings
+        self.name = f"agent_query_{n_holdings}"
+        self.llm = None
+        self._llm_cls = ScriptedChatModel
+
+    def prepare(self):
+        import rag.langgraph_agent  # noqa: F401
+        import rag.retriever  # noqa: F401
+
+    def setup(self):
+        import rag.langgraph_agent as lg
+        holdings = synthetic_portfolio(self.n)
+        self.llm = self._llm_cls(script=[
+            [{"name": "get_current_quotes", "args": {"tickers": holdings}},
+             {"name": "search_knowledge_base", "args": {"query": "diversification", "num_results": 3}}],
+            [{"name": "get_price_ranges", "args": {"tickers": holdings[:5], "window_days": 252}}],
+        ])
+        lg._llm_with_tools = self.llm
+        return {"agent": lg.build_langgraph_agent(), "holdings": holdings}
+
+    def run(self, state):
+        _clear_market_caches()
+        self.llm.reset()
+        state["agent"].query("How diversified is my portfolio?", state["holdings"])
+
+
+def all_scenarios() -> list[Scenario]:
+    out: list[Scenario] = []
+    for n in PORTFOLIO_SIZES:
+        out.append(Quotes(n))
+    for n in PORTFOLIO_SIZES:
+        out.append(Pricemap(n))
+    out += [
+        Pricemap(100, cold=False),
+        CorporateActions(10),
+        IntradaySerialize(100, direct=False),
+        IntradaySerialize(100, direct=True),
+        Backtest(50, 100),
+        Ingest(),
+        KnowledgeBaseSearch(),
+        KnowledgeBaseRouting(routed=False),
+        KnowledgeBaseRouting(routed=True),
+        AgentQuery(10),
+    ]
+    return out
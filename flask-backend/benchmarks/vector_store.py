@@ -0,0 +1,88 @@
+"""
+Memory per chunk and recall@k of the quantized local vector index against an
+exact float32 search.
+
+    python -m benchmarks.vector_store [--chunks 50000] [--dim 768] [--k 10]
+
+Synthetic clustered, low-rank unit vectors; each query is a chunk plus
+noise. For sq8 and pq the index is written to a temp dir and memory-mapped as in serving,
+then searched with the quantized scores alone (rescore=k) and with
+RAG_VECTOR_RESCORE candidates re-scored from the float vectors.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 64, rank: int = 64, seed: int = 0):
+    """Unit vectors around topic centres that vary along a few shared directions, as sentence
+    embeddings do, plus a little isotropic noise."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    basis = rng.normal(size=(rank, dim)).astype(np.float32)
+    x = (centres[rng.integers(clusters, size=n)] + rng.normal(size=(n, rank)).astype(np.float32) @ basis
+         + 0.3 * rng.normal(size=(n, dim)).astype(np.float32))
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--chunks", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    import numpy as np
+    from benchmarks.run import _percentile, _quiet
+    from config import Config
+    from rag.vector_store import QuantizedIndex, write_vector_index
+
+    vectors = synthetic_vectors(args.chunks, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(args.chunks, args.queries, replace=False)]
+    queries = queries + 0.5 * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(args.dim)
+    truth, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        truth.append(set(np.argpartition(-(vectors @ q), args.k)[:args.k].tolist()))
+        lat.append((time.perf_counter() - t0) * 1000)
+    chunks = [{"id": str(i), "text": f"chunk {i}", "metadata": {"category": f"cat{i % 5}"}} for i in range(args.chunks)]
+
+    print(f"chunks={args.chunks} dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"float32 in memory: bytes/chunk={args.dim * 4} p50 ms={_percentile(lat, 50):.2f}")
+    for kind in ("sq8", "pq"):
+        d = tempfile.mkdtemp(prefix=f"bench_vec_{kind}_")
+        real_stdout, sys.stdout = sys.stdout, _quiet()
+        try:
+            t0 = time.perf_counter()
+            write_vector_index(d, chunks, vectors, kind)
+            build_s = time.perf_counter() - t0
+            index = QuantizedIndex(d)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+        stats = index.stats()
+        print(f"\n{kind}: build {build_s:.1f}s, in-memory bytes/chunk={stats['bytes_per_chunk']} "
+              f"(codes {stats['code_bytes']}, {stats['float_bytes_per_chunk'] / stats['bytes_per_chunk']:.1f}x smaller), "
+              f"disk bytes/chunk={stats['disk_bytes_per_chunk']}")
+        for rescore in (args.k, Config.RAG_VECTOR_RESCORE):
+            lat, recall = [], 0.0
+            for q, want in zip(queries, truth):
+                t0 = time.perf_counter()
+                got = index.search(q, args.k, rescore)
+                lat.append((time.perf_counter() - t0) * 1000)
+                recall += len(want & {i for i, _ in got}) / args.k
+            label = "quantized only" if rescore == args.k else f"rescore {rescore}"
+            print(f"  {label:<16} recall@{args.k}={recall / len(queries):.3f} p50 ms={_percentile(lat, 50):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ class Config:
     OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
     
     # Embedding Configuration
-    EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "hf").lower()  # hf | ollama | gemini
+    EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "hf").lower()  # gemini | local (hf = local)
     HF_EMBED_MODEL = os.getenv("HF_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     
     # Gemini Configuration
@@ -33,6 +33,48 @@ class Config:
     CACHE_TTL_QUOTES = int(os.getenv("CACHE_TTL_QUOTES", "60"))
     CACHE_TTL_CORPORATE = int(os.getenv("CACHE_TTL_CORPORATE", "900"))
     CACHE_TTL_FORECASTS = int(os.getenv("CACHE_TTL_FORECASTS", "300"))
+    CACHE_TTL_DAILY = int(os.getenv("CACHE_TTL_DAILY", "300"))  # daily bars while the session is live
+    CACHE_TTL_EMPTY = int(os.getenv("CACHE_TTL_EMPTY", "60"))  # responses with a symbol that returned no bars
+
+    # Fundamentals snapshots (info/dividends/splits/recommendations), shared and persisted per symbol
+    FUNDAMENTALS_TTL = int(os.getenv("FUNDAMENTALS_TTL", str(6 * 3600)))
+    FUNDAMENTALS_DIR = os.getenv("FUNDAMENTALS_DIR", "./.cache/fundamentals")
+    FUNDAMENTALS_WORKERS = int(os.getenv("FUNDAMENTALS_WORKERS", "8"))
+
+    # Upcoming corporate-events calendar, rebuilt from fundamentals snapshots in the background
+    EVENTS_REFRESH_ENABLED = os.getenv("EVENTS_REFRESH_ENABLED", "true").lower() == "true"
+    EVENTS_REFRESH_SECONDS = int(os.getenv("EVENTS_REFRESH_SECONDS", "3600"))
+    EVENTS_HORIZON_DAYS = int(os.getenv("EVENTS_HORIZON_DAYS", "400"))  # how far ahead dividends are projected
+    EVENTS_MAX_SYMBOLS = int(os.getenv("EVENTS_MAX_SYMBOLS", "2000"))  # symbols re-indexed per refresh
+
+    # Portfolio analytics (VaR/CVaR, correlation, optimisation) - see services/risk_service.py and neighbours
+    RISK_LOOKBACK = os.getenv("RISK_LOOKBACK", "2y")  # daily history period used for returns
+    RISK_MC_PATHS = int(os.getenv("RISK_MC_PATHS", "100000"))
+    RISK_MC_MAX_PATHS = int(os.getenv("RISK_MC_MAX_PATHS", "1000000"))
+    RISK_MC_CHUNK = int(os.getenv("RISK_MC_CHUNK", "20000"))  # paths generated per chunk (bounds memory)
+    RISK_PROCESS_MIN_ASSETS = int(os.getenv("RISK_PROCESS_MIN_ASSETS", "50"))  # use the process pool at this size
+    RISK_PROCESS_WORKERS = int(os.getenv("RISK_PROCESS_WORKERS", "2"))
+    CORRELATION_LOOKBACK = os.getenv("CORRELATION_LOOKBACK", "2y")  # windows over ~450 days use 5y
+    RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))  # annual, for Sharpe ratios
+
+    # HTTP response caching / compression for the market and tools blueprints
+    HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+    HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "5"))
+    HTTP_BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+
+    # Resilience: stale-while-revalidate, last-known-good and upstream circuit breakers
+    SWR_MAX_STALE = int(os.getenv("SWR_MAX_STALE", "300"))  # serve expired data while refreshing, up to this age past expiry
+    LKG_MAX_AGE = int(os.getenv("LKG_MAX_AGE", str(7 * 24 * 3600)))  # oldest data served when an upstream is down
+    SWR_WORKERS = int(os.getenv("SWR_WORKERS", "4"))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = int(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    # Trading calendar (IST) - see utils/market_calendar.py
+    MARKET_HOLIDAYS = [d.strip() for d in os.getenv("MARKET_HOLIDAYS", "").split(",") if d.strip()]
+    MARKET_SETTLE_MINUTES = int(os.getenv("MARKET_SETTLE_MINUTES", "15"))
+
+    # Symbol master (NSE/BSE tickers, company names, sectors)
+    SYMBOL_MASTER_PATH = os.getenv("SYMBOL_MASTER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv"))
 
     # Vector Database
     VECTOR_DB_DIR = os.getenv("VECTOR_DB_DIR", "./.chroma")
@@ -45,14 +87,75 @@ class Config:
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1200"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
     RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "6"))  # Number of documents to retrieve
+    RAG_LEXICAL_ENABLED = os.getenv("RAG_LEXICAL_ENABLED", "true").lower() == "true"  # BM25 fused with dense results
+    RAG_LEXICAL_DIR = os.getenv("RAG_LEXICAL_DIR", "./.cache/lexical")
+    RAG_LEXICAL_K = int(os.getenv("RAG_LEXICAL_K", "20"))  # BM25 candidates per query
+    RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))  # reciprocal-rank fusion constant
+    RAG_PARTITIONS_ENABLED = os.getenv("RAG_PARTITIONS_ENABLED", "true").lower() == "true"  # one namespace per category
+    RAG_PARTITIONS_PATH = os.getenv("RAG_PARTITIONS_PATH", "./.cache/partitions.json")  # optional category/source details
+    RAG_PARTITIONS_TTL = int(os.getenv("RAG_PARTITIONS_TTL", "300"))  # seconds between describe_index_stats() calls
+    RAG_ROUTE_COVERAGE = float(os.getenv("RAG_ROUTE_COVERAGE", "0.8"))  # share of BM25 score the routed partitions must hold
+    RAG_ROUTE_HITS = int(os.getenv("RAG_ROUTE_HITS", "50"))  # BM25 hits used for routing
+    RAG_PARTITION_WORKERS = int(os.getenv("RAG_PARTITION_WORKERS", "4"))  # parallel namespace queries
+    RAG_VECTOR_STORE = os.getenv("RAG_VECTOR_STORE", "pinecone").lower()  # pinecone | local (rag/vector_store.py)
+    RAG_VECTOR_DIR = os.getenv("RAG_VECTOR_DIR", "./.cache/vectors")
+    RAG_VECTOR_QUANT = os.getenv("RAG_VECTOR_QUANT", "sq8").lower()  # sq8 (1 byte/dim) | pq (RAG_PQ_SUBVECTORS bytes)
+    RAG_PQ_SUBVECTORS = int(os.getenv("RAG_PQ_SUBVECTORS", "96"))
+    RAG_VECTOR_RESCORE = int(os.getenv("RAG_VECTOR_RESCORE", "100"))  # quantized candidates re-scored with float vectors
+    # Optional cross-encoder rerank (onnxruntime + tokenizers) - see rag/reranker.py
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL_DIR = os.getenv("RERANK_MODEL_DIR", "./models/ms-marco-MiniLM-L-6-v2-onnx")
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # chunks fetched before reranking
+    RERANK_BATCH = int(os.getenv("RERANK_BATCH", "8"))
+    RERANK_BUDGET_MS = int(os.getenv("RERANK_BUDGET_MS", "250"))
+    RERANK_MAX_TOKENS = int(os.getenv("RERANK_MAX_TOKENS", "256"))
+    RERANK_THREADS = int(os.getenv("RERANK_THREADS", "2"))
+    RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))  # (query, chunk) scores kept
+    RERANK_MIN_SCORE = float(os.environ["RERANK_MIN_SCORE"]) if os.getenv("RERANK_MIN_SCORE") else None  # drop chunks below this logit
 
     ENV = os.getenv("ENV", "PROD")
 
+    # Serving (gunicorn) - see gunicorn.conf.py
+    PORT = int(os.getenv("PORT", "5000"))
+    WORKER_CLASS = os.getenv("WORKER_CLASS", "threaded").lower()  # threaded | sync
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = derive from CPU count
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))
+    WORKER_THREADS = int(os.getenv("WORKER_THREADS", "8"))
+    PRELOAD_APP = os.getenv("PRELOAD_APP", "true").lower() == "true"
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_TICKERS = [t.strip() for t in os.getenv("WARMUP_TICKERS", "RELIANCE,TCS,HDFCBANK,INFY,ICICIBANK").split(",") if t.strip()]
+
+    # Observability: set to a local collector (e.g. http://localhost:4318) to export spans over OTLP/HTTP
+    OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "portfolio-insight-backend")
+
+    # Background price refresher (keeps hot symbols warm during the session)
+    REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "true").lower() == "true"
+    REFRESH_TOP_N = int(os.getenv("REFRESH_TOP_N", "50"))
+    REFRESH_BUDGET_PER_MIN = int(os.getenv("REFRESH_BUDGET_PER_MIN", "200"))  # symbols per rolling minute, split across workers
+    REFRESH_LEAD_SECONDS = int(os.getenv("REFRESH_LEAD_SECONDS", "10"))
+    REFRESH_TICK_SECONDS = int(os.getenv("REFRESH_TICK_SECONDS", "5"))
+    REFRESH_HALF_LIFE = int(os.getenv("REFRESH_HALF_LIFE", "900"))  # seconds
+
+    # Per-route timeouts (in seconds); DEFAULT only sets the worker heartbeat floor
+    ROUTE_TIMEOUT_DEFAULT = int(os.getenv("ROUTE_TIMEOUT_DEFAULT", "30"))
+    ROUTE_TIMEOUT_CHAT = int(os.getenv("ROUTE_TIMEOUT_CHAT", "90"))
+    ROUTE_TIMEOUT_INGEST = int(os.getenv("ROUTE_TIMEOUT_INGEST", "900"))
+
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "advisor-kg")
-    EMBED_DIM = int(os.getenv("EMBED_DIM", "768")) 
+    EMBED_DIM = int(os.getenv("EMBED_DIM", "768"))  # empty local index only; ingest uses the embedder's dimension
     EMBED_METRIC = os.getenv("EMBED_METRIC", "cosine")
     EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))
+
+    # Local CPU embeddings (EMBED_PROVIDER=local) - see rag/embeddings.py
+    LOCAL_EMBED_MODEL_DIR = os.getenv("LOCAL_EMBED_MODEL_DIR", "./models/all-MiniLM-L6-v2-onnx")  # HF_EMBED_MODEL exported to ONNX
+    LOCAL_EMBED_MAX_TOKENS = int(os.getenv("LOCAL_EMBED_MAX_TOKENS", "256"))
+    LOCAL_EMBED_THREADS = int(os.getenv("LOCAL_EMBED_THREADS", "1"))  # onnxruntime threads per batch; pool = cores / this
+    LOCAL_EMBED_BATCH = int(os.getenv("LOCAL_EMBED_BATCH", "32"))  # documents per batch at ingest
+    LOCAL_EMBED_MAX_BATCH = int(os.getenv("LOCAL_EMBED_MAX_BATCH", "16"))  # concurrent queries per batch
+    LOCAL_EMBED_BATCH_WAIT_MS = float(os.getenv("LOCAL_EMBED_BATCH_WAIT_MS", "2"))
+    LOCAL_EMBED_CACHE_SIZE = int(os.getenv("LOCAL_EMBED_CACHE_SIZE", "50000"))
     
     @classmethod
     def validate_config(cls):
@@ -0,0 +1,30 @@
+# Gunicorn configuration: `gunicorn -c gunicorn.conf.py wsgi:app`
+# All knobs come from Config (environment variables); see serving.py.
+import serving
+from config import Config
+
+bind = f"0.0.0.0:{Config.PORT}"
+worker_class = serving.worker_class()
+workers = serving.worker_count()
+threads = Config.WORKER_THREADS if worker_class == "gthread" else 1
+preload_app = Config.PRELOAD_APP
+
+# Chat and ingest timeouts are enforced inside the app; the worker heartbeat
+# only has to outlive the slowest route.
+timeout = serving.max_route_timeout() + 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    if preload_app:
+        serving.preload_heavy_modules()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded and before it starts accepting connections.
+    serving.warmup()
+    serving.start_background_jobs(worker.cfg.workers)
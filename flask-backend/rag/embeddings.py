@@ -0,0 +1,166 @@
+"""
+Local CPU embeddings (EMBED_PROVIDER=local): a small sentence-transformer, e.g.
+all-MiniLM-L6-v2 exported to int8 ONNX, run through onnxruntime.
+
+- queries: embed_query() calls from concurrent requests are queued and run
+  as one batch, up to LOCAL_EMBED_MAX_BATCH texts or LOCAL_EMBED_BATCH_WAIT_MS
+  after the first one arrives
+- documents: embed_documents() splits into LOCAL_EMBED_BATCH batches run on
+  a thread pool sized to the cores
+- both: vectors are cached by content hash (LRU, LOCAL_EMBED_CACHE_SIZE)
+
+Vectors are mean-pooled and L2-normalised, as sentence-transformers does.
+Ingest creates the Pinecone index with the model's dimension (self.dim) and
+refuses an existing index of another dimension, so switching provider means
+ingesting into a new index.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import Config
+from utils.tracing import span
+from .onnx_models import OnnxTextModel
+
+
+class SentenceEncoder(OnnxTextModel):
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """(B, D) float32 unit vectors."""
+        out, mask = self.run(texts)
+        if out.ndim == 3:
+            # Token embeddings: mean over real tokens
+            m = mask[:, :, None].astype(np.float32)
+            out = (out * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        out = out.astype(np.float32)
+        return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+
+
+class LocalEmbeddings(Embeddings):
+    def __init__(self, model_dir: str):
+        threads = max(1, Config.LOCAL_EMBED_THREADS)
+        self.model = SentenceEncoder(model_dir, threads, Config.LOCAL_EMBED_MAX_TOKENS)
+        self.workers = max(1, (os.cpu_count() or 1) // threads)
+        self.dim = int(self.model.encode(["dimension probe"]).shape[1])
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._batcher_pid: int | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_pid: int | None = None
+        self._start_lock = threading.Lock()
+        print(f"[EMBED] local model {self.model.path} dim={self.dim} workers={self.workers}x{threads} threads")
+
+    # --- cache ---------------------------------------------------------------------------
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> np.ndarray | None:
+        with self._cache_lock:
+            v = self._cache.get(key)
+            if v is not None:
+                self._cache.move_to_end(key)
+            return v
+
+    def _store(self, key: str, vec: np.ndarray):
+        with self._cache_lock:
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > Config.LOCAL_EMBED_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    # --- query batching ------------------------------------------------------------------
+
+    def _ensure_batcher(self):
+        """One batching thread per process (threads do not survive a fork)."""
+        if self._batcher_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._batcher_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._batch_loop, name="embed-batcher", daemon=True).start()
+                self._batcher_pid = os.getpid()
+
+    def _batch_loop(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            deadline = time.perf_counter() + Config.LOCAL_EMBED_BATCH_WAIT_MS / 1000
+            while len(batch) < Config.LOCAL_EMBED_MAX_BATCH:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=left))
+                except queue.Empty:
+                    break
+            texts = list(dict.fromkeys(t for t, _ in batch))
+            try:
+                with span("embed.local", kind="internal", texts=len(texts), requests=len(batch)):
+                    vecs = dict(zip(texts, self.model.encode(texts)))
+                for t, fut in batch:
+                    fut.set_result(vecs[t])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vec = self._cached(key)
+        if vec is None:
+            self._ensure_batcher()
+            fut: Future = Future()
+            self._queue.put((text, fut))
+            vec = fut.result(timeout=30)
+            self._store(key, vec)
+        return vec.tolist()
+
+    # --- documents -----------------------------------------------------------------------
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._start_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        out: list = [self._cached(k) for k in keys]
+        todo = list(dict.fromkeys(t for t, v in zip(texts, out) if v is None))
+        if todo:
+            size = Config.LOCAL_EMBED_BATCH
+            batches = [todo[i:i + size] for i in range(0, len(todo), size)]
+            fresh = {}
+            for batch, vecs in zip(batches, self._executor().map(self.model.encode, batches)):
+                fresh.update(zip(batch, vecs))
+            for i, t in enumerate(texts):
+                if out[i] is None:
+                    out[i] = fresh[t]
+                    self._store(keys[i], out[i])
+        return [v.tolist() for v in out]
+
+
+_local: LocalEmbeddings | None = None
+_local_lock = threading.Lock()
+
+
+def get_local_embeddings() -> LocalEmbeddings:
+    """One model per process, shared by ingest and retrieval."""
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                t0 = time.time()
+                _local = LocalEmbeddings(Config.LOCAL_EMBED_MODEL_DIR)
+                print(f"[EMBED] ready in {(time.time() - t0) * 1000:.0f} ms")
+    return _local
@@ -3,9 +3,13 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, UnstructuredURLLoader, TextLoader
 from langchain_community.vectorstores import Pinecone as PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
+from .lexical import update_lexical_index
 from .llm import make_embedder
+from .partitions import forget_namespaces, namespace_for, record_partitions
+from .vector_store import get_vector_index, update_vector_index
 from config import Config
 from utils.logging_utils import StepTimer
+from utils.tracing import span
 
 CHUNK_SIZE = 1200
 CHUNK_OVERLAP = 150
@@ -91,6 +95,15 @@ def _make_ids(batch):
         ids.append(f"{src}::p{page}::c{j}")
     return ids
 
+def _embedding_dim(embeddings) -> int:
+    """The embedder's output dimension (LocalEmbeddings knows it; others are probed once)."""
+    return getattr(embeddings, "dim", None) or len(embeddings.embed_query("dimension probe"))
+
+def _index_dim(pc, index_name: str) -> int | None:
+    desc = pc.describe_index(index_name)
+    dim = desc.get("dimension") if isinstance(desc, dict) else getattr(desc, "dimension", None)
+    return int(dim) if dim else None
+
 def ingest(manifest: list[dict]):
     tm = StepTimer("INGEST")
     tm.start(f"start; docs={len(manifest)}")
@@ -111,42 +124,87 @@ def ingest(manifest: list[dict]):
     embeddings = make_embedder()  # LangChain Embeddings object (Gemini/OpenAI/ST)
     tm.step("embedding ready")
 
-    tm.step("pinecone init")
-    pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-    index_name = os.getenv("PINECONE_INDEX_NAME", "advisor-kg")
-    dimension = int(os.getenv("EMBED_DIM", "1536"))  # must match your embeddings model
-    metric = os.getenv("EMBED_METRIC", "cosine")
-    region = os.getenv("PINECONE_REGION", "us-east-1")
-
-    # Some SDK versions lack has_index; fall back to list_indexes
-    try:
-        has_idx = pc.has_index(index_name)
-    except Exception:
-        has_idx = index_name in [i["name"] for i in pc.list_indexes().get("indexes", [])]
-
-    if not has_idx:
-        pc.create_index(
-            name=index_name,
-            dimension=dimension,
-            metric=metric,
-            spec=ServerlessSpec(cloud="aws", region=region),
-        )
-    index = pc.Index(index_name)
-    vector_store = PineconeVectorStore(index=index, embedding=embeddings)
-
+    local = Config.RAG_VECTOR_STORE == "local"
     BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))
-    print(f"[INGEST] provider={getattr(Config, 'EMBED_PROVIDER', 'unknown')} index={index_name} dim={dimension} metric={metric} region={region} batch={BATCH_SIZE}")
+    dimension = _embedding_dim(embeddings)  # the index must match the model
+    if local:
+        index_name = Config.RAG_VECTOR_DIR
+        current = get_vector_index()
+        if current is not None and len(current) and current.dim != dimension:
+            raise ValueError(f"local vector index {index_name} has dimension {current.dim} but the {Config.EMBED_PROVIDER} "
+                             f"embedder returns {dimension}; use a new RAG_VECTOR_DIR")
+        print(f"[INGEST] provider={getattr(Config, 'EMBED_PROVIDER', 'unknown')} local vectors={index_name} quant={Config.RAG_VECTOR_QUANT} batch={BATCH_SIZE}")
+    else:
+        tm.step("pinecone init")
+        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+        index_name = os.getenv("PINECONE_INDEX_NAME", "advisor-kg")
+        metric = os.getenv("EMBED_METRIC", "cosine")
+        region = os.getenv("PINECONE_REGION", "us-east-1")
+
+        # Some SDK versions lack has_index; fall back to list_indexes
+        try:
+            has_idx = pc.has_index(index_name)
+        except Exception:
+            has_idx = index_name in [i["name"] for i in pc.list_indexes().get("indexes", [])]
+
+        if not has_idx:
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric=metric,
+                spec=ServerlessSpec(cloud="aws", region=region),
+            )
+        else:
+            existing = _index_dim(pc, index_name)
+            if existing and existing != dimension:
+                raise ValueError(f"Pinecone index {index_name} has dimension {existing} but the {Config.EMBED_PROVIDER} "
+                                 f"embedder returns {dimension}; ingest into a new PINECONE_INDEX_NAME")
+        index = pc.Index(index_name)
+        vector_store = PineconeVectorStore(index=index, embedding=embeddings)
+        print(f"[INGEST] provider={getattr(Config, 'EMBED_PROVIDER', 'unknown')} index={index_name} dim={dimension} metric={metric} region={region} batch={BATCH_SIZE}")
 
     total = 0
     failures = 0
+    indexed = []
+    vectors = []
     for i in range(0, len(chunks), BATCH_SIZE):
         batch = chunks[i:i+BATCH_SIZE]
         ids = _make_ids(batch)
+        # One upsert per partition (Pinecone namespace) in the batch
+        groups = {}
+        for cid, d in zip(ids, batch):
+            ns = namespace_for(d.metadata) if Config.RAG_PARTITIONS_ENABLED else None
+            groups.setdefault(ns, []).append((cid, d))
+        for ns, group in groups.items():
+            try:
+                if local:
+                    with span("embed.documents", kind="internal", namespace=ns or ""):
+                        vectors += embeddings.embed_documents([d.page_content for _, d in group])
+                else:
+                    with span("pinecone.upsert", kind="upstream", namespace=ns or ""):
+                        vector_store.add_documents([d for _, d in group], ids=[cid for cid, _ in group], namespace=ns)
+                total += len(group)
+                indexed += [{"id": cid, "text": d.page_content, "metadata": d.metadata} for cid, d in group]
+            except Exception as e:
+                failures += len(group)
+                print(f"[INGEST] batch {i//BATCH_SIZE} namespace={ns} failed ({len(group)} docs): {e}")
+
+    if indexed and Config.RAG_PARTITIONS_ENABLED:
+        record_partitions([c["metadata"] for c in indexed])
+
+    dense = None
+    if indexed and local:
+        dense = update_vector_index(indexed, vectors)
+    if indexed:
+        forget_namespaces()  # new partitions are routable without waiting for RAG_PARTITIONS_TTL
+
+    lexical = None
+    if indexed and Config.RAG_LEXICAL_ENABLED:
+        # Same chunks and ids as Pinecone, for BM25 fusion in the retriever
         try:
-            vector_store.add_documents(batch, ids=ids)
-            total += len(batch)
+            lexical = update_lexical_index(indexed)
         except Exception as e:
-            failures += len(batch)
-            print(f"[INGEST] batch {i//BATCH_SIZE} failed ({len(batch)} docs): {e}")
+            print(f"[INGEST] lexical index update failed: {e}")
 
-    return {"chunks_indexed": total, "batches": (len(chunks) + BATCH_SIZE - 1)//BATCH_SIZE, "failed": failures, "index": index_name}
+    tm.end(f"indexed={total} failed={failures} lexical={lexical}")
+    return {"chunks_indexed": total, "lexical_chunks": lexical, "local_vectors": dense, "batches": (len(chunks) + BATCH_SIZE - 1)//BATCH_SIZE, "failed": failures, "index": index_name}
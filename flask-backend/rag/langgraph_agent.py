@@ -6,6 +6,7 @@ from langchain.tools import tool
 import json
 import time
 from utils.logging_utils import StepTimer
+from utils.tracing import span, trace_context, current_trace_id
 from .llm import make_chat_llm
 from tools import ALL_TOOLS
 from tools.rag_tool import search_knowledge_base
@@ -21,7 +22,14 @@ DECISION MAKING:
 - For questions about financial CONCEPTS, DEFINITIONS, or PRINCIPLES → Use search_knowledge_base tool
 - For questions about CURRENT PRICES, MARKET DATA, or SPECIFIC COMPANIES → Use live market data tools
 - For HYBRID questions → Use both tools as needed
-- For PORTFOLIO ANALYSIS → Use live data tools for current prices + knowledge base for analysis frameworks
+- For PORTFOLIO ANALYSIS → Use live data tools for current prices + knowledge base for analysis frameworks; for DIVERSIFICATION / concentration use get_portfolio_correlation
+- For COMPANY NAMES without a ticker → Use resolve_symbols first; never guess ticker symbols
+- For TREND / MOMENTUM questions → Use get_technical_indicators instead of reading raw intraday data
+- For DOWNSIDE RISK / "how much could I lose" questions → Use get_portfolio_risk with the holdings
+- For REBALANCING / target allocation questions → Use optimize_portfolio; present weights as a table and mention estimation risk
+- For PAST PERFORMANCE of weightings ("how would it have done", vs Nifty) → Use backtest_portfolio
+- For ACTUAL GAINS since purchase (dividends, XIRR) → Use get_portfolio_performance
+- For UPCOMING dividends / ex-dates → Use get_upcoming_events, not the full get_corporate_actions history
 
 RESPONSE GUIDELINES:
 - Provide detailed, well-structured answers
@@ -41,6 +49,7 @@ class AgentState(TypedDict):
     tools_used: List[str]
     knowledge_base_used: bool
     processing_start: float
+    trace_id: str
 
 def should_continue(state: AgentState):
     """Decide whether to continue with tools or end - FIXED VERSION"""
@@ -108,8 +117,33 @@ def filter_messages_for_gemini(messages):
     
     return filtered_messages
 
+_llm_with_tools = None
+
+def get_llm_with_tools():
+    """Chat LLM with all tools bound, created on first use and reused across requests"""
+    global _llm_with_tools
+    if _llm_with_tools is None:
+        llm = make_chat_llm()
+        
+        # Ensure all tools are available including search_knowledge_base
+        all_tools = ALL_TOOLS.copy()
+        tool_names = [tool.name for tool in all_tools]
+        if "search_knowledge_base" not in tool_names:
+            all_tools.append(search_knowledge_base)
+            print("✅ Added search_knowledge_base to tools list")
+        
+        print(f"🔧 Available tools: {[tool.name for tool in all_tools]}")
+        
+        # Bind tools to the model
+        _llm_with_tools = llm.bind_tools(all_tools)
+    return _llm_with_tools
+
 def call_model(state: AgentState):
     """Call the LLM to generate response or tool calls - GEMINI FIXED VERSION"""
+    with trace_context(state.get("trace_id")), span("agent", kind="node"):
+        return _call_model(state)
+
+def _call_model(state: AgentState):
     messages = state["messages"]
     
     # Add system message at the start if not present
@@ -127,26 +161,15 @@ def call_model(state: AgentState):
             HumanMessage(content=state.get("user_question", "Please help me with financial analysis."))
         ]
     
-    # Get LLM response
-    llm = make_chat_llm()
-    
-    # Ensure all tools are available including search_knowledge_base
-    all_tools = ALL_TOOLS.copy()
-    tool_names = [tool.name for tool in all_tools]
-    if "search_knowledge_base" not in tool_names:
-        all_tools.append(search_knowledge_base)
-        print("✅ Added search_knowledge_base to tools list")
-    
-    print(f"🔧 Available tools: {[tool.name for tool in all_tools]}")
-    
-    # Bind tools to the model
-    llm_with_tools = llm.bind_tools(all_tools)
+    # Get LLM response (client and tool binding are built once per process)
+    llm_with_tools = get_llm_with_tools()
     
     print("🤖 Invoking LLM with tools...")
     print(f"📝 Sending {len(filtered_messages)} filtered messages to Gemini")
     
     try:
-        response = llm_with_tools.invoke(filtered_messages)
+        with span("gemini.chat", kind="upstream"):
+            response = llm_with_tools.invoke(filtered_messages)
     except Exception as e:
         print(f"❌ LLM invocation failed: {str(e)}")
         # Create fallback response
@@ -178,6 +201,7 @@ class LangGraphRAGAgent:
     def __init__(self):
         self.graph = self._build_graph()
         self.compiled_graph = self.graph.compile()
+        get_llm_with_tools()
         print("✅ LangGraph RAG Agent initialized successfully (Gemini-compatible)")
     
     def _build_graph(self):
@@ -214,7 +238,7 @@ class LangGraphRAGAgent:
     
     def query(self, user_question: str, holdings: list = None) -> dict:
         """Process query using LangGraph RAG agent - GEMINI FIXED VERSION"""
-        tm = StepTimer("LANGGRAPH_AGENT")
+        tm = StepTimer("LANGGRAPH_AGENT", current_trace_id())
         tm.start(f"processing: {user_question[:60]}...")
         
         try:
@@ -236,7 +260,8 @@ Please analyze what information is needed and use appropriate tools to provide a
                 "holdings": holdings,
                 "tools_used": [],
                 "knowledge_base_used": False,
-                "processing_start": time.time()
+                "processing_start": time.time(),
+                "trace_id": tm.req_id
             }
             
             tm.step("executing LangGraph workflow")
@@ -265,6 +290,7 @@ Please analyze what information is needed and use appropriate tools to provide a
             
             print(f"✅ Final answer generated: {len(final_answer)} characters")
             print(f"🔧 Tools used: {final_state.get('tools_used', [])}")
+            tm.end()
             
             return {
                 "answer": final_answer,
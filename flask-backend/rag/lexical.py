@@ -0,0 +1,196 @@
+"""
+Local BM25 index over the ingested chunks, for exact finance terms that dense
+retrieval misses ("EV/EBITDA", "Graham number", "DuPont").
+
+Postings are CSR arrays: offsets (V + 1) into doc_ids / tfs (one entry per
+term-chunk pair). Per-posting BM25 weights are computed once at load, so a
+query is a slice per term, one bincount over the chunks and an argpartition.
+On disk (RAG_LEXICAL_DIR) the index is postings.npz (the arrays and the
+vocabulary) plus chunks.jsonl (id, text, metadata); ingest() merges new
+chunks by id and rebuilds.
+"""
+import json
+import os
+import re
+import threading
+import numpy as np
+from config import Config
+from utils.logging_utils import StepTimer
+
+K1 = 1.2
+B = 0.75
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[/&.-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were what when "
+    "which who why will with".split()
+)
+
+
+def _stem(t: str) -> str:
+    return t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith(("ss", "us", "is")) else t
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms; compounds like ev/ebitda or p&l are kept whole and also split into their parts."""
+    out = []
+    for m in TOKEN_RE.findall(text.lower().replace("'", "")):
+        if m in STOPWORDS:
+            continue
+        out.append(_stem(m))
+        if not m.isalnum():
+            out += [_stem(p) for p in re.split(r"[/&.-]", m) if len(p) > 1 and p not in STOPWORDS]
+    return out
+
+
+def best_window(text: str, query: str, size: int) -> str:
+    """The `size`-character span of `text` holding the most query terms, starting at a word boundary."""
+    if len(text) <= size:
+        return text
+    terms = set(tokenize(query))
+    hits = np.array([m.start() for m in TOKEN_RE.finditer(text.lower().replace("'", " "))
+                     if any(t in terms for t in tokenize(m.group()))], dtype=np.int64)
+    if not len(hits):
+        return text[:size]
+    # Windows starting at a hit: count of hits inside each
+    counts = np.searchsorted(hits, hits + size) - np.arange(len(hits))
+    start = int(hits[int(np.argmax(counts))])
+    # Lead in with some context before the first hit, at a sentence or word break
+    lead = max(0, start - size // 5)
+    cut = max(text.rfind(". ", lead, start), text.rfind("\n", lead, start))
+    start = cut + 1 if cut >= 0 else (text.rfind(" ", 0, lead) + 1 if lead else 0)
+    start = min(start, len(text) - size)
+    return text[start:start + size].strip()
+
+
+class BM25Index:
+    def __init__(self, vocab: list[str], offsets: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray,
+                 doc_len: np.ndarray, chunks: list[dict]):
+        self.terms = {t: i for i, t in enumerate(vocab)}
+        self.vocab, self.offsets, self.doc_ids, self.tfs, self.doc_len = vocab, offsets, doc_ids, tfs, doc_len
+        self.chunks = chunks
+        self._masks: dict = {}
+        n = len(doc_len)
+        df = np.diff(offsets)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = (K1 * (1 - B + B * doc_len / max(float(doc_len.mean()) if n else 1.0, 1.0))).astype(np.float32)
+        tf = tfs.astype(np.float32)
+        self.weights = np.repeat(idf, df) * tf * (K1 + 1) / (tf + norm[doc_ids])
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @classmethod
+    def build(cls, chunks: list[dict]) -> "BM25Index":
+        """chunks: [{"id", "text", "metadata"}]."""
+        terms: dict[str, int] = {}
+        rows, cols, counts = [], [], []
+        doc_len = np.zeros(len(chunks), dtype=np.int32)
+        for d, c in enumerate(chunks):
+            toks = tokenize(c["text"])
+            doc_len[d] = len(toks)
+            ids, tf = np.unique(np.array([terms.setdefault(t, len(terms)) for t in toks], dtype=np.int64), return_counts=True)
+            rows.append(ids)
+            cols.append(np.full(len(ids), d, dtype=np.int32))
+            counts.append(tf)
+        term_ids = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        docs = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32)
+        tfs = np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")  # group by term, chunk order kept within a term
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        return cls(list(terms), offsets, docs[order], np.minimum(tfs[order], 65535).astype(np.uint16), doc_len, chunks)
+
+    def metadata_mask(self, key, keep) -> np.ndarray:
+        """Chunks whose metadata passes `keep`, cached under `key`."""
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = np.array([bool(keep(c.get("metadata") or {})) for c in self.chunks], dtype=bool)
+        return mask
+
+    def search(self, query: str, k: int = 10, mask: np.ndarray | None = None) -> list[tuple[int, float]]:
+        """(chunk index, score) for the top-k chunks (among `mask`), best first."""
+        ids = [self.terms[t] for t in dict.fromkeys(tokenize(query)) if t in self.terms]
+        if not ids or not len(self.chunks):
+            return []
+        idx = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in ids])
+        scores = np.bincount(self.doc_ids[idx], weights=self.weights[idx], minlength=len(self.chunks))
+        if mask is not None:
+            scores[~mask] = 0.0
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f"chunks.jsonl.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for c in self.chunks:
+                f.write(json.dumps(c, default=str) + "\n")
+        os.replace(tmp, os.path.join(directory, "chunks.jsonl"))
+        # postings.npz is written last: its mtime marks a complete index
+        tmp = os.path.join(directory, f"postings.{os.getpid()}.tmp.npz")
+        np.savez(tmp, vocab=np.array(self.vocab, dtype=str), offsets=self.offsets, doc_ids=self.doc_ids,
+                 tfs=self.tfs, doc_len=self.doc_len)
+        os.replace(tmp, os.path.join(directory, "postings.npz"))
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        with open(os.path.join(directory, "chunks.jsonl"), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        with np.load(os.path.join(directory, "postings.npz")) as z:
+            return cls(z["vocab"].tolist(), z["offsets"], z["doc_ids"], z["tfs"], z["doc_len"], chunks)
+
+
+_index: BM25Index | None = None
+_index_mtime = 0.0
+_lock = threading.Lock()
+
+
+def _postings_mtime() -> float:
+    try:
+        return os.path.getmtime(os.path.join(Config.RAG_LEXICAL_DIR, "postings.npz"))
+    except OSError:
+        return 0.0
+
+
+def get_lexical_index() -> BM25Index | None:
+    """The on-disk index, reloaded when another process (or an ingest) has rewritten it."""
+    global _index, _index_mtime
+    mtime = _postings_mtime()
+    if not mtime or mtime == _index_mtime:
+        return _index if mtime else None
+    with _lock:
+        if mtime != _index_mtime:
+            try:
+                _index = BM25Index.load(Config.RAG_LEXICAL_DIR)
+                _index_mtime = mtime
+                print(f"[LEXICAL] loaded chunks={len(_index)} terms={len(_index.vocab)}")
+            except Exception as e:
+                print(f"[LEXICAL] could not load index: {e}")
+    return _index
+
+
+def _read_index() -> BM25Index | None:
+    try:
+        return BM25Index.load(Config.RAG_LEXICAL_DIR) if _postings_mtime() else None
+    except Exception as e:
+        print(f"[LEXICAL] ignoring unreadable index: {e}")
+        return None
+
+
+def update_lexical_index(chunks: list[dict]) -> int:
+    """Merge chunks ({"id", "text", "metadata"}) into the persisted index by id; returns the chunk count."""
+    tm = StepTimer("LEXICAL")
+    tm.start(f"merging {len(chunks)} chunks")
+    with _lock:
+        current = _read_index()
+        merged = {c["id"]: c for c in (current.chunks if current else [])}
+        merged.update({c["id"]: c for c in chunks})
+        index = BM25Index.build(list(merged.values()))
+        index.save(Config.RAG_LEXICAL_DIR)
+    tm.end(f"chunks={len(index)} terms={len(index.vocab)} postings={len(index.doc_ids)}")
+    return len(index)
+
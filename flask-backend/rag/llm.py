@@ -54,8 +54,12 @@ def make_chat_llm():
     )
 
 def make_embedder():
+    if Config.EMBED_PROVIDER in ("local", "hf"):
+        # HF_EMBED_MODEL exported to ONNX, run on the CPU (rag/embeddings.py)
+        from .embeddings import get_local_embeddings
+        return get_local_embeddings()
     if Config.EMBED_PROVIDER != "gemini":
-        raise ValueError("Unsupported EMBED_PROVIDER: only 'gemini' is supported")
+        raise ValueError("Unsupported EMBED_PROVIDER: use 'gemini' or 'local'")
     
     return GoogleGenerativeAIEmbeddings(
         model=Config.GEMINI_EMBED_MODEL,
@@ -0,0 +1,48 @@
+"""
+Small transformer models run on the CPU with onnxruntime (optional dependency).
+
+A model directory holds model_quantized.onnx (int8, preferred) or model.onnx
+plus the Hugging Face tokenizer.json, e.g. an Optimum export of
+all-MiniLM-L6-v2 or ms-marco-MiniLM-L-6-v2. Used by the local embedder
+(rag/embeddings.py) and the reranker (rag/reranker.py).
+"""
+import os
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = Tokenizer = None
+
+MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+
+
+class OnnxTextModel:
+    def __init__(self, model_dir: str, threads: int, max_tokens: int):
+        if ort is None:
+            raise ImportError("onnxruntime/tokenizers not installed")
+        path = next((os.path.join(model_dir, f) for f in MODEL_FILES if os.path.exists(os.path.join(model_dir, f))), None)
+        if path is None:
+            raise FileNotFoundError(f"no {' or '.join(MODEL_FILES)} in {model_dir}")
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.enable_padding()
+
+    def run(self, batch: list) -> tuple[np.ndarray, np.ndarray]:
+        """(first model output, attention mask) for a batch of texts or (text, text) pairs."""
+        enc = self.tokenizer.encode_batch(batch)
+        mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+        feed = {
+            "input_ids": np.array([e.ids for e in enc], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in enc], dtype=np.int64),
+        }
+        return self.session.run(None, {k: v for k, v in feed.items() if k in self.inputs})[0], mask
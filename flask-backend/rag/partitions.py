@@ -0,0 +1,181 @@
+"""
+Knowledge-base partitions and query-time routing.
+
+Ingest upserts each chunk into the Pinecone namespace of its partition:
+metadata["namespace"] if given, else its category (see
+ingestion_manifest.json). The partitions are the index's own namespaces
+(describe_index_stats(), cached for RAG_PARTITIONS_TTL), so routing works on a
+fresh container. The default namespace ("") holds chunks ingested before
+partitioning and is searched with every route until they are moved
+(scripts/migrate_partitions.py). An optional local registry
+(RAG_PARTITIONS_PATH) adds each partition's category and per-source chunk counts.
+
+route() picks the partitions a query searches:
+
+1. explicit category / source (tool arguments) become metadata filters and
+   select the partitions that can hold them
+2. a query naming a category ("market reports") selects its partitions; one
+   naming only sources ("the intelligent investor") searches just those sources
+3. otherwise the BM25 index decides: partitions are taken in order of their
+   share of the top lexical scores until RAG_ROUTE_COVERAGE is reached
+4. with no lexical signal, every partition is searched
+
+An index without named namespaces is searched as one default namespace, as before.
+"""
+import json
+import os
+import re
+import threading
+import time
+from config import Config
+from .lexical import tokenize
+
+_registry: dict = {}
+_registry_mtime = 0.0
+_lock = threading.Lock()
+_namespaces: tuple | None = None  # (index, fetched at, {namespace: vector count})
+
+
+def namespace_for(metadata: dict) -> str:
+    name = str(metadata.get("namespace") or metadata.get("category") or "default").strip().lower()
+    return re.sub(r"[^a-z0-9_-]+", "_", name) or "default"
+
+
+def load_registry() -> dict[str, dict]:
+    """{namespace: {"category": str, "sources": {source: chunks}}}, reloaded when the file changes."""
+    global _registry, _registry_mtime
+    try:
+        mtime = os.path.getmtime(Config.RAG_PARTITIONS_PATH)
+    except OSError:
+        return {}
+    if mtime != _registry_mtime:
+        with _lock:
+            try:
+                with open(Config.RAG_PARTITIONS_PATH, encoding="utf-8") as f:
+                    _registry = json.load(f)
+                _registry_mtime = mtime
+            except Exception as e:
+                print(f"[PARTITIONS] ignoring unreadable registry: {e}")
+    return _registry
+
+
+def record_partitions(metadatas: list[dict]):
+    """Record the partitions and per-source chunk counts of newly upserted chunks."""
+    with _lock:
+        try:
+            with open(Config.RAG_PARTITIONS_PATH, encoding="utf-8") as f:
+                reg = json.load(f)
+        except (OSError, ValueError):
+            reg = {}
+        counts: dict[tuple[str, str], int] = {}
+        for meta in metadatas:
+            ns = namespace_for(meta)
+            reg.setdefault(ns, {"category": meta.get("category"), "sources": {}})
+            key = (ns, str(meta.get("source") or "unknown"))
+            counts[key] = counts.get(key, 0) + 1
+        # A source is ingested whole, so re-ingesting it replaces its count
+        for (ns, src), n in counts.items():
+            reg[ns]["sources"][src] = n
+        os.makedirs(os.path.dirname(Config.RAG_PARTITIONS_PATH) or ".", exist_ok=True)
+        tmp = f"{Config.RAG_PARTITIONS_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(reg, f, indent=1, sort_keys=True)
+        os.replace(tmp, Config.RAG_PARTITIONS_PATH)
+
+
+def index_namespaces(index) -> dict[str, int]:
+    """{namespace: vector count} from index.describe_index_stats(), cached for RAG_PARTITIONS_TTL."""
+    global _namespaces
+    cached = _namespaces
+    now = time.time()
+    if cached and cached[0] is index and now - cached[1] < Config.RAG_PARTITIONS_TTL:
+        return cached[2]
+    try:
+        stats = index.describe_index_stats()
+        raw = stats.get("namespaces") if isinstance(stats, dict) else getattr(stats, "namespaces", None)
+        counts = {}
+        for name, summary in (raw or {}).items():
+            n = summary.get("vector_count") if isinstance(summary, dict) else getattr(summary, "vector_count", 0)
+            if n:
+                counts[name] = int(n)
+    except Exception as e:
+        print(f"[PARTITIONS] describe_index_stats failed: {e}")
+        return cached[2] if cached and cached[0] is index else {}
+    _namespaces = (index, now, counts)
+    return counts
+
+
+def forget_namespaces():
+    """Drop the cached namespace list (after an ingest created partitions)."""
+    global _namespaces
+    _namespaces = None
+
+
+def load_partitions(index=None) -> dict[str, dict]:
+    """{namespace: {"category", "sources"}} for the namespaces of `index` ("" = default), with registry details.
+
+    Without an index the registry alone is used.
+    """
+    reg = load_registry()
+    if index is None:
+        return reg
+    return {ns: {"category": (reg.get(ns) or {}).get("category") or ns or None,
+                 "sources": (reg.get(ns) or {}).get("sources", {})}
+            for ns in index_namespaces(index)}
+
+
+def _named(query_terms: set, name: str) -> bool:
+    """All (2+) terms of a category/source name appear in the query."""
+    terms = set(tokenize(name.replace("_", " ")))
+    return len(terms) >= 2 and terms <= query_terms
+
+
+def route(query: str, category: str | None = None, source: str | None = None,
+          lexical=None, index=None) -> tuple[list[str] | None, dict[str, list[str]]]:
+    """(namespaces to search, metadata filters {field: allowed values}); namespaces None = the default namespace.
+
+    "" in the namespaces is the default namespace (chunks from before partitioning).
+    """
+    filters = {"source": [source]} if source else {}
+    if category:
+        filters["category"] = [category]
+    parts = load_partitions(index) if Config.RAG_PARTITIONS_ENABLED else {}
+    named_parts = {ns: p for ns, p in parts.items() if ns}
+    if not named_parts:
+        return None, filters
+    legacy = [""] if "" in parts else []
+
+    def _with_legacy(picked: list[str]) -> list[str]:
+        return picked + legacy if picked else list(parts)
+
+    if category or source:
+        picked = [ns for ns, p in named_parts.items()
+                  if (not category or str(p.get("category")).lower() == category.lower() or ns == namespace_for({"category": category}))
+                  and (not source or not p.get("sources") or source in p["sources"])]
+        return _with_legacy(picked), filters
+
+    q = set(tokenize(query))
+    named = [ns for ns, p in named_parts.items() if _named(q, ns) or _named(q, str(p.get("category") or ""))]
+    sources = [s for p in named_parts.values() for s in p.get("sources", {}) if _named(q, s)]
+    if sources and not named:
+        return _with_legacy([ns for ns, p in named_parts.items() if any(s in p.get("sources", {}) for s in sources)]), {"source": sources}
+    if named:
+        return _with_legacy(named), filters
+
+    if lexical is not None and len(named_parts) > 1:
+        mass: dict[str, float] = {}
+        for i, score in lexical.search(query, Config.RAG_ROUTE_HITS):
+            ns = namespace_for(lexical.chunks[i].get("metadata") or {})
+            mass[ns] = mass.get(ns, 0.0) + score
+        total = sum(mass.values())
+        if total > 0:
+            picked, covered = [], 0.0
+            for ns in sorted(mass, key=mass.get, reverse=True):
+                if ns in named_parts:
+                    picked.append(ns)
+                    covered += mass[ns]
+                if covered >= Config.RAG_ROUTE_COVERAGE * total:
+                    break
+            if picked:
+                return _with_legacy(picked), filters
+    return list(parts), filters
@@ -0,0 +1,111 @@
+"""
+Optional cross-encoder rerank stage for knowledge-base retrieval.
+
+The retriever over-fetches RERANK_CANDIDATES chunks; a small cross-encoder
+(e.g. ms-marco-MiniLM-L-6-v2 exported to ONNX, int8-quantised) scores each
+(query, chunk) pair on the CPU through onnxruntime, in batches of
+RERANK_BATCH. Scoring stops once RERANK_BUDGET_MS is spent: scored chunks
+are ordered by score and the rest keep their retrieval order behind them.
+Scores are cached per (query hash, chunk id), so a repeated query only
+scores chunks it has not seen.
+
+Needs onnxruntime and tokenizers, plus RERANK_MODEL_DIR holding the model
+(see rag/onnx_models.py). Without them rerank() returns the retrieval order
+unchanged.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from config import Config
+from utils.metrics import REGISTRY
+from utils.tracing import span
+from .onnx_models import OnnxTextModel
+
+RERANK_FALLBACK = REGISTRY.counter("portfolio_rerank_fallback_total", "Rerank calls that kept (part of) the retrieval order, by reason")
+
+
+def chunk_id(doc) -> str:
+    cid = getattr(doc, "id", None) or doc.metadata.get("id")
+    return str(cid) if cid else hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+
+class CrossEncoder(OnnxTextModel):
+    def __init__(self, model_dir: str):
+        super().__init__(model_dir, Config.RERANK_THREADS, Config.RERANK_MAX_TOKENS)
+
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        """Relevance logits for (query, text) pairs, one batch."""
+        logits, _ = self.run([(query, t) for t in texts])
+        return logits[:, -1] if logits.ndim == 2 else logits
+
+
+_model: CrossEncoder | None = None
+_model_failed = False
+_model_lock = threading.Lock()
+_scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+_scores_lock = threading.Lock()
+
+
+def get_cross_encoder() -> CrossEncoder | None:
+    """Load once per process; None when disabled or the runtime/model is unavailable."""
+    global _model, _model_failed
+    if _model is not None or _model_failed or not Config.RERANK_ENABLED:
+        return _model
+    with _model_lock:
+        if _model is None and not _model_failed:
+            try:
+                t0 = time.time()
+                _model = CrossEncoder(Config.RERANK_MODEL_DIR)
+                print(f"[RERANK] loaded {Config.RERANK_MODEL_DIR} in {(time.time() - t0) * 1000:.0f} ms")
+            except Exception as e:
+                _model_failed = True
+                print(f"[RERANK] disabled: {e}")
+    return _model
+
+
+def _cache_put(key: tuple[str, str], score: float):
+    with _scores_lock:
+        _scores[key] = score
+        _scores.move_to_end(key)
+        while len(_scores) > Config.RERANK_CACHE_SIZE:
+            _scores.popitem(last=False)
+
+
+def rerank(query: str, docs: list, k: int) -> list:
+    """Top-k of `docs` (in retrieval order) by cross-encoder score, within the latency budget."""
+    model = get_cross_encoder()
+    if model is None or len(docs) <= 1:
+        return docs[:k]
+    qh = hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()[:16]
+    keys = [(qh, chunk_id(d)) for d in docs]
+    with _scores_lock:
+        scores = {i: _scores[key] for i, key in enumerate(keys) if key in _scores}
+    todo = [i for i in range(len(docs)) if i not in scores]
+    deadline = time.perf_counter() + Config.RERANK_BUDGET_MS / 1000
+    with span("rerank", kind="internal", candidates=len(docs), cached=len(scores)):
+        for b in range(0, len(todo), Config.RERANK_BATCH):
+            if time.perf_counter() >= deadline:
+                RERANK_FALLBACK.inc(reason="budget")
+                break
+            batch = todo[b:b + Config.RERANK_BATCH]
+            try:
+                out = model.score(query, [docs[i].page_content for i in batch])
+            except Exception as e:
+                print(f"[RERANK] scoring failed: {e}")
+                RERANK_FALLBACK.inc(reason="error")
+                break
+            for i, s in zip(batch, out):
+                scores[i] = float(s)
+                _cache_put(keys[i], float(s))
+    if not scores:
+        return docs[:k]
+    ranked = sorted(scores, key=lambda i: -scores[i])
+    if Config.RERANK_MIN_SCORE is not None:
+        # Drop marginal chunks, but always keep the best one
+        ranked = ranked[:1] + [i for i in ranked[1:] if scores[i] >= Config.RERANK_MIN_SCORE]
+    order = ranked + [i for i in range(len(docs)) if i not in scores]
+    for i in scores:
+        docs[i].metadata["rerank_score"] = round(scores[i], 4)
+    return [docs[i] for i in order[:k]]
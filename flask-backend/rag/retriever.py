@@ -1,16 +1,101 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
 from pinecone import Pinecone
 from langchain_community.vectorstores import Pinecone as PineconeVectorStore
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from config import Config
+from utils.tracing import span
+from .lexical import get_lexical_index
 from .llm import make_embedder
+from .partitions import namespace_for, route
+from .reranker import get_cross_encoder, rerank
+from .vector_store import LocalVectorStore, get_vector_index
 import os
 
+_retriever = None
+
+
+def rrf_fuse(rankings: list[list[Document]], k: int, c: int = 60) -> list[Document]:
+    """Reciprocal-rank fusion: score(d) = sum over lists of 1 / (c + rank); chunks matched by text."""
+    scores, docs = {}, {}
+    for ranked in rankings:
+        for rank, d in enumerate(ranked, 1):
+            key = d.page_content.strip()
+            scores[key] = scores.get(key, 0.0) + 1.0 / (c + rank)
+            docs.setdefault(key, d)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense MMR results (Pinecone, or rag/vector_store.py) fused with the local BM25 index
+    (rag/lexical.py), then optionally reranked (rag/reranker.py). Dense only until a BM25
+    index exists. Queries are routed to knowledge-base partitions first (rag/partitions.py)."""
+
+    store: Any
+    index: Any = None  # describe_index_stats() source for routing (Pinecone index or local store)
+    k: int = 6
+    candidates: int = 6  # fused results handed to the reranker
+    fetch_k: int = 24
+
+    def _dense(self, query: str, namespaces: list[str] | None, filters: dict) -> List[Document]:
+        """MMR per routed namespace (one query embedding), fused by rank."""
+        embedding = self.store.embeddings.embed_query(query)
+        kw = {"k": self.candidates, "fetch_k": self.fetch_k, "lambda_mult": 0.5,
+              "filter": {f: {"$in": v} for f, v in filters.items()} or None}
+
+        def _search(ns):
+            with span("pinecone.mmr", kind="upstream", namespace=ns or ""):
+                return self.store.max_marginal_relevance_search_by_vector(embedding, namespace=ns or None, **kw)
+
+        if not namespaces or len(namespaces) == 1:
+            return _search(namespaces[0] if namespaces else None)
+        with ThreadPoolExecutor(max_workers=min(Config.RAG_PARTITION_WORKERS, len(namespaces))) as pool:
+            ranked = list(pool.map(lambda ns: contextvars.copy_context().run(_search, ns), namespaces))
+        return rrf_fuse(ranked, self.candidates, Config.RAG_RRF_K)
+
+    def search(self, query: str, category: str | None = None, source: str | None = None) -> List[Document]:
+        """Top-k chunks, optionally only from one category / source."""
+        index = get_lexical_index() if Config.RAG_LEXICAL_ENABLED else None
+        namespaces, filters = route(query, category, source, index, self.index)
+        docs = self._dense(query, namespaces, filters)
+        if index is not None:
+            mask = None
+            if namespaces is not None or filters:
+                # Chunks in the default namespace may be of any category: only the filters apply
+                allowed = set(namespaces) if namespaces is not None and "" not in namespaces else None
+                key = (tuple(sorted(allowed)) if allowed is not None else None, tuple(sorted((f, tuple(v)) for f, v in filters.items())))
+                mask = index.metadata_mask(key, lambda m: (allowed is None or namespace_for(m) in allowed)
+                                           and all(str(m.get(f)) in v for f, v in filters.items()))
+            with span("bm25.search", kind="internal"):
+                hits = index.search(query, Config.RAG_LEXICAL_K, mask)
+            lexical = [Document(page_content=index.chunks[i]["text"], metadata=dict(index.chunks[i].get("metadata") or {}))
+                       for i, _ in hits]
+            docs = rrf_fuse([docs, lexical], self.candidates, Config.RAG_RRF_K)
+        return rerank(query, docs, self.k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.search(query)
+
+
 def get_retriever():
+    """Build the partition-routed dense MMR (Pinecone or local) + BM25 hybrid retriever once per process and reuse it."""
+    global _retriever
+    if _retriever is not None:
+        return _retriever
     embeddings = make_embedder()
-    pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-    index_name = os.getenv("PINECONE_INDEX_NAME", "advisor-kg")
-    index = pc.Index(index_name)
-
-    vs = PineconeVectorStore(index=index, embedding=embeddings)
-    return vs.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": 6, "fetch_k": 24, "lambda_mult": 0.5}
-    )
+    if Config.RAG_VECTOR_STORE == "local":
+        vs = index = LocalVectorStore(embeddings)
+        get_vector_index()
+    else:
+        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+        index = pc.Index(os.getenv("PINECONE_INDEX_NAME", "advisor-kg"))
+        vs = PineconeVectorStore(index=index, embedding=embeddings)
+
+    # Over-fetch when a reranker will pick the final six
+    candidates = max(6, Config.RERANK_CANDIDATES) if Config.RERANK_ENABLED else 6
+    _retriever = HybridRetriever(store=vs, index=index, k=6, candidates=candidates, fetch_k=max(24, 2 * candidates))
+    get_lexical_index()
+    get_cross_encoder()
+    return _retriever
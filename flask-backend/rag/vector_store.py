@@ -0,0 +1,331 @@
+"""
+Local dense index with compressed vectors (RAG_VECTOR_STORE=local), in place
+of Pinecone for small deployments.
+
+Each chunk's embedding is stored twice in RAG_VECTOR_DIR:
+
+- codes.u8: quantized codes that every query scans. With sq8 that is one byte
+  per dimension (per-dimension min/step). With pq it is one byte per
+  subvector, an index into a 256-entry k-means codebook for that subspace
+  (RAG_PQ_SUBVECTORS bytes per chunk).
+- vectors.f32: the float vectors. Only the top RAG_VECTOR_RESCORE candidates
+  are read, to re-score them exactly and run MMR.
+
+Both files and chunks.jsonl (read per hit) are memory-mapped read-only. So
+gunicorn workers share one copy through the page cache, and each worker keeps
+only the offsets and filter codes. index.npz holds the quantizer and is
+written last, so its mtime marks a complete index, as with the BM25 index.
+"""
+import json
+import mmap
+import os
+import threading
+from typing import List
+import numpy as np
+from langchain_core.documents import Document
+from config import Config
+from utils.logging_utils import StepTimer
+from .partitions import namespace_for
+
+FILTER_FIELDS = ("namespace", "category", "source")
+PQ_CENTROIDS = 256
+PQ_TRAIN_ROWS = 64 * PQ_CENTROIDS
+PQ_ITERATIONS = 12
+SCAN_FLOATS = 1 << 18  # values dequantized per scan block (cache-sized)
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def _field(meta: dict, field: str) -> str:
+    return namespace_for(meta) if field == "namespace" else str(meta.get(field))
+
+
+def _train_sq8(vectors: np.ndarray) -> dict:
+    lo = vectors.min(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+    hi = vectors.max(axis=0) if len(vectors) else lo
+    return {"lo": lo.astype(np.float32), "step": np.maximum((hi - lo) / 255, 1e-12).astype(np.float32)}
+
+
+def _encode_sq8(vectors: np.ndarray, q: dict) -> np.ndarray:
+    return np.clip(np.rint((vectors - q["lo"]) / q["step"]), 0, 255).astype(np.uint8)
+
+
+def _pq_subvectors(dim: int) -> int:
+    """RAG_PQ_SUBVECTORS, or the largest divisor of dim below it."""
+    m = max(1, min(Config.RAG_PQ_SUBVECTORS, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+
+def _train_pq(vectors: np.ndarray) -> dict:
+    """Per-subspace k-means (Lloyd) on a sample of the centred vectors: centroids (M, 256, D/M)."""
+    n, dim = vectors.shape
+    m = _pq_subvectors(dim)
+    rng = np.random.default_rng(0)
+    mean = vectors.mean(axis=0) if n else np.zeros(dim, dtype=np.float32)
+    sample = vectors[rng.choice(n, min(n, PQ_TRAIN_ROWS), replace=False)] - mean if n else vectors
+    sub = sample.reshape(len(sample), m, dim // m)
+    ks = min(PQ_CENTROIDS, len(sample))
+    # Unused codes (tiny corpora) are never the nearest centroid
+    centroids = np.full((m, PQ_CENTROIDS, dim // m), np.inf if ks < PQ_CENTROIDS else 0.0, dtype=np.float32)
+    for j in range(m if ks else 0):
+        x = np.ascontiguousarray(sub[:, j])
+        c = x[rng.choice(len(x), ks, replace=False)].copy()
+        for _ in range(PQ_ITERATIONS):
+            assign = np.argmax(x @ c.T - 0.5 * (c * c).sum(axis=1), axis=1)
+            counts = np.bincount(assign, minlength=ks)
+            sums = np.stack([np.bincount(assign, weights=x[:, d], minlength=ks) for d in range(x.shape[1])], axis=1)
+            c = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], c).astype(np.float32)
+        centroids[j, :ks] = c
+    return {"mean": mean.astype(np.float32), "centroids": centroids}
+
+
+def _encode_pq(vectors: np.ndarray, q: dict) -> np.ndarray:
+    """(M, N) codes: subvector-major, so a scan reads each subspace's codes contiguously."""
+    c = q["centroids"]
+    m, _, sub = c.shape
+    finite = np.where(np.isfinite(c), c, 0.0)
+    penalty = np.where(np.isfinite(c[:, :, 0]), 0.5 * (finite * finite).sum(axis=2), np.inf)
+    x = (vectors - q["mean"]).reshape(len(vectors), m, sub)
+    codes = np.zeros((m, len(vectors)), dtype=np.uint8)
+    step = max(1, SCAN_FLOATS // PQ_CENTROIDS)
+    for j in range(m):
+        for s in range(0, len(vectors), step):
+            codes[j, s:s + step] = np.argmax(x[s:s + step, j] @ finite[j].T - penalty[j], axis=1)
+    return codes
+
+
+class QuantizedIndex:
+    def __init__(self, directory: str):
+        with np.load(os.path.join(directory, "index.npz")) as z:
+            meta = {k: z[k] for k in z.files}
+        self.kind = str(meta["kind"])
+        self.dim = int(meta["dim"])
+        self.offsets = meta["offsets"]
+        self.quantizer = {k: meta[k] for k in ("lo", "step", "mean", "centroids") if k in meta}
+        self.fields = {f: (meta[f"{f}_codes"], meta[f"{f}_labels"].tolist()) for f in FILTER_FIELDS}
+        n = len(self.offsets) - 1
+        self.width = self.dim if self.kind == "sq8" else self.quantizer["centroids"].shape[0]
+        self.codes = self._map(os.path.join(directory, "codes.u8"), np.uint8,
+                               (n, self.width) if self.kind == "sq8" else (self.width, n))
+        self.vectors = self._map(os.path.join(directory, "vectors.f32"), np.float32, (n, self.dim))
+        self._text = None
+        if n and os.path.getsize(os.path.join(directory, "chunks.jsonl")):
+            with open(os.path.join(directory, "chunks.jsonl"), "rb") as f:
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._masks: dict = {}
+
+    @staticmethod
+    def _map(path: str, dtype, shape) -> np.ndarray:
+        expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if os.path.getsize(path) != expected:
+            raise ValueError(f"{os.path.basename(path)} is {os.path.getsize(path)} bytes, expected {expected}")
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape) if expected else np.zeros(shape, dtype=dtype)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def chunk(self, i: int) -> dict:
+        return json.loads(self._text[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+    def stats(self) -> dict:
+        """Bytes per chunk held in memory per query (codes + offsets + filter codes) vs float32."""
+        n = max(len(self), 1)
+        per_chunk = self.width + self.offsets.itemsize + sum(c.itemsize for c, _ in self.fields.values())
+        return {"chunks": len(self), "kind": self.kind, "dim": self.dim, "code_bytes": self.width,
+                "bytes_per_chunk": per_chunk, "float_bytes_per_chunk": self.dim * 4,
+                "disk_bytes_per_chunk": round((self.codes.nbytes + self.vectors.nbytes + int(self.offsets[-1])) / n, 1)}
+
+    def mask(self, namespaces: list[str] | None, filters: dict[str, list[str]]) -> np.ndarray | None:
+        """Chunks in `namespaces` whose metadata matches `filters`, cached; None = all."""
+        if namespaces is None and not filters:
+            return None
+        key = (tuple(sorted(namespaces)) if namespaces is not None else None,
+               tuple(sorted((f, tuple(v)) for f, v in filters.items())))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+            for field, allowed in ([("namespace", namespaces)] if namespaces is not None else []) + list(filters.items()):
+                allowed = set(allowed)
+                if field in self.fields:
+                    codes, labels = self.fields[field]
+                    mask &= np.isin(codes, [i for i, label in enumerate(labels) if label in allowed])
+                else:
+                    mask &= np.array([_field(self.chunk(i).get("metadata") or {}, field) in allowed
+                                      for i in range(len(self))], dtype=bool)
+            mask = self._masks[key] = mask
+        return mask
+
+    def approximate(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Quantized inner products for `rows` (all chunks if None)."""
+        n = len(self) if rows is None else len(rows)
+        if self.kind == "pq":
+            # Asymmetric distance: per-subspace lookup table of query . centroid
+            c = self.quantizer["centroids"]
+            lut = np.einsum("mks,ms->mk", np.where(np.isfinite(c), c, 0.0), query.reshape(c.shape[0], -1))
+            out = np.full(n, float(query @ self.quantizer["mean"]), dtype=np.float32)
+            for j in range(self.width):
+                out += lut[j][self.codes[j] if rows is None else self.codes[j, rows]]
+            return out
+        out = np.empty(n, dtype=np.float32)
+        weights, bias = query * self.quantizer["step"], float(query @ self.quantizer["lo"])
+        step = max(1, SCAN_FLOATS // self.width)
+        for s in range(0, n, step):
+            block = self.codes[s:s + step] if rows is None else self.codes[rows[s:s + step]]
+            out[s:s + step] = block.astype(np.float32) @ weights + bias
+        return out
+
+    def search(self, query, k: int, rescore: int, mask: np.ndarray | None = None) -> list[tuple[int, float]]:
+        """(chunk index, exact score) for the top k: `rescore` quantized candidates re-scored with the float vectors."""
+        q = _normalise(query)
+        rows = None if mask is None else np.flatnonzero(mask)
+        n = len(self) if rows is None else len(rows)
+        if not n or k <= 0:
+            return []
+        approx = self.approximate(q, rows)
+        r = min(max(k, rescore), n)
+        cand = np.argpartition(-approx, r - 1)[:r]
+        cand = np.sort(cand if rows is None else rows[cand])  # sorted rows read the float file in order
+        exact = self.vectors[cand] @ q
+        top = np.argsort(-exact)[:k]
+        return [(int(cand[i]), float(exact[i])) for i in top]
+
+    def mmr(self, query, k: int, fetch_k: int, lambda_mult: float, mask: np.ndarray | None = None) -> list[int]:
+        hits = self.search(query, fetch_k, Config.RAG_VECTOR_RESCORE, mask)
+        if not hits:
+            return []
+        cand = np.array([i for i, _ in hits])
+        sims = np.array([s for _, s in hits], dtype=np.float32)
+        vecs = _normalise(self.vectors[cand])
+        picked: list[int] = []
+        div = np.full(len(cand), -np.inf, dtype=np.float32)
+        while len(picked) < min(k, len(cand)):
+            score = lambda_mult * sims - (1 - lambda_mult) * np.where(np.isfinite(div), div, 0.0)
+            score[picked] = -np.inf
+            j = int(np.argmax(score))
+            picked.append(j)
+            div = np.maximum(div, vecs @ vecs[j])
+        return [int(cand[j]) for j in picked]
+
+
+def write_vector_index(directory: str, chunks: list[dict], vectors, kind: str):
+    """Quantize and write chunks ({"id", "text", "metadata"}) with their float vectors."""
+    if kind not in ("sq8", "pq"):
+        raise ValueError(f"Unsupported RAG_VECTOR_QUANT: {kind} (use 'sq8' or 'pq')")
+    vectors = _normalise(np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1))
+    quantizer = _train_sq8(vectors) if kind == "sq8" else _train_pq(vectors)
+    codes = _encode_sq8(vectors, quantizer) if kind == "sq8" else _encode_pq(vectors, quantizer)
+    fields = {}
+    for f in FILTER_FIELDS:
+        labels: dict[str, int] = {}
+        ids = [labels.setdefault(_field(c.get("metadata") or {}, f), len(labels)) for c in chunks]
+        fields[f"{f}_codes"] = np.array(ids, dtype=np.uint16 if len(labels) <= 65536 else np.int32)
+        fields[f"{f}_labels"] = np.array(list(labels), dtype=str)
+
+    os.makedirs(directory, exist_ok=True)
+    pid = os.getpid()
+    offsets = [0]
+    tmp = os.path.join(directory, f"chunks.jsonl.{pid}.tmp")
+    with open(tmp, "wb") as f:
+        for c in chunks:
+            line = (json.dumps(c, default=str) + "\n").encode("utf-8")
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    os.replace(tmp, os.path.join(directory, "chunks.jsonl"))
+    for name, arr in (("codes.u8", codes), ("vectors.f32", vectors)):
+        tmp = os.path.join(directory, f"{name}.{pid}.tmp")
+        np.ascontiguousarray(arr).tofile(tmp)
+        os.replace(tmp, os.path.join(directory, name))
+    # index.npz is written last: its mtime marks a complete index
+    tmp = os.path.join(directory, f"index.{pid}.tmp.npz")
+    np.savez(tmp, kind=kind, dim=vectors.shape[1], offsets=np.array(offsets, dtype=np.int64), **quantizer, **fields)
+    os.replace(tmp, os.path.join(directory, "index.npz"))
+
+
+_index: QuantizedIndex | None = None
+_index_mtime = 0.0
+_lock = threading.Lock()
+
+
+def _index_file_mtime() -> float:
+    try:
+        return os.path.getmtime(os.path.join(Config.RAG_VECTOR_DIR, "index.npz"))
+    except OSError:
+        return 0.0
+
+
+def get_vector_index() -> QuantizedIndex | None:
+    """The on-disk index, remapped when another process (or an ingest) has rewritten it."""
+    global _index, _index_mtime
+    mtime = _index_file_mtime()
+    if not mtime or mtime == _index_mtime:
+        return _index if mtime else None
+    with _lock:
+        if mtime != _index_mtime:
+            try:
+                _index = QuantizedIndex(Config.RAG_VECTOR_DIR)
+                _index_mtime = mtime
+                print(f"[VECTORS] mapped {_index.stats()}")
+            except Exception as e:
+                print(f"[VECTORS] could not load index: {e}")
+    return _index
+
+
+def update_vector_index(chunks: list[dict], vectors) -> dict:
+    """Merge chunks and their embeddings into the persisted index by id (re-training the quantizer); returns stats()."""
+    tm = StepTimer("VECTORS")
+    tm.start(f"merging {len(chunks)} chunks kind={Config.RAG_VECTOR_QUANT}")
+    with _lock:
+        merged: dict[str, tuple[dict, np.ndarray]] = {}
+        if _index_file_mtime():
+            try:
+                current = QuantizedIndex(Config.RAG_VECTOR_DIR)
+            except Exception as e:
+                print(f"[VECTORS] ignoring unreadable index: {e}")
+            else:
+                if len(current) and len(vectors) and current.dim != len(vectors[0]):
+                    raise ValueError(f"local vector index has dimension {current.dim} but the embedder returns "
+                                     f"{len(vectors[0])}; use a new RAG_VECTOR_DIR")
+                merged = {c["id"]: (c, current.vectors[i]) for i, c in enumerate(map(current.chunk, range(len(current))))}
+        merged.update({c["id"]: (c, np.asarray(v, dtype=np.float32)) for c, v in zip(chunks, vectors)})
+        rows = list(merged.values())
+        dim = len(rows[0][1]) if rows else Config.EMBED_DIM
+        write_vector_index(Config.RAG_VECTOR_DIR, [c for c, _ in rows],
+                           np.vstack([v for _, v in rows]) if rows else np.zeros((0, dim), dtype=np.float32),
+                           Config.RAG_VECTOR_QUANT)
+        stats = QuantizedIndex(Config.RAG_VECTOR_DIR).stats()
+    tm.end(f"{stats}")
+    return stats
+
+
+class LocalVectorStore:
+    """The slice of the LangChain Pinecone store (and index stats) the retriever uses, over get_vector_index()."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def describe_index_stats(self) -> dict:
+        index = get_vector_index()
+        if index is None:
+            return {"namespaces": {}}
+        codes, labels = index.fields["namespace"]
+        counts = np.bincount(codes, minlength=len(labels)) if len(codes) else np.zeros(len(labels), dtype=int)
+        return {"namespaces": {label: {"vector_count": int(n)} for label, n in zip(labels, counts)}}
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+                                                filter: dict | None = None, namespace: str | None = None,
+                                                **kwargs) -> List[Document]:
+        index = get_vector_index()
+        if index is None:
+            return []
+        filters = {f: list(c["$in"]) for f, c in (filter or {}).items()}
+        mask = index.mask([namespace] if namespace else None, filters)
+        out = []
+        for i in index.mmr(embedding, k, fetch_k, lambda_mult, mask):
+            c = index.chunk(i)
+            out.append(Document(page_content=c["text"], metadata=dict(c.get("metadata") or {})))
+        return out
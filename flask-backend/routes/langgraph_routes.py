@@ -1,6 +1,4 @@
 from flask import Blueprint, request, jsonify
-from rag.ingestion import ingest
-from rag.langgraph_agent import build_langgraph_agent
 from config import Config
 from utils.logging_utils import StepTimer
 import time
@@ -12,6 +10,7 @@ def ensure_langgraph_agent():
     """Initialize the LangGraph agent on first use"""
     global langgraph_agent
     if langgraph_agent is None:
+        from rag.langgraph_agent import build_langgraph_agent
         print("🚀 Initializing LangGraph RAG Agent...")
         langgraph_agent = build_langgraph_agent()
         print("✅ LangGraph agent ready - Modern workflow with proper tool handling")
@@ -27,6 +26,7 @@ def rag_ingest():
         return jsonify({"error": "manifest list required"}), 400
         
     try:
+        from rag.ingestion import ingest
         res = ingest(manifest)
         return jsonify(res)
     except Exception as e:
@@ -67,7 +67,7 @@ def langgraph_chat():
         # Use the LangGraph agent
         response = langgraph_agent.query(question, holdings)
         
-        tm.step("LangGraph response generated")
+        tm.end("LangGraph response generated")
         
         # Enhanced response with tool usage metadata
         api_response = {
@@ -1,12 +1,23 @@
 from flask import Blueprint, request, jsonify
 from services.market_data_service import get_quotes, get_price_ranges, get_intraday
 from services.corporate_actions_service import get_dividends_and_splits
+from services.events_service import get_upcoming_events
 from services.analyst_service import get_analyst_summary
 from services.pricemap_service import get_detailed_pricemap
+from services.portfolio_snapshot_service import get_portfolio_snapshot
+from services.indicators_service import get_indicators
+from services.risk_service import get_portfolio_var
+from services.correlation_service import get_correlation
+from services.optimizer_service import get_optimized_portfolio
+from services.backtest_service import get_backtest
+from services.performance_service import get_performance
+from utils.symbol_index import get_symbol_index
+from utils.market_calendar import session_status
+from utils.http_cache import install_http_cache
 
 
 
-market_bp = Blueprint("market", __name__)
+market_bp = install_http_cache(Blueprint("market", __name__))
 
 @market_bp.route("/market/quotes/get-pricemap", methods=["POST"])
 def get_pricemap_route():
@@ -14,7 +25,7 @@ def get_pricemap_route():
     tickers = data.get("tickers", [])
     if not tickers or not isinstance(tickers, list):
         return jsonify({"error": "Invalid payload"}), 400
-    result = get_detailed_pricemap(tickers)
+    result = get_detailed_pricemap(tickers, data.get("max_points"), data.get("method", "lttb"))
     return jsonify(result)
 
 
@@ -39,7 +50,14 @@ def market_intraday():
     tickers = data.get("tickers", [])
     interval = data.get("interval", "5m")
     period = data.get("period", "5d")
-    return jsonify(get_intraday(tickers, interval, period))
+    return jsonify(get_intraday(tickers, interval, period, data.get("max_points"), data.get("method", "lttb")))
+
+@market_bp.route("/market/indicators", methods=["POST"])
+def market_indicators():
+    data = request.get_json(force=True)
+    tickers = data.get("tickers", [])
+    if not tickers: return jsonify({"error":"tickers required"}), 400
+    return jsonify(get_indicators(tickers, data.get("interval", "1d"), data.get("series", 0)))
 
 @market_bp.route("/market/corporate-actions", methods=["POST"])
 def market_corporate_actions():
@@ -47,8 +65,97 @@ def market_corporate_actions():
     tickers = data.get("tickers", [])
     return jsonify(get_dividends_and_splits(tickers))
 
+@market_bp.route("/market/events", methods=["POST"])
+def market_events():
+    data = request.get_json(force=True)
+    return jsonify(get_upcoming_events(data.get("tickers") or None, data.get("days", 30), data.get("past_days", 0), data.get("types")))
+
 @market_bp.route("/market/analyst/summary", methods=["POST"])
 def market_analyst():
     data = request.get_json(force=True)
     tickers = data.get("tickers", [])
     return jsonify(get_analyst_summary(tickers))
+
+@market_bp.route("/market/portfolio/snapshot", methods=["POST"])
+def market_portfolio_snapshot():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or data.get("tickers") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_portfolio_snapshot(holdings, data.get("facets"), data.get("window_days", 252)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/portfolio/risk", methods=["POST"])
+def market_portfolio_risk():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or data.get("tickers") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_portfolio_var(holdings, data.get("horizon_days", 1), data.get("confidence", 0.95),
+                                         data.get("paths"), data.get("seed")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/portfolio/correlation", methods=["POST"])
+def market_portfolio_correlation():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or data.get("tickers") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_correlation(holdings, data.get("window", 252), data.get("cluster_threshold", 0.5),
+                                       data.get("include_matrix")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/portfolio/optimize", methods=["POST"])
+def market_portfolio_optimize():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or data.get("tickers") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_optimized_portfolio(holdings, data.get("long_only", True), data.get("max_weight"),
+                                               data.get("sector_caps"), data.get("frontier_points", 15),
+                                               data.get("rebalance_to")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/portfolio/backtest", methods=["POST"])
+def market_portfolio_backtest():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or data.get("tickers") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_backtest(holdings, data.get("years", 3), data.get("strategies"), data.get("candidates"),
+                                    data.get("cost_bps", 0), data.get("top", 20), data.get("include_curve", True)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/portfolio/performance", methods=["POST"])
+def market_portfolio_performance():
+    data = request.get_json(force=True)
+    holdings = data.get("holdings") or []
+    if not holdings or not isinstance(holdings, list):
+        return jsonify({"error": "holdings required"}), 400
+    try:
+        return jsonify(get_performance(holdings, data.get("since"), data.get("include_series", True)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@market_bp.route("/market/symbols/search", methods=["GET"])
+def market_symbols_search():
+    q = request.args.get("q", "").strip()
+    if not q: return jsonify({"error":"q required"}), 400
+    limit = max(1, min(50, request.args.get("limit", 10, type=int)))
+    exchange = request.args.get("exchange") or None
+    sector = request.args.get("sector") or None
+    return jsonify({"query": q, "results": get_symbol_index().search(q, limit=limit, exchange=exchange, sector=sector)})
+
+@market_bp.route("/market/session", methods=["GET"])
+def market_session():
+    return jsonify(session_status())
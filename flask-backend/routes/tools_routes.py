@@ -1,33 +1,64 @@
 from flask import Blueprint, request, jsonify
-from tools.market_tools import tool_get_quotes, tool_get_price_ranges, tool_get_intraday
-from tools.analysis_tools import tool_get_corporate_actions, tool_get_trending, tool_get_stock_forecasts
-import json
+from tools.market_tools import quotes_data, price_ranges_data, intraday_data
+from tools.analysis_tools import corporate_actions_data, upcoming_events_data, trending_data, stock_forecasts_data
+from tools.portfolio_tools import portfolio_risk_data, correlation_data, optimize_data, backtest_data, performance_data
+from utils.http_cache import install_http_cache
 
-tools_bp = Blueprint("tools", __name__)
+tools_bp = install_http_cache(Blueprint("tools", __name__))
 
 @tools_bp.route("/tools/quotes", methods=["POST"])
 def tools_quotes():
     payload = request.get_json(force=True)
-    return jsonify(json.loads(tool_get_quotes(json.dumps(payload or {}))))
+    return jsonify(quotes_data(payload or {}))
 
 @tools_bp.route("/tools/ranges", methods=["POST"])
 def tools_ranges():
     payload = request.get_json(force=True)
-    return jsonify(json.loads(tool_get_price_ranges(json.dumps(payload or {}))))
+    return jsonify(price_ranges_data(payload or {}))
 
 @tools_bp.route("/tools/intraday", methods=["POST"])
 def tools_intraday():
     payload = request.get_json(force=True)
-    return jsonify(json.loads(tool_get_intraday(json.dumps(payload or {}))))
+    return jsonify(intraday_data(payload or {}))
 
 @tools_bp.route("/tools/corporate-actions", methods=["POST"])
 def tools_corporate_actions():
     payload = request.get_json(force=True)
-    return jsonify(json.loads(tool_get_corporate_actions(json.dumps(payload or {}))))
+    return jsonify(corporate_actions_data(payload or {}))
+
+@tools_bp.route("/tools/upcoming-events", methods=["POST"])
+def tools_upcoming_events():
+    payload = request.get_json(force=True)
+    return jsonify(upcoming_events_data(payload or {}))
+
+@tools_bp.route("/tools/portfolio-risk", methods=["POST"])
+def tools_portfolio_risk():
+    payload = request.get_json(force=True)
+    return jsonify(portfolio_risk_data(payload or {}))
+
+@tools_bp.route("/tools/portfolio-correlation", methods=["POST"])
+def tools_portfolio_correlation():
+    payload = request.get_json(force=True)
+    return jsonify(correlation_data(payload or {}))
+
+@tools_bp.route("/tools/portfolio-optimize", methods=["POST"])
+def tools_portfolio_optimize():
+    payload = request.get_json(force=True)
+    return jsonify(optimize_data(payload or {}))
+
+@tools_bp.route("/tools/portfolio-backtest", methods=["POST"])
+def tools_portfolio_backtest():
+    payload = request.get_json(force=True)
+    return jsonify(backtest_data(payload or {}))
+
+@tools_bp.route("/tools/portfolio-performance", methods=["POST"])
+def tools_portfolio_performance():
+    payload = request.get_json(force=True)
+    return jsonify(performance_data(payload or {}))
 
 @tools_bp.route("/tools/trending", methods=["GET"])
 def tools_trending():
-    return jsonify(json.loads(tool_get_trending("{}")))
+    return jsonify(trending_data({}))
 
 @tools_bp.route("/tools/stock-forecasts", methods=["GET"])
 def tools_stock_forecasts():
@@ -38,7 +69,7 @@ def tools_stock_forecasts():
         "data_type": request.args.get("data_type","Estimates"),
         "age": request.args.get("age","Current")
     }
-    return jsonify(json.loads(tool_get_stock_forecasts(json.dumps(p))))
+    return jsonify(stock_forecasts_data(p))
 
 @tools_bp.route("/admin/cache/clear", methods=["POST"])
 def admin_cache_clear():
@@ -0,0 +1,105 @@
+"""
+Import-time profile for the Flask app's cold start.
+
+Runs `python -X importtime` on `create_app()` in a fresh interpreter and prints
+the slowest top-level packages (cumulative) plus the total.
+
+    python scripts/importtime.py                 # report
+    python scripts/importtime.py --top 40        # longer report
+    python scripts/importtime.py --check         # fail if over budget or a lazy module got imported
+
+--check is the cold-start regression gate: create_app() must stay under
+--budget-ms and must not import any of the LAZY_MODULES, which should only load
+when their blueprint or tool is first used. tests/test_import_budget.py runs
+it under pytest.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Subsystems that create_app() must not pull in eagerly.
+LAZY_MODULES = [
+    "rag.ingestion",
+    "rag.langgraph_agent",
+    "langgraph",
+    "langchain_google_genai",
+    "langchain_community",
+    "pinecone",
+    "tools.agent_tools",
+]
+
+DEFAULT_BUDGET_MS = 3000
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(snippet: str = "from app import create_app; create_app()"):
+    env = dict(os.environ, ENV=os.environ.get("ENV", "DEV"), WARMUP_ENABLED="false")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", snippet],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = int(m.group(1)), int(m.group(2)), len(m.group(3)), m.group(4)
+            rows.append((name, self_us, cum_us, indent))
+    return proc.returncode, rows, proc.stderr
+
+
+def summarize(rows):
+    """Cumulative time per top-level package, counting only outermost imports."""
+    min_indent = min((r[3] for r in rows), default=1)
+    per_pkg: dict[str, int] = {}
+    for name, _self, cum, indent in rows:
+        if indent == min_indent:
+            pkg = name.split(".")[0]
+            per_pkg[pkg] = per_pkg.get(pkg, 0) + cum
+    return sorted(per_pkg.items(), key=lambda kv: -kv[1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--check", action="store_true", help="exit non-zero when over budget or a lazy module was imported")
+    ap.add_argument("--budget-ms", type=int, default=int(os.getenv("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    args = ap.parse_args()
+
+    code, rows, stderr = profile()
+    if code != 0:
+        print(stderr[-4000:])
+        print(f"create_app() failed with exit code {code}")
+        sys.exit(code)
+
+    per_pkg = summarize(rows)
+    total_ms = sum(cum for _, cum in per_pkg) / 1000
+    print(f"{'package':<32} {'cumulative':>12}")
+    for pkg, cum in per_pkg[:args.top]:
+        print(f"{pkg:<32} {cum / 1000:>10.1f}ms")
+    print(f"{'TOTAL':<32} {total_ms:>10.1f}ms  ({len(rows)} modules)")
+
+    imported = {r[0] for r in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+    if eager:
+        print(f"eagerly imported (should be lazy): {', '.join(eager)}")
+
+    if args.check:
+        failed = False
+        if total_ms > args.budget_ms:
+            print(f"FAIL: cold-start imports took {total_ms:.0f}ms > budget {args.budget_ms}ms")
+            failed = True
+        if eager:
+            print("FAIL: lazy subsystems imported by create_app()")
+            failed = True
+        if failed:
+            sys.exit(1)
+        print(f"OK: {total_ms:.0f}ms within {args.budget_ms}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Pricemap latency under concurrent chat load.
+
+Measures /market/quotes/get-pricemap latency twice: once on an idle server and
+once while `--chat-concurrency` /chat requests are kept in flight. With the
+threaded worker config the p99 of the second run should stay close to the first.
+
+    python scripts/load_test.py --base-url http://localhost:5000 --requests 200 --chat-concurrency 4
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+def run_pricemap(base_url, tickers, n, concurrency):
+    url = f"{base_url}/market/quotes/get-pricemap"
+    latencies, errors = [], 0
+
+    def one(_):
+        t0 = time.perf_counter()
+        try:
+            r = requests.post(url, json={"tickers": tickers}, timeout=60)
+            ok = r.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - t0) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ms, ok in pool.map(one, range(n)):
+            latencies.append(ms)
+            errors += 0 if ok else 1
+    return latencies, errors
+
+
+def chat_loop(base_url, stop, counter):
+    url = f"{base_url}/chat"
+    payload = {"question": "Explain diversification and show current prices", "holdings": ["RELIANCE", "TCS"]}
+    while not stop.is_set():
+        try:
+            requests.post(url, json=payload, timeout=120)
+        except requests.RequestException:
+            pass
+        counter.append(1)
+
+
+def report(label, latencies, errors):
+    print(f"{label:<14} n={len(latencies):<5} err={errors:<3} "
+          f"p50={percentile(latencies, 50):7.1f}ms p95={percentile(latencies, 95):7.1f}ms "
+          f"p99={percentile(latencies, 99):7.1f}ms mean={statistics.fmean(latencies) if latencies else 0:7.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default="http://localhost:5000")
+    ap.add_argument("--tickers", default="RELIANCE,TCS,HDFCBANK,INFY,ICICIBANK")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--chat-concurrency", type=int, default=4)
+    args = ap.parse_args()
+
+    tickers = [t for t in args.tickers.split(",") if t]
+    base = args.base_url.rstrip("/")
+
+    idle, idle_err = run_pricemap(base, tickers, args.requests, args.concurrency)
+
+    stop, chats = threading.Event(), []
+    threads = [threading.Thread(target=chat_loop, args=(base, stop, chats), daemon=True) for _ in range(args.chat_concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)  # let chat requests reach the server
+    loaded, loaded_err = run_pricemap(base, tickers, args.requests, args.concurrency)
+    stop.set()
+
+    report("idle", idle, idle_err)
+    report("chat in flight", loaded, loaded_err)
+    ratio = percentile(loaded, 99) / max(percentile(idle, 99), 1e-9)
+    print(f"p99 ratio (loaded/idle) = {ratio:.2f}; chat requests completed during run = {len(chats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Move chunks from the Pinecone default namespace into per-category partitions.
+
+Indexes ingested before partitioning keep every chunk in the default ("")
+namespace. The retriever still searches it alongside the routed partitions, so
+nothing is lost, but every query pays for it. This copies those vectors (no
+re-embedding) into namespace_for(metadata) and records them in the partitions
+registry; the originals are deleted only with --delete.
+
+    python scripts/migrate_partitions.py --dry-run    # counts per target namespace
+    python scripts/migrate_partitions.py              # copy
+    python scripts/migrate_partitions.py --delete     # copy, then delete from the default namespace
+
+Reads PINECONE_API_KEY and PINECONE_INDEX_NAME like ingestion.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _ids(index, batch: int):
+    """Pages of vector ids in the default namespace."""
+    for page in index.list(namespace="", limit=batch):
+        if page:
+            yield list(page)
+
+
+def _vectors(fetched) -> dict:
+    vectors = fetched.get("vectors") if isinstance(fetched, dict) else getattr(fetched, "vectors", None)
+    return vectors or {}
+
+
+def _field(vec, name):
+    return vec.get(name) if isinstance(vec, dict) else getattr(vec, name, None)
+
+
+def migrate(index, batch: int = 100, delete: bool = False, dry_run: bool = False) -> dict[str, int]:
+    from rag.partitions import forget_namespaces, namespace_for, record_partitions
+
+    moved: dict[str, int] = {}
+    copied: list[str] = []
+    for ids in _ids(index, batch):
+        groups: dict[str, list] = {}
+        metas = []
+        for vid, vec in _vectors(index.fetch(ids=ids, namespace="")).items():
+            meta = dict(_field(vec, "metadata") or {})
+            groups.setdefault(namespace_for(meta), []).append({"id": vid, "values": list(_field(vec, "values")), "metadata": meta})
+            metas.append(meta)
+        for ns, vectors in groups.items():
+            moved[ns] = moved.get(ns, 0) + len(vectors)
+            if not dry_run:
+                index.upsert(vectors=vectors, namespace=ns)
+        if dry_run:
+            continue
+        record_partitions(metas)
+        copied += [v["id"] for vs in groups.values() for v in vs]
+        print(f"[MIGRATE] {sum(len(v) for v in groups.values())} chunks -> {sorted(groups)}")
+    if delete and not dry_run:
+        # After the listing is done, so deletes cannot shift its pages
+        for i in range(0, len(copied), batch):
+            index.delete(ids=copied[i:i + batch], namespace="")
+    if not dry_run:
+        forget_namespaces()
+    return moved
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=100, help="ids per list/fetch/upsert page")
+    ap.add_argument("--delete", action="store_true", help="delete the chunks from the default namespace once copied")
+    ap.add_argument("--dry-run", action="store_true", help="only count chunks per target namespace")
+    args = ap.parse_args()
+
+    import config  # noqa: F401  (loads .env)
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+    index = pc.Index(os.getenv("PINECONE_INDEX_NAME", "advisor-kg"))
+    moved = migrate(index, args.batch, args.delete, args.dry_run)
+    for ns, n in sorted(moved.items()):
+        print(f"{ns:<32} {n}")
+    print(f"total {sum(moved.values())}{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
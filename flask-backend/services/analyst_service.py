@@ -1,37 +1,38 @@
-import pandas as pd
-import yfinance as yf
 from utils.ticker_utils import batch_normalize
-from utils.cache_utils import get_cached, set_cached
+from utils.cache_utils import set_cached
+from utils.resilience import is_upstream_failure, serve_cached
+from services.fundamentals_service import load_snapshots
+from config import Config
 
-def _df_to_records(df: pd.DataFrame):
-    if df is None or df.empty:
-        return []
-    out = df.reset_index()
-    if "Date" in out.columns:
-        out["Date"] = pd.to_datetime(out["Date"]).dt.strftime("%Y-%m-%d")
-    return out.to_dict(orient="records")
+def analyst_from_snapshot(symbol: str, snap) -> dict:
+    return {
+        "symbol": symbol.upper(),
+        "raw_ticker": snap.symbol,
+        "recommendations": snap.recommendations,
+        "recommendation_trend": snap.recommendation_trend,
+        "price_target": {"mean": None, "high": None, "low": None, "num_analysts": None, "note": "Use paid provider for targets"},
+        "estimates": {"eps_current_year": None, "eps_next_q": None, "revenue_current_year": None, "revenue_next_q": None, "note": "Use provider for structured estimates"}
+    }
 
 def get_analyst_summary(tickers: list[str]) -> dict:
     params = {"tickers": ",".join(sorted(tickers))}
-    cached = get_cached("analyst", params, 600)
-    if cached:
-        return cached
+    return serve_cached("analyst", params, lambda: _load_analyst_summary(tickers, params), per_symbol=True)
+
+def _load_analyst_summary(tickers: list[str], params: dict) -> dict:
     out = {}
+    upstream_error = None
+    snaps = load_snapshots(batch_normalize(tickers), ("recommendations", "recommendation_trend"))
     for t in tickers:
         nt = batch_normalize([t])[0]
         try:
-            tk = yf.Ticker(nt)
-            recs = getattr(tk, "recommendations", None)
-            trend = getattr(tk, "recommendationTrend", None)
-            out[t.upper()] = {
-                "symbol": t.upper(),
-                "raw_ticker": nt,
-                "recommendations": _df_to_records(recs) if isinstance(recs, pd.DataFrame) else [],
-                "recommendation_trend": _df_to_records(trend) if isinstance(trend, pd.DataFrame) else [],
-                "price_target": {"mean": None, "high": None, "low": None, "num_analysts": None, "note": "Use paid provider for targets"},
-                "estimates": {"eps_current_year": None, "eps_next_q": None, "revenue_current_year": None, "revenue_next_q": None, "note": "Use provider for structured estimates"}
-            }
+            out[t.upper()] = analyst_from_snapshot(t, snaps[nt])
         except Exception as e:
+            if is_upstream_failure(e):
+                upstream_error = e
             out[t.upper()] = {"symbol": t.upper(), "raw_ticker": nt, "error": str(e)}
-    set_cached("analyst", params, out, 600)
+    # Upstream down for every symbol: raise so serve_cached() can fall back to last-known-good;
+    # a symbol that simply has no data keeps its per-symbol error
+    if upstream_error is not None and all("error" in v for v in out.values()):
+        raise upstream_error
+    set_cached("analyst", params, out, 600 if upstream_error is None else min(600, Config.CACHE_TTL_EMPTY))
     return out
@@ -0,0 +1,169 @@
+"""
+Backtests of holdings-based portfolios against the Nifty 50.
+
+Unadjusted daily closes come from the price-history cache (up to 10 years);
+dividends and splits from the corporate-actions service turn them into total
+returns. Every candidate weighting (the current mix, equal weight and any
+supplied ones) runs in one batched pass per rebalance schedule, see
+utils/backtest.py. ^NSEI is a price index, so excess returns against it
+include the dividend yield.
+"""
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from config import Config
+from utils.backtest import SCHEDULES, event_matrix, metrics, segments, simulate, total_returns
+from utils.cache_utils import get_cached, set_cached
+from utils.logging_utils import StepTimer
+from utils.market_calendar import daily_ttl
+from utils.ticker_utils import batch_normalize
+from utils.validation import parse_holdings
+from services.corporate_actions_service import get_dividends_and_splits
+from services.price_history_service import get_price_history
+from services.risk_service import holdings_key, resolve_weights
+
+BENCHMARK = "^NSEI"
+DEFAULT_STRATEGIES = ["buy_and_hold", "monthly"]
+MAX_CANDIDATES = 200
+MAX_YEARS = 10
+
+
+def _period(years: float) -> str:
+    return "2y" if years <= 2 else "5y" if years <= 5 else "10y"
+
+
+def _candidates(current: dict[str, float], labels: list[str], extra: list | None) -> tuple[list[str], np.ndarray, list[str]]:
+    names = ["current", "equal"]
+    rows = [[current[s] for s in labels], [1.0 / len(labels)] * len(labels)]
+    notes = []
+    for i, c in enumerate((extra or [])[:MAX_CANDIDATES]):
+        if not isinstance(c, dict) or not isinstance(c.get("weights"), dict):
+            notes.append(f"candidate {i}: expected {{'name', 'weights'}}")
+            continue
+        w = {str(k).strip().upper(): v for k, v in c["weights"].items()}
+        unknown = [k for k in w if k not in labels]
+        if unknown:
+            notes.append(f"candidate {c.get('name', i)}: ignored symbols not in holdings {unknown}")
+        try:
+            row = [max(float(w.get(s) or 0.0), 0.0) for s in labels]
+        except (TypeError, ValueError):
+            notes.append(f"candidate {c.get('name', i)}: non-numeric weight")
+            continue
+        if sum(row) <= 0:
+            notes.append(f"candidate {c.get('name', i)}: no weight on held symbols")
+            continue
+        names.append(str(c.get("name") or f"candidate_{i}"))
+        rows.append(row)
+    weights = np.array(rows, dtype=float)
+    return names, weights / weights.sum(axis=1, keepdims=True), notes
+
+
+def _row(m: dict, k: int) -> dict:
+    out = {}
+    for key, arr in m.items():
+        v = arr[k]
+        if isinstance(v, str):
+            out[key] = v
+        else:
+            out[key] = None if not np.isfinite(v) else round(float(v), 4)
+    return out
+
+
+def get_backtest(holdings: list, years: float = 3, strategies: list[str] | None = None, candidates: list | None = None,
+                 cost_bps: float = 0.0, top: int = 20, include_curve: bool = False) -> dict:
+    parsed = parse_holdings(holdings)
+    if not parsed:
+        raise ValueError("holdings required")
+    years = max(1.0, min(float(MAX_YEARS), float(years or 3)))
+    strategies = [s for s in (strategies or DEFAULT_STRATEGIES) if s in SCHEDULES] or list(DEFAULT_STRATEGIES)
+    cost_bps = max(0.0, float(cost_bps or 0.0))
+    top = max(1, min(MAX_CANDIDATES * len(SCHEDULES), int(top or 20)))
+
+    tm = StepTimer("BACKTEST")
+    tm.start(f"holdings={len(parsed)} years={years} strategies={strategies} candidates={len(candidates or [])}")
+    norm = {h["symbol"]: batch_normalize([h["symbol"]])[0] for h in parsed}
+    hist = get_price_history(list(norm.values()) + [BENCHMARK], "1d", _period(years), adjusted=False)
+    if len(hist) == 0:
+        raise ValueError("no price history for any holding")
+    last_prices = {}
+    for sym, nt in norm.items():
+        col = hist.close[:, hist.column(nt)]
+        valid = col[~np.isnan(col)]
+        last_prices[sym] = float(valid[-1]) if len(valid) else None
+    current, _ = resolve_weights(parsed, last_prices)
+    if not current:
+        raise ValueError("no price history for any holding")
+    labels = list(current)
+    names, weights, notes = _candidates(current, labels, candidates)
+
+    spec = json.dumps({"c": [[n, list(np.round(w, 6))] for n, w in zip(names, weights)], "s": strategies}, sort_keys=True)
+    params = {"h": holdings_key(current, None), "years": years, "spec": hashlib.sha1(spec.encode()).hexdigest()[:16],
+              "cost": cost_bps, "top": top, "curve": bool(include_curve), "as_of": str(hist.dates[-1])}
+    cached = get_cached("backtest", params)
+    if cached:
+        tm.end("cache hit")
+        return cached
+
+    cols = [hist.column(norm[s]) for s in labels] + [hist.column(BENCHMARK)]
+    close = hist.close[:, cols]
+    # Start where every holding and the benchmark has a close, and no earlier than `years` ago
+    first = [int(np.argmax(~np.isnan(close[:, j]))) for j in range(close.shape[1]) if (~np.isnan(close[:, j])).any()]
+    if len(first) < close.shape[1]:
+        missing = [s for s, j in zip(labels + [BENCHMARK], range(close.shape[1])) if np.isnan(close[:, j]).all()]
+        raise ValueError(f"no price history for {missing}")
+    s0 = max(max(first), int(hist.dates.searchsorted(hist.dates[-1] - pd.DateOffset(days=int(years * 365.25)))))
+    dates = hist.dates[s0:]
+    if len(dates) < 40:
+        raise ValueError("not enough overlapping history for a backtest")
+    close = close[s0:]
+
+    try:
+        corp = get_dividends_and_splits(labels)
+    except Exception as e:
+        print(f"[BACKTEST] corporate actions unavailable ({e}); using price returns")
+        corp = {}
+    actions = [corp.get(s) or {} for s in labels]
+    actions = [{} if "error" in ca else ca for ca in actions]
+    price_only = [s for s, ca in zip(labels, actions) if not ca]
+    divs = event_matrix(dates, [ca.get("dividends") for ca in actions], "dividend")
+    splits = event_matrix(dates, [ca.get("splits") for ca in actions], "split_ratio", multiply=True)
+    rets = total_returns(close[:, :-1], divs, splits)[1:]
+    bench = close[1:, -1] / close[0, -1]
+    bench = pd.Series(bench).ffill().to_numpy()
+    tm.step(f"returns {rets.shape} price_only={len(price_only)}")
+
+    rows = []
+    curves = {}
+    month_end = np.r_[dates[2:].to_period("M").asi8 != dates[1:-1].to_period("M").asi8, True]
+    for strat in strategies:
+        values = simulate(rets, weights, segments(dates[1:], strat), cost_bps)
+        m = metrics(values, dates, bench, Config.RISK_FREE_RATE)
+        for k, name in enumerate(names):
+            rows.append({"candidate": name, "strategy": strat, **_row(m, k)})
+        if include_curve:
+            curves[f"current:{strat}"] = [round(float(x), 4) for x in values[month_end, 0]]
+    tm.step(f"simulated {len(names)} candidates x {len(strategies)} strategies")
+
+    ranked = sorted(rows, key=lambda r: -(r["sharpe"] if r["sharpe"] is not None else -np.inf))
+    keep = ranked[:top] + [r for r in ranked[top:] if r["candidate"] == "current"]
+    bm = metrics(bench[:, None], dates, None, Config.RISK_FREE_RATE)
+    out = {
+        "start": str(dates[0].date()),
+        "end": str(dates[-1].date()),
+        "years": round((dates[-1] - dates[0]).days / 365.25, 2),
+        "cost_bps": cost_bps,
+        "benchmark": {"symbol": BENCHMARK, **_row(bm, 0)},
+        "results": keep,
+        "candidates": {n: {s: round(float(w), 4) for s, w in zip(labels, ws)} for n, ws in zip(names, weights)} if len(names) <= 10 else names,
+        "price_return_only": price_only,
+        "missing": [h["symbol"] for h in parsed if h["symbol"] not in current],
+    }
+    if notes:
+        out["notes"] = notes
+    if include_curve:
+        curves["benchmark"] = [round(float(x), 4) for x in bench[month_end]]
+        out["curve"] = {"dates": [str(d.date()) for d in dates[1:][month_end]], **curves}
+    set_cached("backtest", params, out, daily_ttl(Config.CACHE_TTL_DAILY))
+    tm.end()
+    return out
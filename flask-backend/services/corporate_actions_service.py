@@ -1,19 +1,10 @@
-import yfinance as yf
 import pandas as pd
 from utils.ticker_utils import batch_normalize
-from utils.cache_utils import get_cached, set_cached
+from utils.cache_utils import set_cached
+from utils.resilience import is_upstream_failure, serve_cached
+from services.fundamentals_service import load_snapshots
 from config import Config
 
-def _series_to_records(series: pd.Series, value_name: str):
-    if series is None or series.empty:
-        return []
-    df = series.reset_index()
-    df.columns = ["date", value_name]
-    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
-    if value_name == "dividend":
-        df["dividend"] = df["dividend"].astype(float)
-    return df.to_dict(orient="records")
-
 def _to_date(ts):
     try:
         if not ts:
@@ -22,38 +13,48 @@ def _to_date(ts):
     except Exception:
         return None
 
+def corporate_actions_from_snapshot(symbol: str, snap) -> dict:
+    dividends = snap.dividends
+    splits = snap.splits
+    info = {}
+    try:
+        info = snap.info or {}
+    except Exception:
+        info = {}
+    return {
+        "symbol": symbol.upper(),
+        "raw_ticker": snap.symbol,
+        "currency": info.get("currency", "INR"),
+        "dividends": dividends,
+        "splits": splits,
+        "summary": {
+            "ex_dividend_date": _to_date(info.get("exDividendDate")),
+            "dividend_payment_date": _to_date(info.get("dividendDate")),
+            "dividend_yield": float(info.get("dividendYield")) if info.get("dividendYield") is not None else None,
+            "dividend_rate": float(info.get("dividendRate")) if info.get("dividendRate") is not None else None,
+        },
+        "notes": "Record dates/spinoffs/rights often unavailable via free endpoints."
+    }
+
 def get_dividends_and_splits(tickers: list[str]) -> dict:
     params = {"tickers": ",".join(sorted(tickers))}
-    cached = get_cached("corp", params, Config.CACHE_TTL_CORPORATE)
-    if cached:
-        return cached
+    return serve_cached("corp", params, lambda: _load_dividends_and_splits(tickers, params), per_symbol=True)
+
+def _load_dividends_and_splits(tickers: list[str], params: dict) -> dict:
     out = {}
+    upstream_error = None
+    snaps = load_snapshots(batch_normalize(tickers), ("info", "dividends", "splits"))
     for t in tickers:
         nt = batch_normalize([t])[0]
         try:
-            tk = yf.Ticker(nt)
-            dividends = _series_to_records(tk.dividends, "dividend")
-            splits = _series_to_records(tk.splits, "split_ratio")
-            info = {}
-            try:
-                info = tk.info or {}
-            except Exception:
-                info = {}
-            out[t.upper()] = {
-                "symbol": t.upper(),
-                "raw_ticker": nt,
-                "currency": info.get("currency", "INR"),
-                "dividends": dividends,
-                "splits": splits,
-                "summary": {
-                    "ex_dividend_date": _to_date(info.get("exDividendDate")),
-                    "dividend_payment_date": _to_date(info.get("dividendDate")),
-                    "dividend_yield": float(info.get("dividendYield")) if info.get("dividendYield") is not None else None,
-                    "dividend_rate": float(info.get("dividendRate")) if info.get("dividendRate") is not None else None,
-                },
-                "notes": "Record dates/spinoffs/rights often unavailable via free endpoints."
-            }
+            out[t.upper()] = corporate_actions_from_snapshot(t, snaps[nt])
         except Exception as e:
+            if is_upstream_failure(e):
+                upstream_error = e
             out[t.upper()] = {"symbol": t.upper(), "raw_ticker": nt, "error": str(e)}
-    set_cached("corp", params, out, Config.CACHE_TTL_CORPORATE)
+    # Upstream down for every symbol: raise so serve_cached() can fall back to last-known-good;
+    # a symbol that simply has no data keeps its per-symbol error
+    if upstream_error is not None and all("error" in v for v in out.values()):
+        raise upstream_error
+    set_cached("corp", params, out, Config.CACHE_TTL_CORPORATE if upstream_error is None else min(Config.CACHE_TTL_CORPORATE, Config.CACHE_TTL_EMPTY))
     return out
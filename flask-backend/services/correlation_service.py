@@ -0,0 +1,222 @@
+"""
+Correlation and diversification analytics for a set of holdings.
+
+Daily log returns of the holdings plus ^NSEI/^BSESN feed a RollingCovariance
+(utils/covariance.py) kept per (window, symbol set); each call only pushes the
+bars that closed since the previous one. The live session bar is left out until
+the market has settled.
+
+Reports per-holding volatility, beta and correlation to the Nifty, portfolio
+volatility and diversification ratio, concentration (HHI, effective N, sector
+weights), the most correlated pairs and average-linkage clusters.
+"""
+import threading
+import numpy as np
+from config import Config
+from utils.cache_utils import get_cached, set_cached
+from utils.covariance import RollingCovariance, cluster_correlations
+from utils.logging_utils import StepTimer
+from utils.market_calendar import daily_ttl, in_live_window, now_ist
+from utils.symbol_index import get_symbol_index
+from utils.ticker_utils import add_benchmarks, batch_normalize
+from utils.validation import parse_holdings
+from services.price_history_service import get_price_history
+from services.risk_service import holdings_key, resolve_weights
+
+BENCHMARKS = ("^NSEI", "^BSESN")
+MAX_ENGINES = 32
+MATRIX_MAX_SYMBOLS = 25  # full matrix in the response up to this many holdings unless asked for
+TOP_PAIRS = 10
+
+_engines: dict[tuple, RollingCovariance] = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_for(window: int, symbols: list[str]) -> RollingCovariance:
+    key = (window, tuple(symbols))
+    with _engines_lock:
+        engine = _engines.pop(key, None) or RollingCovariance(symbols, window)
+        _engines[key] = engine  # most recently used last
+        while len(_engines) > MAX_ENGINES:
+            _engines.pop(next(iter(_engines)))
+        return engine
+
+
+def _log_returns(close: np.ndarray) -> np.ndarray:
+    """(T, N) log returns against each symbol's previous available close; NaN where there is no bar."""
+    last = np.full(close.shape[1], np.nan)
+    out = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for t in range(len(close)):
+            row = close[t]
+            out[t] = np.log(row / last)
+            last = np.where(np.isnan(row), last, row)
+    return out
+
+
+def _sync(engine: RollingCovariance, hist) -> RollingCovariance:
+    """Push the settled bars the engine hasn't seen yet."""
+    dates = list(hist.dates)
+    end = len(dates)
+    if end and in_live_window() and dates[-1].date() == now_ist().date():
+        end -= 1  # today's bar is still forming
+    start = 1
+    if engine.last_date is not None:
+        if engine.last_date not in hist.dates:
+            # History no longer overlaps (window moved or stale data); rebuild
+            engine = RollingCovariance(engine.symbols, engine.window)
+            with _engines_lock:
+                _engines[(engine.window, tuple(engine.symbols))] = engine
+        else:
+            start = dates.index(engine.last_date) + 1
+    if start < end:
+        # One bar of context before `start` so the first pushed return has a previous close
+        rets = _log_returns(hist.close[start - 1:end])[1:]
+        engine.extend(dates[start:end], rets)
+    return engine
+
+
+def _pairs(corr: np.ndarray, labels: list[str], k: int) -> list[dict]:
+    n = len(labels)
+    iu = np.triu_indices(n, 1)
+    vals = corr[iu]
+    ok = ~np.isnan(vals)
+    order = np.argsort(-vals[ok])[:k]
+    a, b = iu[0][ok][order], iu[1][ok][order]
+    return [{"a": labels[i], "b": labels[j], "corr": round(float(corr[i, j]), 4)} for i, j in zip(a, b)]
+
+
+def _r(x, nd: int = 4):
+    return None if x is None or not np.isfinite(x) else round(float(x), nd)
+
+
+def _benchmark(cov: np.ndarray, w: np.ndarray, hcols: list[int], b: int, port_sd: float) -> dict:
+    var_b = cov[b, b]
+    if not var_b or np.isnan(var_b):
+        return {"volatility_annual": None, "portfolio_corr": None}
+    cov_pb = float(np.nansum(w * cov[hcols, b]))
+    return {
+        "volatility_annual": _r(np.sqrt(var_b * 252)),
+        "portfolio_corr": _r(cov_pb / (port_sd * np.sqrt(var_b))) if port_sd else None,
+    }
+
+
+def get_correlation(holdings: list, window: int = 252, cluster_threshold: float = 0.5, include_matrix: bool | None = None) -> dict:
+    parsed = parse_holdings(holdings)
+    if not parsed:
+        raise ValueError("holdings required")
+    window = max(60, min(756, int(window or 252)))
+    cluster_threshold = max(0.05, min(1.0, float(cluster_threshold or 0.5)))
+
+    tm = StepTimer("CORRELATION")
+    tm.start(f"holdings={len(parsed)} window={window}")
+    norm = {h["symbol"]: batch_normalize([h["symbol"]])[0] for h in parsed}
+    universe = add_benchmarks(sorted(set(norm.values())))
+    hist = get_price_history(universe, "1d", Config.CORRELATION_LOOKBACK if window <= 450 else "5y")
+    if len(hist) == 0:
+        raise ValueError("no price history for any holding")
+
+    last_prices = {}
+    for sym, nt in norm.items():
+        col = hist.close[:, hist.column(nt)]
+        valid = col[~np.isnan(col)]
+        last_prices[sym] = float(valid[-1]) if len(valid) else None
+    weights, value = resolve_weights(parsed, last_prices)
+    if not weights:
+        raise ValueError("no price history for any holding")
+    if include_matrix is None:
+        include_matrix = len(weights) <= MATRIX_MAX_SYMBOLS
+
+    params = {"h": holdings_key(weights, value), "window": window, "threshold": cluster_threshold,
+              "matrix": bool(include_matrix), "as_of": str(hist.dates[-1])}
+    cached = get_cached("correlation", params)
+    if cached:
+        tm.end("cache hit")
+        return cached
+
+    engine = _engine_for(window, hist.symbols)
+    with engine.lock:
+        engine = _sync(engine, hist)
+        cov = engine.covariance()
+        counts = engine.counts()
+    tm.step(f"covariance synced bars={len(engine.dates)}")
+
+    labels = list(weights)
+    hcols = [hist.column(norm[s]) for s in labels]
+    nifty = hist.column("^NSEI")
+    sub = cov[np.ix_(hcols, hcols)]
+    sd = np.sqrt(np.clip(np.diag(sub), 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.clip(sub / np.outer(sd, sd), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    w = np.array([weights[s] for s in labels])
+
+    # Pairs without enough overlap contribute nothing rather than poisoning the totals
+    sub0 = np.nan_to_num(sub)
+    port_var = max(float(w @ sub0 @ w), 0.0)
+    port_sd = np.sqrt(port_var)
+    var_n = cov[nifty, nifty]
+    cov_pn = float(np.nansum(w * cov[hcols, nifty]))
+
+    per = {}
+    for i, s in enumerate(labels):
+        c_n = cov[hcols[i], nifty]
+        others = np.delete(corr[i], i)
+        per[s] = {
+            "raw_ticker": norm[s],
+            "weight": _r(weights[s], 6),
+            "volatility_annual": _r(sd[i] * np.sqrt(252)),
+            "beta_nifty": _r(c_n / var_n) if var_n else None,
+            "corr_nifty": _r(c_n / (sd[i] * np.sqrt(var_n))) if var_n and sd[i] else None,
+            "avg_corr": _r(np.nanmean(others)) if len(others) and not np.isnan(others).all() else None,
+            "observations": int(counts[hcols[i], nifty]),
+        }
+
+    off = corr[~np.eye(len(labels), dtype=bool)]
+    ww = np.outer(w, w)[~np.eye(len(labels), dtype=bool)]
+    ok = ~np.isnan(off)
+    hhi = float(np.sum(w ** 2))
+    sectors: dict[str, float] = {}
+    index = get_symbol_index()
+    for s in labels:
+        entry = index.get(s.split(".")[0])
+        sec = (entry or {}).get("sector") or "Unknown"
+        sectors[sec] = sectors.get(sec, 0.0) + weights[s]
+
+    clusters = []
+    for members in cluster_correlations(corr, cluster_threshold):
+        names = [labels[i] for i in members]
+        inner = corr[np.ix_(members, members)][~np.eye(len(members), dtype=bool)]
+        clusters.append({
+            "members": names,
+            "weight": _r(sum(weights[n] for n in names), 6),
+            "avg_corr": _r(np.nanmean(inner)) if len(inner) and not np.isnan(inner).all() else None,
+        })
+    tm.step(f"clusters={len(clusters)}")
+
+    out = {
+        "as_of": str(engine.last_date.date()) if engine.last_date is not None else None,
+        "window": window,
+        "observations": len(engine.dates),
+        "portfolio": {
+            "volatility_annual": _r(port_sd * np.sqrt(252)),
+            "diversification_ratio": _r(float(w @ np.nan_to_num(sd)) / port_sd) if port_sd else None,
+            "avg_pairwise_corr": _r(float(np.sum(off[ok] * ww[ok]) / np.sum(ww[ok]))) if ok.any() and np.sum(ww[ok]) else None,
+            "beta_nifty": _r(cov_pn / var_n) if var_n else None,
+            "corr_nifty": _r(cov_pn / (port_sd * np.sqrt(var_n))) if var_n and port_sd else None,
+            "hhi": _r(hhi),
+            "effective_n": _r(1.0 / hhi) if hhi else None,
+            "portfolio_value": _r(value, 2) if value else None,
+        },
+        "holdings": per,
+        "sectors": {k: _r(v, 4) for k, v in sorted(sectors.items(), key=lambda kv: -kv[1])},
+        "clusters": clusters,
+        "top_pairs": _pairs(corr, labels, TOP_PAIRS),
+        "benchmarks": {b: _benchmark(cov, w, hcols, hist.column(b), port_sd) for b in BENCHMARKS},
+        "missing": [h["symbol"] for h in parsed if h["symbol"] not in weights],
+    }
+    if include_matrix:
+        out["matrix"] = {"symbols": labels, "corr": [[_r(v, 3) for v in row] for row in corr]}
+    set_cached("correlation", params, out, daily_ttl(Config.CACHE_TTL_DAILY))
+    tm.end()
+    return out
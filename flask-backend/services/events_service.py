@@ -0,0 +1,228 @@
+"""
+Upcoming corporate-events calendar across every symbol we have fundamentals for.
+
+Events come from each symbol's fundamentals snapshot:
+
+- ex_dividend / dividend_payment: `.info` exDividendDate and dividendDate
+- ex_dividend (history): ex-dates from the last year of the dividend history
+- ex_dividend (estimated): each dividend of the last year projected one year
+  ahead, unless a confirmed ex-date falls within CADENCE_TOLERANCE_DAYS of it
+
+EventIndex keeps all events in one list sorted by (date, symbol, type) plus a
+per-symbol sorted list, so "events between two dates", for everyone or for a
+set of symbols, is a bisect per list rather than a scan. EventRefresher
+re-indexes the known symbols in the background; symbols queried before they
+are indexed are indexed on the spot.
+"""
+import bisect
+import os
+import threading
+import time
+from datetime import date, timedelta
+import pandas as pd
+from config import Config
+from utils.logging_utils import StepTimer
+from utils.market_calendar import now_ist
+from utils.ticker_utils import batch_normalize
+from services.fundamentals_service import known_symbols, load_snapshots
+
+EVENT_TYPES = ("ex_dividend", "dividend_payment")
+CADENCE_TOLERANCE_DAYS = 45
+MAX_DAYS = 366
+
+
+def _date_key(e: dict) -> str:
+    return e["date"]
+
+
+def _sort_key(e: dict) -> tuple:
+    return e["date"], e["symbol"], e["type"]
+
+
+def _display(yf_symbol: str) -> str:
+    return yf_symbol if yf_symbol.startswith("^") else yf_symbol.split(".")[0]
+
+
+def _ts_to_date(ts) -> str | None:
+    try:
+        return pd.to_datetime(int(ts), unit="s").strftime("%Y-%m-%d") if ts else None
+    except Exception:
+        return None
+
+
+def build_events(yf_symbol: str, info: dict, dividends: list, today: date) -> list[dict]:
+    """Past-year and upcoming events for one symbol from its `.info` and dividend history."""
+    sym = _display(yf_symbol)
+    year_ago = (today - timedelta(days=365)).isoformat()
+    horizon = (today + timedelta(days=Config.EVENTS_HORIZON_DAYS)).isoformat()
+    rate = info.get("lastDividendValue") or None
+    events = {}
+    recent = [d for d in dividends or [] if d.get("date") and d["date"] > year_ago]
+    for d in recent:
+        events[(d["date"], "ex_dividend")] = {"date": d["date"], "symbol": sym, "type": "ex_dividend",
+                                             "amount": d.get("dividend"), "source": "history"}
+    ex = _ts_to_date(info.get("exDividendDate"))
+    if ex and (ex, "ex_dividend") not in events:
+        events[(ex, "ex_dividend")] = {"date": ex, "symbol": sym, "type": "ex_dividend", "amount": rate, "source": "info"}
+    pay = _ts_to_date(info.get("dividendDate"))
+    if pay:
+        events[(pay, "dividend_payment")] = {"date": pay, "symbol": sym, "type": "dividend_payment",
+                                             "amount": rate, "source": "info"}
+
+    # Cadence: assume last year's dividends recur on the same dates
+    confirmed = [pd.Timestamp(d) for d, t in events if t == "ex_dividend" and d > today.isoformat()]
+    for d in recent:
+        nxt = (pd.Timestamp(d["date"]) + pd.DateOffset(years=1)).strftime("%Y-%m-%d")
+        if nxt <= today.isoformat() or nxt > horizon or (nxt, "ex_dividend") in events:
+            continue
+        if any(abs((c - pd.Timestamp(nxt)).days) <= CADENCE_TOLERANCE_DAYS for c in confirmed):
+            continue
+        events[(nxt, "ex_dividend")] = {"date": nxt, "symbol": sym, "type": "ex_dividend",
+                                        "amount": d.get("dividend"), "source": "estimated"}
+    return sorted(events.values(), key=_sort_key)
+
+
+class EventIndex:
+    """Date-sorted events for many symbols with O(log n) range lookups."""
+
+    def __init__(self):
+        self._events: list[dict] = []  # sorted by _sort_key
+        self._by_symbol: dict[str, list[dict]] = {}  # yf symbol -> events sorted by date
+        self._indexed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def indexed(self, yf_symbol: str) -> bool:
+        return yf_symbol in self._indexed_at
+
+    def symbols(self) -> list[str]:
+        return list(self._indexed_at)
+
+    def replace(self, yf_symbol: str, events: list[dict]):
+        """Swap one symbol's events for `events`."""
+        with self._lock:
+            for e in self._by_symbol.get(yf_symbol, []):
+                i = bisect.bisect_left(self._events, _sort_key(e), key=_sort_key)
+                while self._events[i] is not e:
+                    i += 1
+                del self._events[i]
+            for e in events:
+                bisect.insort(self._events, e, key=_sort_key)
+            self._by_symbol[yf_symbol] = sorted(events, key=_sort_key)
+            self._indexed_at[yf_symbol] = time.time()
+
+    def query(self, start: str, end: str, yf_symbols: list[str] | None = None, types: set | None = None) -> list[dict]:
+        """Events with start <= date <= end (ISO dates), optionally for some symbols / types."""
+        with self._lock:
+            if yf_symbols is None:
+                lo = bisect.bisect_left(self._events, start, key=_date_key)
+                hi = bisect.bisect_right(self._events, end, key=_date_key)
+                rows = self._events[lo:hi]
+            else:
+                rows = []
+                for s in yf_symbols:
+                    evs = self._by_symbol.get(s, [])
+                    rows += evs[bisect.bisect_left(evs, start, key=_date_key):bisect.bisect_right(evs, end, key=_date_key)]
+                rows.sort(key=_sort_key)
+        return [e for e in rows if not types or e["type"] in types]
+
+
+event_index = EventIndex()
+
+
+def index_symbols(yf_symbols: list[str]) -> int:
+    """(Re)build the index entries of `yf_symbols` from their snapshots; returns symbols indexed."""
+    yf_symbols = [s for s in dict.fromkeys(yf_symbols) if not s.startswith("^")]
+    if not yf_symbols:
+        return 0
+    today = now_ist().date()
+    snaps = load_snapshots(yf_symbols, ("info", "dividends"))
+    done = 0
+    for s in yf_symbols:
+        try:
+            info = snaps[s].info or {}
+            divs = snaps[s].dividends or []
+        except Exception as e:
+            print(f"[EVENTS] {s}: {e}")
+            continue
+        event_index.replace(s, build_events(s, info, divs, today))
+        done += 1
+    return done
+
+
+def get_upcoming_events(tickers: list[str] | None = None, days: int = 30, past_days: int = 0,
+                        types: list[str] | None = None) -> dict:
+    days = max(0, min(MAX_DAYS, int(days if days is not None else 30)))
+    past_days = max(0, min(MAX_DAYS, int(past_days or 0)))
+    types = {t for t in (types or []) if t in EVENT_TYPES} or None
+    today = now_ist().date()
+    start, end = (today - timedelta(days=past_days)).isoformat(), (today + timedelta(days=days)).isoformat()
+
+    tm = StepTimer("EVENTS")
+    tm.start(f"tickers={len(tickers or [])} window={start}..{end}")
+    norm = batch_normalize(tickers) if tickers else None
+    if norm:
+        missing = [s for s in norm if not event_index.indexed(s)]
+        if missing:
+            index_symbols(missing)
+            tm.step(f"indexed {len(missing)} new symbols")
+    events = event_index.query(start, end, norm, types)
+    tm.end(f"events={len(events)}")
+    return {
+        "from": start,
+        "to": end,
+        "count": len(events),
+        "events": events,
+        "symbols_indexed": len(event_index.symbols()),
+        "notes": "source=estimated projects last year's ex-dates forward one year; amounts are per share.",
+    }
+
+
+class EventRefresher:
+    """Re-indexes the known symbols every EVENTS_REFRESH_SECONDS.
+
+    Snapshots only go back to Yahoo once older than FUNDAMENTALS_TTL, so most
+    passes just re-derive events (and the estimated dates) for the new day.
+    """
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stop = threading.Event()
+
+    def tick(self) -> int:
+        from services.refresh_service import hot_symbols
+
+        hot = [s for s, _ in hot_symbols.top(Config.REFRESH_TOP_N)]
+        symbols = list(dict.fromkeys(hot + event_index.symbols() + known_symbols()))[: Config.EVENTS_MAX_SYMBOLS]
+        return index_symbols(symbols)
+
+    def _run(self):
+        print(f"[EVENTS] pid={os.getpid()} refresher started every {Config.EVENTS_REFRESH_SECONDS}s")
+        while True:
+            try:
+                n = self.tick()
+                print(f"[EVENTS] indexed {n} symbols, {len(event_index)} events")
+            except Exception as e:
+                print(f"[EVENTS] refresh failed: {e}")
+            if self._stop.wait(Config.EVENTS_REFRESH_SECONDS):
+                break
+
+    def start(self):
+        """Start the loop once per process (safe to call from every gunicorn worker)."""
+        if not Config.EVENTS_REFRESH_ENABLED:
+            return
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="events-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+event_refresher = EventRefresher()
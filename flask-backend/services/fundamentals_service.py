@@ -0,0 +1,173 @@
+"""
+Per-symbol fundamentals snapshots shared by the corporate-actions and analyst services.
+
+A FundamentalsSnapshot fetches each Yahoo field (info, dividends, splits,
+recommendations, recommendation_trend) lazily, at most once per
+FUNDAMENTALS_TTL, and persists the converted records as JSON under
+FUNDAMENTALS_DIR so a restart does not re-hit `.info` for the whole universe.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+from config import Config
+from utils.metrics import record_cache
+from utils.resilience import guarded_lookup
+from utils.tracing import span
+
+FIELDS = ("info", "dividends", "splits", "recommendations", "recommendation_trend")
+
+
+def _series_to_records(series, value_name: str):
+    if series is None or not isinstance(series, pd.Series) or series.empty:
+        return []
+    df = series.reset_index()
+    df.columns = ["date", value_name]
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    df[value_name] = df[value_name].astype(float)
+    return df.to_dict(orient="records")
+
+
+def _df_to_records(df):
+    if df is None or not isinstance(df, pd.DataFrame) or df.empty:
+        return []
+    out = df.reset_index()
+    if "Date" in out.columns:
+        out["Date"] = pd.to_datetime(out["Date"]).dt.strftime("%Y-%m-%d")
+    return out.to_dict(orient="records")
+
+
+_LOADERS = {
+    "info": lambda tk: dict(tk.info or {}),
+    "dividends": lambda tk: _series_to_records(tk.dividends, "dividend"),
+    "splits": lambda tk: _series_to_records(tk.splits, "split_ratio"),
+    "recommendations": lambda tk: _df_to_records(getattr(tk, "recommendations", None)),
+    "recommendation_trend": lambda tk: _df_to_records(getattr(tk, "recommendationTrend", None)),
+}
+
+
+class FundamentalsSnapshot:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._ticker = None
+        self._data: dict = {}
+        self._ts: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_from_disk()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(Config.FUNDAMENTALS_DIR, self.symbol.replace("^", "_") + ".json")
+
+    def _fresh(self, field: str, now: float) -> bool:
+        return field in self._data and now - self._ts.get(field, 0) < Config.FUNDAMENTALS_TTL
+
+    def get(self, field: str):
+        """Field value, fetched from Yahoo only if missing or older than FUNDAMENTALS_TTL."""
+        if self._fresh(field, time.time()):
+            record_cache("fundamentals", True)
+            return self._data[field]
+        with self._lock:
+            # Another thread may have fetched it while we waited
+            if self._fresh(field, time.time()):
+                record_cache("fundamentals", True)
+                return self._data[field]
+            record_cache("fundamentals", False)
+            if self._ticker is None:
+                self._ticker = yf.Ticker(self.symbol)
+            with span("yfinance.ticker", kind="upstream", field=field):
+                value = guarded_lookup("yfinance", _LOADERS[field], self._ticker)
+            self._data[field] = value
+            self._ts[field] = time.time()
+            self._save_to_disk()
+            return value
+
+    def fetched_at(self, field: str) -> float | None:
+        return self._ts.get(field)
+
+    @property
+    def info(self) -> dict:
+        return self.get("info")
+
+    @property
+    def dividends(self) -> list:
+        return self.get("dividends")
+
+    @property
+    def splits(self) -> list:
+        return self.get("splits")
+
+    @property
+    def recommendations(self) -> list:
+        return self.get("recommendations")
+
+    @property
+    def recommendation_trend(self) -> list:
+        return self.get("recommendation_trend")
+
+    def _load_from_disk(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+            self._data = stored.get("data", {})
+            self._ts = stored.get("ts", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[FUNDAMENTALS] ignoring unreadable snapshot {self.path}: {e}")
+
+    def _save_to_disk(self):
+        try:
+            os.makedirs(Config.FUNDAMENTALS_DIR, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"symbol": self.symbol, "data": self._data, "ts": self._ts}, f, default=str)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[FUNDAMENTALS] could not persist {self.symbol}: {e}")
+
+
+_snapshots: dict[str, FundamentalsSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(yf_symbol: str) -> FundamentalsSnapshot:
+    with _snapshots_lock:
+        snap = _snapshots.get(yf_symbol)
+        if snap is None:
+            snap = _snapshots[yf_symbol] = FundamentalsSnapshot(yf_symbol)
+        return snap
+
+
+def known_symbols() -> list[str]:
+    """Symbols with a snapshot in memory or persisted under FUNDAMENTALS_DIR."""
+    with _snapshots_lock:
+        seen = set(_snapshots)
+    try:
+        seen |= {f[:-5].replace("_", "^", 1) if f.startswith("_") else f[:-5]
+                 for f in os.listdir(Config.FUNDAMENTALS_DIR) if f.endswith(".json")}
+    except FileNotFoundError:
+        pass
+    return sorted(seen)
+
+
+def load_snapshots(yf_symbols: list[str], fields: tuple = FIELDS) -> dict[str, FundamentalsSnapshot]:
+    """Populate `fields` for many symbols concurrently; per-symbol errors are left for the caller to hit."""
+    snaps = {s: get_snapshot(s) for s in dict.fromkeys(yf_symbols)}
+    now = time.time()
+    jobs = [(snap, f) for snap in snaps.values() for f in fields if not snap._fresh(f, now)]
+    if len(jobs) > 1:
+        def _fetch(job):
+            snap, field = job
+            try:
+                snap.get(field)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=min(Config.FUNDAMENTALS_WORKERS, len(jobs))) as pool:
+            list(pool.map(lambda job: contextvars.copy_context().run(_fetch, job), jobs))
+    return snaps
@@ -0,0 +1,160 @@
+"""
+Technical indicators for many symbols at once, with compact per-symbol summaries.
+
+Engines (utils/indicators.py) are kept per (interval, symbol set) and synced
+against the cached price history: only bars after the last committed one are
+stepped, and the still-forming last bar is evaluated on a copy of the state.
+An engine is rebuilt when its last committed bar left the history window or
+its close there changed: the history is dividend/split adjusted, so Yahoo
+rescales past closes after every corporate action.
+"""
+import threading
+import numpy as np
+from utils.indicators import IndicatorEngine, OUTPUTS
+from utils.ticker_utils import batch_normalize
+from utils.logging_utils import StepTimer
+from services.price_history_service import get_price_history
+
+INTERVALS = ("1d", "1wk", "15m", "5m")
+MAX_ENGINES = 64
+MAX_SERIES = 250
+RESYNC_RTOL = 1e-6  # relative change of a committed close that forces a rebuild
+
+_engines: dict[tuple, IndicatorEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_for(interval: str, symbols: list[str]) -> IndicatorEngine:
+    key = (interval, tuple(symbols))
+    with _engines_lock:
+        engine = _engines.pop(key, None) or IndicatorEngine(symbols)
+        _engines[key] = engine  # most recently used last
+        while len(_engines) > MAX_ENGINES:
+            _engines.pop(next(iter(_engines)))
+        return engine
+
+
+def _replace(interval: str, engine: IndicatorEngine):
+    """Swap in an empty engine for `engine`, unless another request already did."""
+    key = (interval, tuple(engine.symbols))
+    with _engines_lock:
+        if _engines.get(key) is engine:
+            _engines[key] = IndicatorEngine(engine.symbols)
+
+
+def _resync_start(engine: IndicatorEngine, dates: list, hist) -> int | None:
+    """Index of the first bar to commit, or None when the engine has to be rebuilt."""
+    if engine.last_date is None:
+        return 0
+    if engine.last_date not in hist.dates:
+        return None  # history no longer overlaps (window moved or stale data)
+    i = dates.index(engine.last_date)
+    committed, current = engine.history["close"][-1], hist.close[i]
+    have = ~np.isnan(current)
+    if not np.allclose(committed[have], current[have], rtol=RESYNC_RTOL, atol=0.0):
+        return None  # past closes re-adjusted (or a missing bar backfilled)
+    return i + 1
+
+
+def _sync(engine: IndicatorEngine, hist) -> dict | None:
+    """Commit all complete bars the engine hasn't seen; evaluate the last (live) bar.
+
+    None when the engine has to be rebuilt. Call with engine.lock held.
+    """
+    dates = list(hist.dates)
+    start = _resync_start(engine, dates, hist)
+    if start is None:
+        return None
+    for i in range(start, len(dates) - 1):
+        engine.commit(dates[i], hist.open[i], hist.high[i], hist.low[i], hist.close[i])
+    last = len(dates) - 1
+    return engine.evaluate(hist.open[last], hist.high[last], hist.low[last], hist.close[last])
+
+
+def _f(x, nd: int = 4):
+    return None if x is None or np.isnan(x) else round(float(x), nd)
+
+
+def _signals(o: dict, j: int) -> list[str]:
+    s = []
+    close, rsi = o["close"][j], o["rsi_14"][j]
+    for w in (50, 200):
+        sma = o[f"sma_{w}"][j]
+        if not np.isnan(sma):
+            s.append(f"{'above' if close >= sma else 'below'}_sma_{w}")
+    if not np.isnan(o["sma_50"][j]) and not np.isnan(o["sma_200"][j]):
+        s.append("golden_alignment" if o["sma_50"][j] > o["sma_200"][j] else "death_alignment")
+    if not np.isnan(rsi):
+        if rsi >= 70:
+            s.append("rsi_overbought")
+        elif rsi <= 30:
+            s.append("rsi_oversold")
+    hist, prev = o["macd_hist"][j], o["macd_hist_prev"][j]
+    if not np.isnan(hist) and not np.isnan(prev):
+        if prev < 0 <= hist:
+            s.append("macd_bullish_cross")
+        elif prev > 0 >= hist:
+            s.append("macd_bearish_cross")
+    if not np.isnan(o["bb_upper"][j]):
+        if close > o["bb_upper"][j]:
+            s.append("above_upper_band")
+        elif close < o["bb_lower"][j]:
+            s.append("below_lower_band")
+    return s
+
+
+def _summary(o: dict, j: int, as_of) -> dict:
+    close = o["close"][j]
+    atr = o["atr_14"][j]
+    upper, lower = o["bb_upper"][j], o["bb_lower"][j]
+    width = upper - lower
+    return {
+        "as_of": str(as_of),
+        "close": _f(close),
+        "sma": {str(w): _f(o[f"sma_{w}"][j]) for w in (20, 50, 200)},
+        "ema_20": _f(o["ema_20"][j]),
+        "rsi_14": _f(o["rsi_14"][j], 2),
+        "macd": {"macd": _f(o["macd"][j]), "signal": _f(o["macd_signal"][j]), "hist": _f(o["macd_hist"][j])},
+        "atr_14": _f(atr),
+        "atr_pct": _f(atr / close * 100, 3) if close and not np.isnan(atr) else None,
+        "bollinger": {
+            "upper": _f(upper), "middle": _f(o["bb_middle"][j]), "lower": _f(lower),
+            "pct_b": _f((close - lower) / width, 3) if width and not np.isnan(width) else None,
+        },
+        "signals": _signals(o, j),
+    }
+
+
+def get_indicators(tickers: list[str], interval: str = "1d", series: int = 0) -> dict:
+    """Latest indicator summary per ticker; `series` > 0 adds that many committed values per indicator."""
+    interval = interval if interval in INTERVALS else "1d"
+    series = max(0, min(MAX_SERIES, int(series or 0)))
+    tm = StepTimer("INDICATORS")
+    tm.start(f"tickers={len(tickers)} interval={interval}")
+    norm = {t.upper(): batch_normalize([t])[0] for t in tickers}
+    symbols = list(dict.fromkeys(norm.values()))
+    hist = get_price_history(symbols, interval)
+    if len(hist) == 0:
+        tm.end("no bars")
+        return {t: {"error": "no price history"} for t in norm}
+    while True:
+        engine = _engine_for(interval, hist.symbols)
+        with engine.lock:
+            latest = _sync(engine, hist)
+            if latest is not None:
+                tm.step(f"synced bars={len(engine.dates) + 1}")
+                out = {}
+                for t, nt in norm.items():
+                    j = hist.column(nt)
+                    if np.isnan(latest["close"][j]):
+                        out[t] = {"raw_ticker": nt, "error": "no price history"}
+                        continue
+                    out[t] = {"raw_ticker": nt, "interval": interval, **_summary(latest, j, hist.dates[-1])}
+                    if series:
+                        dates = [str(d) for d in engine.dates[-series:]]
+                        out[t]["series"] = {"dates": dates, **{k: [_f(v) for v in engine.series(k, series)[:, j]] for k in OUTPUTS if k != "close"}}
+                break
+        # Swap in a fresh engine and sync that one under its own lock
+        _replace(interval, engine)
+    tm.end()
+    return out
@@ -1,10 +1,17 @@
+import time
 import pandas as pd
 import yfinance as yf
-from utils.ticker_utils import batch_normalize
-from utils.cache_utils import get_cached, set_cached
-from utils.validation import validate_fields, clamp_window_days, validate_interval, validate_period
+from utils.ticker_utils import batch_normalize, fallback_ticker
+from utils.cache_utils import get_cached, set_cached, note_freshness
+from utils.resilience import guarded_download, serve_cached, mark_stale
+from utils.validation import validate_fields, clamp_window_days, validate_interval, validate_period, validate_max_points, validate_downsample_method
+from utils.downsample import downsample_records
 from config import Config
 from utils.logging_utils import StepTimer
+from utils.tracing import span
+from utils.market_calendar import quote_ttl, daily_ttl
+from services.pricemap_service import cached_prices
+from services.refresh_service import hot_symbols
 
 def _extract(df, ticker):
     if df is None or df.empty:
@@ -15,45 +22,102 @@ def _extract(df, ticker):
         return pd.DataFrame()
     return df
 
+QUOTE_COLUMNS = {"close":"Close","previousClose":"Close","open":"Open","high":"High","low":"Low","volume":"Volume"}
+_last_good: dict[str, dict] = {}  # yf symbol -> {"row": {field: value}, "ts": fetch time}
+
+def _ttl(calendar_ttl: int, complete: bool) -> int:
+    """Calendar TTL, or CACHE_TTL_EMPTY when a symbol had no bars: one upstream blip
+    must not be served for a whole weekend or holiday."""
+    return calendar_ttl if complete else min(calendar_ttl, Config.CACHE_TTL_EMPTY)
+
+def _download(symbols: list[str], **kwargs) -> pd.DataFrame:
+    with span("yfinance.download", kind="upstream"):
+        return guarded_download(yf.download, symbols, threads=True, auto_adjust=True, progress=False, **kwargs)
+
 def get_quotes(tickers: list[str], fields: list[str] | None = None) -> dict:
-    tm = StepTimer("QUOTES")
-    tm.start(f"tickers={tickers} fields={fields}")
     fields = fields or ["close","previousClose","volume"]
     fields = validate_fields(fields)
     params = {"tickers": ",".join(sorted(tickers)), "fields": ",".join(sorted(fields))}
-    cached = get_cached("quotes", params, Config.CACHE_TTL_QUOTES)
-    if cached:
-        return cached
+    return serve_cached("quotes", params, lambda: _load_quotes(tickers, fields, params), per_symbol=True)
+
+def _load_quotes(tickers: list[str], fields: list[str], params: dict) -> dict:
+    tm = StepTimer("QUOTES")
+    tm.start(f"tickers={tickers} fields={fields}")
     norm = batch_normalize(tickers)
+    hot_symbols.touch(norm)
     out: dict = {}
-    df = yf.download(norm, period="5d", interval="1d", threads=True, auto_adjust=True, progress=False)
-    tm.step(f"yf.download done rows={len(df)}")
-    mapping = {"close":"Close","previousClose":"Close","open":"Open","high":"High","low":"Low","volume":"Volume"}
+    # Symbols kept warm by the background refresher are answered from the pricemap cache
+    warm = {}
+    for nt, data in cached_prices(norm).items():
+        if data.get("ohlcv"):
+            last = data["ohlcv"][-1]
+            warm[nt] = {f: (float(last[QUOTE_COLUMNS[f]]) if last.get(QUOTE_COLUMNS[f]) is not None else None) for f in fields}
+    cold = [nt for nt in norm if nt not in warm]
+    df = pd.DataFrame()
+    upstream_error = None
+    if cold:
+        try:
+            df = _download(cold, period="5d", interval="1d")
+            tm.step(f"yf.download done rows={len(df)} warm={len(warm)}")
+        except Exception as e:
+            upstream_error = e
+            tm.error(f"yf.download failed: {e}")
+    else:
+        tm.step(f"served from warm cache ({len(warm)} symbols)")
+    # One batched retry on the alternate exchange for dual-listed symbols with no NSE bars
+    alt = {nt: fallback_ticker(nt) for nt in cold if _extract(df, nt).empty} if upstream_error is None else {}
+    alt = {nt: a for nt, a in alt.items() if a}
+    alt_df = None
+    if alt:
+        try:
+            alt_df = _download(list(alt.values()), period="5d", interval="1d")
+            tm.step(f"exchange fallback for {list(alt.values())}")
+        except Exception as e:
+            tm.error(f"exchange fallback failed: {e}")
+    now = time.time()
+    stale = 0
     for orig in tickers:
         nt = batch_normalize([orig])[0]
+        if nt in warm:
+            out[orig.upper()] = warm[nt]
+            continue
         tdf = _extract(df, nt)
+        if tdf.empty and nt in alt:
+            tdf = _extract(alt_df, alt[nt])
         if tdf.empty:
-            out[orig.upper()] = {f: None for f in fields}
+            lkg = _last_good.get(nt)
+            if lkg and now - lkg["ts"] < Config.LKG_MAX_AGE:
+                out[orig.upper()] = mark_stale({f: lkg["row"].get(f) for f in fields}, lkg["ts"])
+                note_freshness(lkg["ts"], now, stale=True, key=nt)
+                stale += 1
+            else:
+                out[orig.upper()] = {f: None for f in fields}
             continue
         last = tdf.iloc[-1]
-        row = {}
-        for f in fields:
-            col = mapping.get(f)
-            row[f] = float(last.get(col)) if col in tdf.columns else None
-        out[orig.upper()] = row
-    set_cached("quotes", params, out, Config.CACHE_TTL_QUOTES)
-    tm.step("format done")
+        full = {f: (float(last.get(col)) if col in tdf.columns else None) for f, col in QUOTE_COLUMNS.items()}
+        _last_good[nt] = {"row": full, "ts": now}
+        out[orig.upper()] = {f: full[f] for f in fields}
+    if upstream_error is not None and stale == 0 and cold:
+        raise upstream_error
+    if stale == 0:
+        complete = all(any(v is not None for v in row.values()) for row in out.values())
+        set_cached("quotes", params, out, _ttl(quote_ttl(Config.CACHE_TTL_QUOTES), complete))
+    else:
+        # Not cached: give this partially stale response a one-off version
+        note_freshness(now, now, stale=True, key="quotes:partial")
+    tm.end(f"format done stale={stale}")
     return out
 
 def get_price_ranges(tickers: list[str], window_days: int = 252) -> dict:
     window_days = clamp_window_days(window_days)
     params = {"tickers": ",".join(sorted(tickers)), "window": window_days}
-    cached = get_cached("ranges", params, Config.CACHE_TTL_QUOTES)
-    if cached:
-        return cached
+    return serve_cached("ranges", params, lambda: _load_price_ranges(tickers, window_days, params), per_symbol=True)
+
+def _load_price_ranges(tickers: list[str], window_days: int, params: dict) -> dict:
     norm = batch_normalize(tickers)
-    period = "1y" if window_days > 180 else "6mo"
-    df = yf.download(norm, period=period, interval="1d", threads=True, auto_adjust=True, progress=False)
+    # window_days counts trading days; pick the shortest period that covers it
+    period = "6mo" if window_days <= 120 else "1y" if window_days <= 245 else "2y" if window_days <= 495 else "5y"
+    df = _download(norm, period=period, interval="1d")
     out = {}
     for orig in tickers:
         nt = batch_normalize([orig])[0]
@@ -68,18 +132,51 @@ def get_price_ranges(tickers: list[str], window_days: int = 252) -> dict:
             "current": float(recent["Close"].iloc[-1]),
             "window_days": len(recent)
         }
-    set_cached("ranges", params, out, Config.CACHE_TTL_QUOTES)
+    complete = all(r["window_days"] for r in out.values())
+    set_cached("ranges", params, out, _ttl(daily_ttl(Config.CACHE_TTL_DAILY), complete))
     return out
 
-def get_intraday(tickers: list[str], interval: str = "5m", period: str = "5d") -> dict:
+def get_intraday(tickers: list[str], interval: str = "5m", period: str = "5d", max_points: int | None = None, method: str = "lttb") -> dict:
     interval = validate_interval(interval)
     period = validate_period(period)
+    max_points = validate_max_points(max_points)
+    if max_points:
+        return _downsampled_intraday(tickers, interval, period, max_points, validate_downsample_method(method))
     params = {"tickers": ",".join(sorted(tickers)), "interval": interval, "period": period}
-    cached = get_cached("intraday", params, Config.CACHE_TTL_QUOTES)
-    if cached:
-        return cached
+    return serve_cached("intraday", params, lambda: _load_intraday(tickers, interval, period, params), per_symbol=True)
+
+def _downsampled_intraday(tickers: list[str], interval: str, period: str, max_points: int, method: str) -> dict:
+    """Per-symbol cache of reduced series, keyed by (symbol, interval, period, max_points, method)."""
+    out, missing = {}, []
+    for t in tickers:
+        params = {"symbol": t.upper(), "interval": interval, "period": period, "max_points": max_points, "method": method}
+        cached = get_cached("intraday_ds", params)
+        if cached:
+            out[t.upper()] = cached
+        else:
+            missing.append(t)
+    if missing:
+        full = get_intraday(missing, interval, period)
+        for t in missing:
+            src = full.get(t.upper(), {})
+            data = src.get("data", [])
+            entry = {
+                "interval": interval, "period": period,
+                "max_points": max_points, "method": method,
+                "source_points": len(data),
+                "data": downsample_records(data, max_points, method),
+            }
+            if src.get("stale"):
+                entry.update(stale=True, as_of=src.get("as_of"))
+            elif data:
+                params = {"symbol": t.upper(), "interval": interval, "period": period, "max_points": max_points, "method": method}
+                set_cached("intraday_ds", params, entry, quote_ttl(Config.CACHE_TTL_QUOTES))
+            out[t.upper()] = entry
+    return {t.upper(): out[t.upper()] for t in tickers}
+
+def _load_intraday(tickers: list[str], interval: str, period: str, params: dict) -> dict:
     norm = batch_normalize(tickers)
-    df = yf.download(norm, period=period, interval=interval, threads=True, auto_adjust=True, progress=False)
+    df = _download(norm, period=period, interval=interval)
     out = {}
     for orig in tickers:
         nt = batch_normalize([orig])[0]
@@ -88,5 +185,6 @@ def get_intraday(tickers: list[str], interval: str = "5m", period: str = "5d") -
             "interval": interval, "period": period,
             "data": tdf.reset_index().to_dict(orient="records")
         }
-    set_cached("intraday", params, out, Config.CACHE_TTL_QUOTES)
+    complete = all(r["data"] for r in out.values())
+    set_cached("intraday", params, out, _ttl(quote_ttl(Config.CACHE_TTL_QUOTES), complete))
     return out
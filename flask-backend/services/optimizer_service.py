@@ -0,0 +1,197 @@
+"""
+Portfolio optimisation over the holdings' daily return history.
+
+Covariance is Ledoit-Wolf shrunk and annualised; expected returns are
+historical annualised means. Constraints: fully invested, long-only (or
++/- max_weight), per-name max weight and per-sector caps. One QPSolver is
+built per request and reused, warm-started, for:
+
+- min_variance: gamma = 0
+- frontier: a sweep of risk aversion 1/gamma, min w'Cov w - gamma mu'w
+- max_sharpe: golden-section refinement of gamma around the best frontier point
+- risk_parity: equal risk contributions, projected onto the constraints when
+  the unconstrained solution breaks them
+"""
+import math
+import numpy as np
+from config import Config
+from utils.cache_utils import get_cached, set_cached
+from utils.logging_utils import StepTimer
+from utils.market_calendar import daily_ttl
+from utils.optimizer import QPSolver, ledoit_wolf, risk_parity
+from utils.symbol_index import get_symbol_index
+from services.risk_service import holdings_history, holdings_key, resolve_weights
+
+OBJECTIVES = ("min_variance", "max_sharpe", "risk_parity")
+MAX_FRONTIER_POINTS = 50
+GOLDEN = (math.sqrt(5) - 1) / 2
+
+
+def _sector(symbol: str) -> str:
+    entry = get_symbol_index().get(symbol.split(".")[0])
+    return (entry or {}).get("sector") or "Unknown"
+
+
+def _constraints(symbols: list[str], long_only: bool, max_weight: float, sector_caps: dict[str, float]):
+    """(A, l, u) rows: budget, per-name bounds, then one row per capped sector."""
+    n = len(symbols)
+    lo = 0.0 if long_only else -max_weight
+    rows, l, u = [np.ones(n)], [1.0], [1.0]
+    rows += list(np.eye(n))
+    l += [lo] * n
+    u += [max_weight] * n
+    sectors = [_sector(s) for s in symbols]
+    caps = {}
+    for sec, cap in (sector_caps or {}).items():
+        members = np.array([s.lower() == str(sec).lower() for s in sectors], dtype=float)
+        if members.any():
+            caps[sec] = float(cap)
+            rows.append(members)
+            l.append(-np.inf if not long_only else 0.0)
+            u.append(float(cap))
+    if long_only:
+        # Most weight the caps allow in total; below 1 the budget row can't be met
+        capacity = 0.0
+        for sec in set(sectors):
+            k = sum(1 for s in sectors if s == sec)
+            cap = next((c for name, c in caps.items() if name.lower() == sec.lower()), None)
+            capacity += min(k * max_weight, cap) if cap is not None else k * max_weight
+        if capacity < 1 - 1e-9:
+            raise ValueError(f"constraints infeasible: max_weight/sector caps allow only {capacity:.0%} invested")
+    return np.vstack(rows), np.array(l), np.array(u), sectors, caps
+
+
+def _stats(w: np.ndarray, mu: np.ndarray, cov: np.ndarray, rf: float) -> dict:
+    ret = float(w @ mu)
+    vol = float(np.sqrt(max(w @ cov @ w, 0.0)))
+    return {"expected_return": round(ret, 4), "volatility": round(vol, 4),
+            "sharpe": round((ret - rf) / vol, 3) if vol else None}
+
+
+def _clean(w: np.ndarray, long_only: bool) -> np.ndarray:
+    """Drop solver noise: tiny weights to zero, then renormalise to fully invested."""
+    w = np.where(np.abs(w) < 1e-5, 0.0, w)
+    if long_only:
+        w = np.clip(w, 0.0, None)
+    return w / w.sum() if w.sum() else w
+
+
+def _sharpe(w, mu, cov, rf) -> float:
+    vol = math.sqrt(max(float(w @ cov @ w), 0.0))
+    return (float(w @ mu) - rf) / vol if vol else -np.inf
+
+
+def get_optimized_portfolio(holdings: list, long_only: bool = True, max_weight: float | None = None,
+                            sector_caps: dict | None = None, frontier_points: int = 15,
+                            rebalance_to: str | None = None) -> dict:
+    max_weight = float(max_weight or 1.0)
+    if not 0 < max_weight <= 1:
+        raise ValueError("max_weight must be in (0, 1]")
+    frontier_points = max(2, min(MAX_FRONTIER_POINTS, int(frontier_points or 15)))
+    if rebalance_to and rebalance_to not in OBJECTIVES:
+        raise ValueError(f"rebalance_to must be one of {', '.join(OBJECTIVES)}")
+    rf = Config.RISK_FREE_RATE
+
+    tm = StepTimer("OPTIMIZER")
+    tm.start(f"holdings={len(holdings)} long_only={long_only} max_weight={max_weight}")
+    parsed, norm, hist, last_prices = holdings_history(holdings)
+    current, value = resolve_weights(parsed, last_prices)
+    if len(current) < 2:
+        raise ValueError("need price history for at least two holdings")
+
+    params = {"h": holdings_key(current, value), "long_only": bool(long_only), "max_weight": max_weight,
+              "caps": sorted((str(k).lower(), float(v)) for k, v in (sector_caps or {}).items()),
+              "points": frontier_points, "rebalance_to": rebalance_to, "as_of": str(hist.dates[-1])}
+    cached = get_cached("optimizer", params)
+    if cached:
+        tm.end("cache hit")
+        return cached
+
+    symbols = list(current)
+    close = hist.close[:, [hist.column(norm[s]) for s in symbols]]
+    close = close[~np.isnan(close).any(axis=1)]
+    rets = close[1:] / close[:-1] - 1.0
+    if len(rets) < 60:
+        raise ValueError("not enough overlapping history (need 60+ days)")
+    cov_d, shrink = ledoit_wolf(rets)
+    cov = cov_d * 252
+    mu = rets.mean(axis=0) * 252
+    a, l, u, sectors, caps = _constraints(symbols, long_only, max_weight, sector_caps)
+    solver = QPSolver(cov, a, l, u)
+    tm.step(f"returns {rets.shape} shrinkage={shrink:.3f}")
+
+    # Frontier: gamma from 0 (min variance) up to where the mean term dominates
+    scale = float(np.mean(np.diag(cov))) / max(float(np.max(np.abs(mu))), 1e-9)
+    gammas = np.concatenate([[0.0], np.geomspace(1e-2, 1e2, frontier_points - 1) * scale])
+    frontier, weights_at, iters = [], [], 0
+    for g in gammas:
+        w, it = solver.solve(-g * mu)
+        iters += it
+        w = _clean(w, long_only)
+        if frontier and abs(_stats(w, mu, cov, rf)["volatility"] - frontier[-1]["volatility"]) < 1e-4:
+            continue
+        frontier.append(_stats(w, mu, cov, rf))
+        weights_at.append((g, w))
+    w_minvar = weights_at[0][1]
+
+    # Max Sharpe: golden-section on log gamma between the best point's neighbours
+    best = int(np.argmax([_sharpe(w, mu, cov, rf) for _, w in weights_at]))
+    lo_g = weights_at[max(best - 1, 0)][0] or gammas[1] * 1e-2
+    hi_g = weights_at[min(best + 1, len(weights_at) - 1)][0] or gammas[1]
+    a_, b_ = math.log(lo_g), math.log(max(hi_g, lo_g * 1.0001))
+    w_sharpe, s_sharpe = weights_at[best][1], _sharpe(weights_at[best][1], mu, cov, rf)
+    for _ in range(20):
+        c_ = b_ - GOLDEN * (b_ - a_)
+        d_ = a_ + GOLDEN * (b_ - a_)
+        wc, itc = solver.solve(-math.exp(c_) * mu)
+        wd, itd = solver.solve(-math.exp(d_) * mu)
+        iters += itc + itd
+        wc, wd = _clean(wc, long_only), _clean(wd, long_only)
+        sc, sd = _sharpe(wc, mu, cov, rf), _sharpe(wd, mu, cov, rf)
+        for w, s in ((wc, sc), (wd, sd)):
+            if s > s_sharpe:
+                w_sharpe, s_sharpe = w, s
+        if sc >= sd:
+            b_ = d_
+        else:
+            a_ = c_
+    tm.step(f"frontier points={len(frontier)} admm_iters={iters}")
+
+    w_rp = risk_parity(cov)
+    rp_projected = bool(np.any(a @ w_rp > u + 1e-9) or np.any(a @ w_rp < l - 1e-9))
+    if rp_projected:
+        # Nearest feasible weights in the Euclidean sense
+        w_rp, _ = QPSolver(np.eye(len(symbols)), a, l, u).solve(-w_rp)
+        w_rp = _clean(w_rp, long_only)
+
+    cur = np.array([current[s] for s in symbols])
+    targets = {"min_variance": w_minvar, "max_sharpe": w_sharpe, "risk_parity": w_rp}
+    table = []
+    for i, s in enumerate(symbols):
+        row = {"symbol": s, "sector": sectors[i], "current": round(float(cur[i]), 4)}
+        row.update({k: round(float(w[i]), 4) for k, w in targets.items()})
+        table.append(row)
+
+    out = {
+        "as_of": str(hist.dates[-1].date()),
+        "lookback_days": len(rets),
+        "shrinkage": round(shrink, 4),
+        "risk_free": rf,
+        "constraints": {"long_only": bool(long_only), "max_weight": max_weight, "sector_caps": caps},
+        "portfolios": {"current": _stats(cur, mu, cov, rf), **{k: _stats(w, mu, cov, rf) for k, w in targets.items()}},
+        "risk_parity_projected": rp_projected,
+        "weights": table,
+        "frontier": frontier,
+        "missing": [h["symbol"] for h in parsed if h["symbol"] not in current],
+    }
+    if rebalance_to and value:
+        # Shares to buy (+) or sell (-) to move from current to target weights at the last price
+        target = targets[rebalance_to]
+        out["rebalance"] = {
+            "to": rebalance_to,
+            "portfolio_value": round(value, 2),
+            "trades": {s: int(round((target[i] - cur[i]) * value / last_prices[s])) for i, s in enumerate(symbols)},
+        }
+    set_cached("optimizer", params, out, daily_ttl(Config.CACHE_TTL_DAILY))
+    tm.end()
+    return out
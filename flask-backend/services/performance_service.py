@@ -0,0 +1,211 @@
+"""
+Holding and portfolio performance from purchase dates, with dividends and splits.
+
+For every holding, from its purchase date (or `since` when none is given):
+
+- price gain vs cost (quantity x avg_price, else the close on the purchase date)
+- dividend income: quantity x cash dividend for every ex-date after purchase
+- time-weighted return from a total-return index (dividends reinvested), built
+  from unadjusted closes plus corporate actions, see utils/backtest.total_returns
+- money-weighted return (XIRR) of: cost at purchase, dividends, value today
+
+The portfolio TWR chains daily returns net of purchases; its XIRR combines all
+holdings' cashflows. Quantities and prices are taken as of today, i.e. split
+adjusted, which matches Yahoo's closes and dividend history. All matrices are
+(T, H) across holdings; results are cached until the next daily bar.
+"""
+import numpy as np
+import pandas as pd
+from config import Config
+from utils.backtest import event_matrix, total_returns
+from utils.cache_utils import get_cached, set_cached
+from utils.irr import xirr
+from utils.logging_utils import StepTimer
+from utils.market_calendar import daily_ttl, now_ist
+from utils.ticker_utils import batch_normalize
+from utils.validation import parse_holdings
+from services.corporate_actions_service import get_dividends_and_splits
+from services.price_history_service import get_price_history
+
+BENCHMARK = "^NSEI"
+PERIODS = (("1y", 365), ("2y", 730), ("5y", 1826), ("10y", 3652))
+
+
+def _period_for(start: pd.Timestamp) -> str:
+    days = (pd.Timestamp(now_ist().date()) - start).days + 10
+    return next((p for p, d in PERIODS if days <= d), "max")
+
+
+def _lot_keys(parsed: list[dict]) -> list[str]:
+    """Symbol, or SYMBOL#2, SYMBOL#3... for further lots of the same symbol."""
+    seen, keys = {}, []
+    for h in parsed:
+        seen[h["symbol"]] = seen.get(h["symbol"], 0) + 1
+        keys.append(h["symbol"] if seen[h["symbol"]] == 1 else f"{h['symbol']}#{seen[h['symbol']]}")
+    return keys
+
+
+def _month_ends(dates: pd.DatetimeIndex) -> np.ndarray:
+    p = dates.to_period("M").asi8
+    return np.r_[p[1:] != p[:-1], True]
+
+
+def _r(x, nd: int = 4):
+    return None if x is None or not np.isfinite(x) else round(float(x), nd)
+
+
+def _annualise(total: float, years: float):
+    return (1 + total) ** (1 / years) - 1 if years >= 1 and total > -1 else None
+
+
+def get_performance(holdings: list, since: str | None = None, include_series: bool = False) -> dict:
+    parsed = [h for h in parse_holdings(holdings) if h.get("quantity")]
+    if not parsed:
+        raise ValueError("holdings with quantity required")
+    today = pd.Timestamp(now_ist().date())
+    default_start = pd.Timestamp(since) if since else today - pd.DateOffset(years=1)
+    starts = []
+    for h in parsed:
+        try:
+            starts.append(pd.Timestamp(h["purchase_date"]) if h.get("purchase_date") else None)
+        except (TypeError, ValueError):
+            starts.append(None)
+    assumed = [s is None for s in starts]
+    starts = [s if s is not None else default_start for s in starts]
+
+    tm = StepTimer("PERFORMANCE")
+    tm.start(f"holdings={len(parsed)} earliest={min(starts).date()}")
+    norm = [batch_normalize([h["symbol"]])[0] for h in parsed]
+    hist = get_price_history(list(dict.fromkeys(norm)) + [BENCHMARK], "1d", _period_for(min(starts)), adjusted=False)
+    if len(hist) == 0:
+        raise ValueError("no price history for any holding")
+
+    params = {
+        "h": sorted((h["symbol"], h["quantity"], h.get("avg_price"), str(s.date())) for h, s in zip(parsed, starts)),
+        "series": bool(include_series), "as_of": str(hist.dates[-1]),
+    }
+    cached = get_cached("performance", params)
+    if cached:
+        tm.end("cache hit")
+        return cached
+
+    # Rows from the day before the earliest purchase, so each holding has a previous close
+    first = max(int(hist.dates.searchsorted(min(starts))) - 1, 0)
+    dates = hist.dates[first:]
+    close = pd.DataFrame(hist.close[first:, [hist.column(s) for s in norm]]).ffill().to_numpy()
+    raw_close = hist.close[first:, [hist.column(s) for s in norm]]
+    bench = pd.Series(hist.close[first:, hist.column(BENCHMARK)]).ffill().to_numpy()
+    t, n = close.shape
+
+    try:
+        corp = get_dividends_and_splits(list(dict.fromkeys(h["symbol"] for h in parsed)))
+    except Exception as e:
+        print(f"[PERFORMANCE] corporate actions unavailable ({e}); using price returns")
+        corp = {}
+    actions = [corp.get(h["symbol"]) or {} for h in parsed]
+    actions = [{} if "error" in ca else ca for ca in actions]
+    price_only = sorted({h["symbol"] for h, ca in zip(parsed, actions) if not ca})
+    divs = event_matrix(dates, [ca.get("dividends") for ca in actions], "dividend")
+    splits = event_matrix(dates, [ca.get("splits") for ca in actions], "split_ratio", multiply=True)
+    tm.step(f"matrices {close.shape} price_only={len(price_only)}")
+
+    q = np.array([h["quantity"] for h in parsed])
+    # Purchase row: first trading day on/after the purchase date that has a close
+    p = np.array([int(dates.searchsorted(s)) for s in starts])
+    p = np.minimum(p, t - 1)
+    valid_from = np.argmax(~np.isnan(raw_close), axis=0)
+    p = np.maximum(p, valid_from)
+    rows_idx = np.arange(t)[:, None]
+    held = rows_idx >= p[None, :]  # (T, H) holding owned at the close of row t
+    after = rows_idx > p[None, :]  # dividends/returns accrue after the purchase close
+
+    buy_px = close[p, np.arange(n)]
+    avg = np.array([h.get("avg_price") or np.nan for h in parsed])
+    cost = q * np.where(np.isnan(avg), buy_px, avg)
+    last_px = close[-1]
+    value = q * last_px
+    div_cash = np.where(after, divs, 0.0) * q[None, :]  # (T, H)
+    income = div_cash.sum(axis=0)
+
+    # Time-weighted: total-return index from the purchase close
+    tr = np.nan_to_num(total_returns(raw_close, divs, splits))
+    tri = np.cumprod(1.0 + np.where(after, tr, 0.0), axis=0)
+    twr = tri[-1] - 1.0
+    years_held = np.array([(dates[-1] - dates[i]).days / 365.25 for i in p])
+
+    # Money-weighted: one cashflow row per holding on the shared date axis
+    years_axis = np.asarray((dates - dates[0]).days, dtype=float) / 365.25
+    flows = div_cash.T.copy()
+    flows[np.arange(n), p] -= cost
+    flows[:, -1] += value
+    mwr = xirr(flows, years_axis)
+    tm.step("per-holding returns")
+
+    # Portfolio TWR: daily returns net of purchases (valued at that day's close)
+    pos = np.where(held, close * q[None, :], 0.0)
+    v = pos.sum(axis=1)
+    inflow = np.zeros(t)
+    np.add.at(inflow, p, q * buy_px)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(v[:-1] > 0, (v[1:] + div_cash[1:].sum(axis=1) - inflow[1:]) / v[:-1] - 1.0, 0.0)
+    port_index = np.r_[1.0, np.cumprod(1.0 + r)]
+    p0 = int(p.min())
+    port_twr = port_index[-1] / port_index[p0] - 1.0
+    port_years = (dates[-1] - dates[p0]).days / 365.25
+    port_mwr = xirr(flows.sum(axis=0, keepdims=True), years_axis)[0]
+    bench_twr = bench[-1] / bench[p0] - 1.0
+
+    per = {}
+    keys = _lot_keys(parsed)
+    for j, h in enumerate(parsed):
+        gain = value[j] - cost[j] + income[j]
+        per[keys[j]] = {
+            "raw_ticker": norm[j],
+            "quantity": h["quantity"],
+            "purchase_date": str(dates[p[j]].date()),
+            "assumed_start": assumed[j],
+            "cost_basis": _r(cost[j], 2),
+            "market_value": _r(value[j], 2),
+            "price_gain": _r(value[j] - cost[j], 2),
+            "dividend_income": _r(income[j], 2),
+            "total_gain": _r(gain, 2),
+            "total_gain_pct": _r(gain / cost[j] * 100, 2) if cost[j] else None,
+            "twr": _r(twr[j]),
+            "twr_annualized": _r(_annualise(twr[j], years_held[j])),
+            "xirr": _r(mwr[j]),
+            "splits": int((np.where(after[:, j], splits[:, j], 1.0) != 1.0).sum()),
+        }
+    total_cost, total_value, total_income = float(cost.sum()), float(value.sum()), float(income.sum())
+    total_gain = total_value - total_cost + total_income
+    out = {
+        "as_of": str(dates[-1].date()),
+        "portfolio": {
+            "start": str(dates[p0].date()),
+            "cost_basis": _r(total_cost, 2),
+            "market_value": _r(total_value, 2),
+            "price_gain": _r(total_value - total_cost, 2),
+            "dividend_income": _r(total_income, 2),
+            "total_gain": _r(total_gain, 2),
+            "total_gain_pct": _r(total_gain / total_cost * 100, 2) if total_cost else None,
+            "twr": _r(port_twr),
+            "twr_annualized": _r(_annualise(port_twr, port_years)),
+            "xirr": _r(port_mwr),
+            "benchmark_twr": _r(bench_twr),
+            "benchmark_twr_annualized": _r(_annualise(bench_twr, port_years)),
+        },
+        "holdings": per,
+        "price_return_only": price_only,
+        "notes": "TWR reinvests dividends from the purchase-date close; XIRR uses cost basis, dividend cashflows on ex-dates and today's value. Benchmark is the ^NSEI price index.",
+    }
+    if include_series:
+        me = _month_ends(dates[p0:])
+        idx = dates[p0:][me]
+        out["series"] = {
+            "dates": [str(d.date()) for d in idx],
+            "portfolio_twr": [_r(x) for x in (port_index[p0:] / port_index[p0])[me]],
+            "benchmark": [_r(x) for x in (bench[p0:] / bench[p0])[me]],
+            "holdings_tri": {k: [_r(x) for x in tri[p0:, j][me]] for j, k in enumerate(keys)},
+        }
+    set_cached("performance", params, out, daily_ttl(Config.CACHE_TTL_DAILY))
+    tm.end()
+    return out
@@ -0,0 +1,200 @@
+"""
+Portfolio snapshot: quotes, price ranges, monthly OHLC, returns, recent OHLCV,
+corporate actions and analyst data for a set of holdings in one document.
+
+Requested facets are planned into the fewest upstream calls:
+- one daily yf.download sized for the longest daily-bar facet (quotes, ranges,
+  monthly, returns and ohlcv are all derived from it)
+- one concurrent fundamentals load for corporate_actions / analyst
+The two run concurrently. Market data is cached per (symbols, facets, window);
+positions are computed per request so quantities don't fragment the cache.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+from config import Config
+from utils.cache_utils import set_cached
+from utils.logging_utils import StepTimer
+from utils.market_calendar import quote_ttl
+from utils.resilience import guarded_download, serve_cached
+from utils.ticker_utils import batch_normalize, fallback_ticker
+from utils.tracing import span
+from utils.validation import clamp_window_days, validate_facets, parse_holdings
+from services.analyst_service import analyst_from_snapshot
+from services.corporate_actions_service import corporate_actions_from_snapshot
+from services.fundamentals_service import load_snapshots
+from services.pricemap_service import to_monthly6
+from services.refresh_service import hot_symbols
+
+BENCHMARK = "^NSEI"
+RETURN_WINDOWS = {"1d": 1, "1w": 5, "1m": 21, "3m": 63, "6m": 126, "1y": 252}
+PERIOD_DAYS = (("1mo", 21), ("6mo", 126), ("1y", 252), ("2y", 504), ("5y", 1260))
+OHLCV_BARS = 21
+FUNDAMENTAL_FIELDS = {
+    "corporate_actions": ("info", "dividends", "splits"),
+    "analyst": ("recommendations", "recommendation_trend"),
+}
+
+
+def plan_fetches(facets: list[str], window_days: int) -> dict:
+    """Upstream calls needed for `facets`: one daily download period (or None) and fundamentals fields."""
+    need = 0
+    if "quotes" in facets or "ohlcv" in facets:
+        need = max(need, OHLCV_BARS)
+    if "ranges" in facets:
+        need = max(need, window_days)
+    if "monthly" in facets:
+        need = max(need, 126)
+    if "returns" in facets:
+        need = max(need, RETURN_WINDOWS["1y"])
+    period = None
+    if need:
+        period = next((p for p, days in PERIOD_DAYS if need <= days), PERIOD_DAYS[-1][0])
+    fields = tuple(dict.fromkeys(f for facet in facets for f in FUNDAMENTAL_FIELDS.get(facet, ())))
+    return {"daily_period": period, "fundamentals": fields}
+
+
+def _extract(df, ticker) -> pd.DataFrame:
+    if df is None or df.empty or not isinstance(df.columns, pd.MultiIndex):
+        return pd.DataFrame()
+    if ticker not in df.columns.get_level_values(1):
+        return pd.DataFrame()
+    return df.xs(ticker, axis=1, level=1).dropna(how="all")
+
+
+def _download_daily(symbols: list[str], period: str) -> dict[str, pd.DataFrame]:
+    """Frames per symbol (empty for a symbol neither listing has bars for)."""
+    kwargs = dict(period=period, interval="1d", threads=True, auto_adjust=True, progress=False)
+    with span("yfinance.download", kind="upstream", period=period):
+        df = guarded_download(yf.download, symbols, **kwargs)
+    frames = {s: _extract(df, s) for s in symbols}
+    # One batched retry on the alternate exchange for dual-listed symbols with no bars
+    alt = {s: fallback_ticker(s) for s, f in frames.items() if f.empty}
+    alt = {s: a for s, a in alt.items() if a}
+    if alt:
+        with span("yfinance.download", kind="upstream", period=period):
+            alt_df = guarded_download(yf.download, list(alt.values()), **kwargs)
+        for s, a in alt.items():
+            frames[s] = _extract(alt_df, a)
+    return frames
+
+
+def _r(x, nd: int = 4):
+    return None if x is None or pd.isna(x) else round(float(x), nd)
+
+
+def _bar_facets(tdf: pd.DataFrame, facets: list[str], window_days: int) -> dict:
+    if tdf.empty or "Close" not in tdf.columns:
+        return {f: None for f in facets if f in ("quotes", "ranges", "monthly", "returns", "ohlcv")}
+    close = tdf["Close"].dropna()
+    out = {}
+    if "quotes" in facets:
+        last = close.iloc[-1]
+        prev = close.iloc[-2] if len(close) > 1 else None
+        out["quotes"] = {
+            "date": close.index[-1].strftime("%Y-%m-%d"),
+            "close": _r(last),
+            "previous_close": _r(prev),
+            "change_pct": _r((last / prev - 1) * 100, 3) if prev else None,
+            "volume": _r(tdf["Volume"].iloc[-1], 0) if "Volume" in tdf.columns else None,
+        }
+    if "ranges" in facets:
+        recent = tdf.tail(window_days)
+        out["ranges"] = {
+            "high": _r(recent["High"].max()),
+            "low": _r(recent["Low"].min()),
+            "current": _r(close.iloc[-1]),
+            "window_days": len(recent),
+        }
+    if "monthly" in facets:
+        ohlcv_cols = {"Open", "High", "Low", "Close", "Volume"}
+        out["monthly"] = to_monthly6(tdf) if ohlcv_cols.issubset(tdf.columns) else []
+    if "returns" in facets:
+        out["returns"] = {
+            label: (_r(close.iloc[-1] / close.iloc[-1 - n] - 1, 5) if len(close) > n else None)
+            for label, n in RETURN_WINDOWS.items()
+        }
+    if "ohlcv" in facets:
+        bars = tdf.tail(OHLCV_BARS)
+        out["ohlcv"] = [
+            {"date": ts.strftime("%Y-%m-%d"), **{c.lower(): _r(row[c]) for c in ("Open", "High", "Low", "Close", "Volume") if c in bars.columns}}
+            for ts, row in bars.iterrows()
+        ]
+    return out
+
+
+def _load_market(symbols: list[str], facets: list[str], window_days: int, params: dict) -> dict:
+    tm = StepTimer("SNAPSHOT")
+    plan = plan_fetches(facets, window_days)
+    tm.start(f"symbols={len(symbols)} facets={facets} plan={plan}")
+    norm = {s: batch_normalize([s])[0] for s in symbols}
+    yf_symbols = list(dict.fromkeys(norm.values()))
+    hot_symbols.touch(yf_symbols)
+    bar_symbols = yf_symbols + ([BENCHMARK] if "returns" in facets and BENCHMARK not in yf_symbols else [])
+
+    jobs = {}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        if plan["daily_period"]:
+            jobs["daily"] = pool.submit(contextvars.copy_context().run, _download_daily, bar_symbols, plan["daily_period"])
+        if plan["fundamentals"]:
+            jobs["fundamentals"] = pool.submit(contextvars.copy_context().run, load_snapshots, yf_symbols, plan["fundamentals"])
+        frames = jobs["daily"].result() if "daily" in jobs else {}
+        snaps = jobs["fundamentals"].result() if "fundamentals" in jobs else {}
+    tm.step(f"fetched daily={len(frames)} fundamentals={len(snaps)}")
+
+    doc = {"facets": facets, "window_days": window_days, "symbols": {}}
+    for s in symbols:
+        nt = norm[s]
+        entry = {"raw_ticker": nt, **_bar_facets(frames.get(nt, pd.DataFrame()), facets, window_days)} if frames else {"raw_ticker": nt}
+        for facet, build in (("corporate_actions", corporate_actions_from_snapshot), ("analyst", analyst_from_snapshot)):
+            if facet in facets:
+                try:
+                    entry[facet] = build(s, snaps[nt])
+                except Exception as e:
+                    entry[facet] = {"error": str(e)}
+        doc["symbols"][s] = entry
+    if "returns" in facets:
+        doc["benchmark"] = {"symbol": BENCHMARK, **_bar_facets(frames.get(BENCHMARK, pd.DataFrame()), ["returns"], window_days)}
+
+    set_cached("snapshot", params, doc, quote_ttl(Config.CACHE_TTL_QUOTES))
+    tm.end("snapshot built")
+    return doc
+
+
+def _positions(doc: dict, holdings: list[dict]) -> dict:
+    total_value = total_cost = 0.0
+    positions = {}
+    for h in holdings:
+        qty = h.get("quantity")
+        last = ((doc["symbols"].get(h["symbol"]) or {}).get("quotes") or {}).get("close")
+        if qty is None or last is None:
+            continue
+        value = qty * last
+        pos = {"quantity": qty, "value": round(value, 2)}
+        if h.get("avg_price") is not None:
+            cost = qty * h["avg_price"]
+            pos.update({"cost": round(cost, 2), "pnl": round(value - cost, 2), "pnl_pct": round((value / cost - 1) * 100, 3) if cost else None})
+            total_cost += cost
+        total_value += value
+        positions[h["symbol"]] = pos
+    for pos in positions.values():
+        pos["weight"] = round(pos["value"] / total_value, 5) if total_value else None
+    totals = {"value": round(total_value, 2)}
+    if total_cost:
+        totals.update({"cost": round(total_cost, 2), "pnl": round(total_value - total_cost, 2), "pnl_pct": round((total_value / total_cost - 1) * 100, 3)})
+    return {"positions": positions, "totals": totals}
+
+
+def get_portfolio_snapshot(holdings: list, facets: list[str] | None = None, window_days: int = 252) -> dict:
+    parsed = parse_holdings(holdings)
+    if not parsed:
+        raise ValueError("holdings required")
+    facets = sorted(validate_facets(facets))
+    window_days = clamp_window_days(window_days)
+    symbols = list(dict.fromkeys(h["symbol"] for h in parsed))
+    params = {"tickers": ",".join(sorted(symbols)), "facets": ",".join(facets), "window": window_days}
+    doc = serve_cached("snapshot", params, lambda: _load_market(symbols, facets, window_days, params))
+    if any(h.get("quantity") is not None for h in parsed) and "quotes" in facets:
+        doc = {**doc, **_positions(doc, parsed)}
+    return doc
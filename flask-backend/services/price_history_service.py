@@ -0,0 +1,126 @@
+"""
+Aligned OHLCV price matrices for many symbols, for the analytics services.
+
+Bars are downloaded in one batch for the symbols not already cached and kept
+per (symbol, interval, period, adjusted) until the calendar TTL expires.
+get_price_history() aligns them on the union of bar timestamps into (T, N)
+NumPy arrays; a symbol without a bar at some timestamp gets NaN there.
+adjusted=False keeps Yahoo's unadjusted Close, for callers that apply
+dividends and splits themselves.
+"""
+import time
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from config import Config
+from utils.market_calendar import daily_ttl, quote_ttl
+from utils.metrics import record_cache
+from utils.resilience import guarded_download
+from utils.ticker_utils import fallback_ticker
+from utils.tracing import span
+
+DEFAULT_PERIODS = {"1d": "1y", "1wk": "5y", "15m": "1mo", "5m": "5d", "1m": "5d"}
+_history: dict[tuple, dict] = {}
+
+
+class PriceHistory:
+    __slots__ = ("symbols", "dates", "open", "high", "low", "close", "volume", "interval", "period")
+
+    def __init__(self, symbols, dates, open, high, low, close, volume, interval, period):
+        self.symbols = symbols
+        self.dates = dates
+        self.open, self.high, self.low, self.close, self.volume = open, high, low, close, volume
+        self.interval, self.period = interval, period
+
+    def __len__(self):
+        return len(self.dates)
+
+    def returns(self, log: bool = False) -> np.ndarray:
+        """(T-1, N) simple or log returns of Close; NaN where either bar is missing."""
+        c = self.close
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log(c[1:] / c[:-1]) if log else c[1:] / c[:-1] - 1.0
+
+    def column(self, symbol: str) -> int:
+        return self.symbols.index(symbol)
+
+
+def _extract(df, ticker) -> pd.DataFrame:
+    if df is None or df.empty or not isinstance(df.columns, pd.MultiIndex):
+        return pd.DataFrame()
+    if ticker not in df.columns.get_level_values(1):
+        return pd.DataFrame()
+    return df.xs(ticker, axis=1, level=1).dropna(how="all")
+
+
+def _download(symbols: list[str], interval: str, period: str, adjusted: bool = True) -> dict[str, pd.DataFrame]:
+    """Frames per symbol (empty for a symbol neither listing has bars for)."""
+    kwargs = dict(period=period, interval=interval, threads=True, auto_adjust=adjusted, progress=False)
+    with span("yfinance.download", kind="upstream", interval=interval, period=period):
+        df = guarded_download(yf.download, symbols, **kwargs)
+    frames = {s: _extract(df, s) for s in symbols}
+    alt = {s: fallback_ticker(s) for s, f in frames.items() if f.empty}
+    alt = {s: a for s, a in alt.items() if a}
+    if alt:
+        with span("yfinance.download", kind="upstream", interval=interval, period=period):
+            alt_df = guarded_download(yf.download, list(alt.values()), **kwargs)
+        for s, a in alt.items():
+            frames[s] = _extract(alt_df, a)
+    return frames
+
+
+def get_price_history(yf_symbols: list[str], interval: str = "1d", period: str | None = None, adjusted: bool = True) -> PriceHistory:
+    period = period or DEFAULT_PERIODS.get(interval, "1y")
+    symbols = list(dict.fromkeys(yf_symbols))
+    now = time.time()
+    frames, missing = {}, []
+    for s in symbols:
+        entry = _history.get((s, interval, period, adjusted))
+        if entry and now < entry["exp"]:
+            record_cache("price_history", True)
+            frames[s] = entry["df"]
+        else:
+            record_cache("price_history", False)
+            missing.append(s)
+
+    if missing:
+        ttl = daily_ttl(Config.CACHE_TTL_DAILY) if interval in ("1d", "1wk") else quote_ttl(Config.CACHE_TTL_QUOTES)
+        try:
+            fetched = _download(missing, interval, period, adjusted)
+        except Exception as e:
+            # Last-known-good bars rather than failing the whole analysis
+            fetched = {}
+            stale = {s: _history[(s, interval, period, adjusted)]["df"] for s in missing if (s, interval, period, adjusted) in _history}
+            if not stale and not frames:
+                raise
+            print(f"[HISTORY] download failed ({e}); using cached bars for {list(stale)}")
+            frames.update(stale)
+        for s, f in fetched.items():
+            key = (s, interval, period, adjusted)
+            if f.empty:
+                # No bars this time: keep the previous bars if any, and retry soon
+                prev = _history.get(key)
+                if prev is not None and not prev["df"].empty:
+                    prev["exp"] = now + min(ttl, Config.CACHE_TTL_EMPTY)
+                    frames[s] = prev["df"]
+                    continue
+                _history[key] = {"df": f, "ts": now, "exp": now + min(ttl, Config.CACHE_TTL_EMPTY)}
+            else:
+                _history[key] = {"df": f, "ts": now, "exp": now + ttl}
+            frames[s] = f
+
+    index = pd.DatetimeIndex([])
+    for f in frames.values():
+        if not f.empty:
+            index = index.union(f.index)
+    t, n = len(index), len(symbols)
+    cols = {c: np.full((t, n), np.nan) for c in ("Open", "High", "Low", "Close", "Volume")}
+    for j, s in enumerate(symbols):
+        f = frames.get(s)
+        if f is None or f.empty:
+            continue
+        f = f.reindex(index)
+        for c, arr in cols.items():
+            if c in f.columns:
+                arr[:, j] = f[c].to_numpy(dtype="float64")
+    return PriceHistory(symbols, index, cols["Open"], cols["High"], cols["Low"], cols["Close"], cols["Volume"], interval, period)
@@ -2,11 +2,113 @@ import pandas as pd
 import yfinance as yf
 import time
 from utils.ticker_utils import batch_normalize
+from utils.metrics import record_cache
+from utils.cache_utils import note_freshness
+from utils.tracing import span
+from utils.market_calendar import quote_ttl, daily_ttl
+from config import Config
+from utils.downsample import downsample_records
+from utils.validation import validate_max_points, validate_downsample_method
+from services.refresh_service import hot_symbols
+from utils.resilience import guarded_download, mark_stale, revalidate
 
 _price_cache = {}
-CACHE_TTL = 60  # seconds
+_monthly_cache = {}
+CACHE_TTL = 60  # seconds while the session is live; until the next open otherwise
 
-def get_detailed_pricemap(tickers):
+def to_monthly6(tdf: pd.DataFrame):
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    m = (
+        tdf.resample("ME")
+        .agg(agg)
+        .dropna(how="all")
+        .tail(6)
+    )
+    return (
+        m.assign(Month=lambda x: x.index.strftime("%Y-%m-%d"))
+         [["Month", "Open", "High", "Low", "Close", "Volume"]]
+         .reset_index(drop=True)
+         .to_dict(orient="records")
+    )
+
+def _fetch_prices(to_fetch: list[str]) -> dict:
+    """One batched 1mo daily download; updates _price_cache and returns {yf_symbol: ticker_data}."""
+    with span("yfinance.download", kind="upstream"):
+        df = guarded_download(yf.download, to_fetch, period="1mo", threads=True, auto_adjust=True, progress=False)
+
+    fetched_at = time.time()
+    expires_at = fetched_at + quote_ttl(CACHE_TTL)
+
+    close_df = df["Close"] if "Close" in df else df
+    if isinstance(close_df, pd.Series):
+        close_df = close_df.to_frame()
+
+    fetched = {}
+    # Prepare daily OHLCV and last price for each ticker
+    for yf_t in to_fetch:
+        if yf_t in close_df.columns:
+            series = close_df[yf_t].dropna()
+            last_price = float(series.iloc[-1]) if not series.empty else None
+        else:
+            last_price = None
+
+        if (
+            isinstance(df, pd.DataFrame)
+            and hasattr(df.columns, "levels")
+            and len(df.columns.levels) > 1
+            and yf_t in df.columns.levels[1]
+        ):
+            ticker_df = df.xs(yf_t, axis=1, level=1).dropna()
+        else:
+            ticker_df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+
+        ticker_data = {
+            "raw_ticker": yf_t,
+            "currency": "INR",
+            "last_price": last_price,
+            "ohlcv": ticker_df.reset_index().to_dict(orient="records"),
+        }
+
+        if ticker_data["ohlcv"] or yf_t not in _price_cache:
+            # A symbol without bars is only remembered briefly
+            exp = expires_at if ticker_data["ohlcv"] else min(expires_at, fetched_at + Config.CACHE_TTL_EMPTY)
+            _price_cache[yf_t] = {"data": ticker_data, "ts": fetched_at, "exp": exp}
+            fetched[yf_t] = ticker_data
+    return fetched
+
+def refresh_prices(yf_symbols: list[str]) -> dict:
+    """Re-download `yf_symbols` in one batch (used by the background refresher)."""
+    syms = list(dict.fromkeys(yf_symbols))
+    return _fetch_prices(syms) if syms else {}
+
+def cached_prices(yf_symbols: list[str]) -> dict:
+    """Fresh entries from the price cache, {yf_symbol: ticker_data}; no network."""
+    now = time.time()
+    out = {}
+    for sym in yf_symbols:
+        cached = _price_cache.get(sym)
+        if cached and now < cached["exp"]:
+            out[sym] = cached["data"]
+    return out
+
+def expiring_within(yf_symbols: list[str], seconds: float) -> list[str]:
+    """Symbols that are missing from the cache or expire in the next `seconds`."""
+    deadline = time.time() + seconds
+    return [s for s in yf_symbols if not (_price_cache.get(s) and _price_cache[s]["exp"] > deadline)]
+
+def get_detailed_pricemap(tickers, max_points: int | None = None, method: str = "lttb"):
+    result = _detailed_pricemap(tickers)
+    max_points = validate_max_points(max_points)
+    if not max_points or "error" in result:
+        return result
+    method = validate_downsample_method(method)
+    # Copies: the rows are the cached objects
+    return {
+        k: {**v, "ohlcv": downsample_records(v.get("ohlcv") or [], max_points, method)} if isinstance(v, dict) else v
+        for k, v in result.items()
+    }
+
+def _detailed_pricemap(tickers):
     unique = list(dict.fromkeys(tickers))
     yf_tickers = [batch_normalize([t])[0] for t in unique]
 
@@ -18,63 +120,56 @@ def get_detailed_pricemap(tickers):
     now = time.time()
     result = {}
     to_fetch = []
+    to_revalidate = []
 
-    # Check cache for requested tickers
+    # Check cache for requested tickers; recently expired entries are served
+    # stale and refreshed in the background
     for orig, yf_t in zip(unique, yf_tickers):
         cached = _price_cache.get(yf_t)
-        if cached and now - cached["ts"] < CACHE_TTL:
+        if cached and now < cached["exp"]:
+            record_cache("pricemap", True)
             result[orig.upper()] = cached["data"]
+        elif cached and now - cached["exp"] < Config.SWR_MAX_STALE:
+            record_cache("pricemap", False)
+            result[orig.upper()] = mark_stale(cached["data"], cached["ts"])
+            to_revalidate.append(yf_t)
         else:
+            record_cache("pricemap", False)
             to_fetch.append(yf_t)
 
     # Check cache for indices
     for idx in ["^NSEI", "^BSESN"]:
         cached = _price_cache.get(idx)
-        if not (cached and now - cached["ts"] < CACHE_TTL) and idx not in to_fetch:
+        if not (cached and now < cached["exp"]) and idx not in to_fetch:
             to_fetch.append(idx)
 
     to_fetch = list(dict.fromkeys(to_fetch))
+    hot_symbols.touch(yf_tickers)
+
+    if to_revalidate:
+        syms = list(dict.fromkeys(to_revalidate))
+        revalidate("pricemap:" + ",".join(sorted(syms)), lambda: refresh_prices(syms))
 
     if to_fetch:
         try:
-            df = yf.download(to_fetch, period="1mo", threads=True, auto_adjust=True, progress=False)
-
-            close_df = df["Close"] if "Close" in df else df
-            if isinstance(close_df, pd.Series):
-                close_df = close_df.to_frame()
-
-            # Prepare daily OHLCV and last price for each ticker
-            for yf_t in to_fetch:
-                if yf_t in close_df.columns:
-                    series = close_df[yf_t].dropna()
-                    last_price = float(series.iloc[-1]) if not series.empty else None
-                else:
-                    last_price = None
-
-                if (
-                    isinstance(df, pd.DataFrame)
-                    and hasattr(df.columns, "levels")
-                    and len(df.columns.levels) > 1
-                    and yf_t in df.columns.levels[1]
-                ):
-                    ticker_df = df.xs(yf_t, axis=1, level=1).dropna()
-                else:
-                    ticker_df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
-
-                ticker_data = {
-                    "raw_ticker": yf_t,
-                    "currency": "INR",
-                    "last_price": last_price,
-                    "ohlcv": ticker_df.reset_index().to_dict(orient="records"),
-                }
-
-                _price_cache[yf_t] = {"data": ticker_data, "ts": time.time()}
-                for orig, normalized in zip(unique, yf_tickers):
-                    if normalized == yf_t:
-                        result[orig.upper()] = ticker_data
-
+            fetched = _fetch_prices(to_fetch)
         except Exception as e:
-            return {"error": f"yfinance error: {str(e)}"}
+            # Last-known-good copies for whatever we have; fail only if nothing is left to show
+            fetched = {}
+            for orig, normalized in zip(unique, yf_tickers):
+                cached = _price_cache.get(normalized)
+                if normalized in to_fetch and cached and now - cached["ts"] < Config.LKG_MAX_AGE:
+                    result[orig.upper()] = mark_stale(cached["data"], cached["ts"])
+            if not result:
+                return {"error": f"yfinance error: {str(e)}"}
+            print(f"[PRICEMAP] yfinance error, serving last-known-good: {e}")
+        for orig, normalized in zip(unique, yf_tickers):
+            if normalized in fetched:
+                result[orig.upper()] = fetched[normalized]
+            elif normalized in to_fetch and orig.upper() not in result:
+                cached = _price_cache.get(normalized)
+                if cached and cached["data"]["ohlcv"]:
+                    result[orig.upper()] = mark_stale(cached["data"], cached["ts"])
 
     # Add default data for any missing tickers in result
     for orig in unique:
@@ -88,40 +183,57 @@ def get_detailed_pricemap(tickers):
             },
         )
 
-    # Fetch 6 months daily data for monthly OHLC aggregation including indices
+    # Monthly OHLC from 6 months of daily bars, including indices. Daily bars only
+    # change at the close, so each symbol's aggregation is cached until the next close.
     try:
         monthly_syms = list({v["raw_ticker"] for v in result.values()} | {"^NSEI", "^BSESN"})
-        daily6 = yf.download(monthly_syms, period="6mo", interval="1d", threads=True, auto_adjust=True, progress=False)
-
-        # Fix MultiIndex if needed
-        if isinstance(daily6, pd.DataFrame) and not isinstance(daily6.columns, pd.MultiIndex):
-            sym = monthly_syms[0]
-            daily6 = pd.concat({sym: daily6}, axis=1).swaplevel(axis=1)
-        daily6 = daily6.sort_index()
-
-        def to_monthly6(tdf: pd.DataFrame):
-            agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
-            m = (
-                tdf.resample("ME")
-                .agg(agg)
-                .dropna(how="all")
-                .tail(6)
-            )
-            return (
-                m.assign(Month=lambda x: x.index.strftime("%Y-%m-%d"))
-                 [["Month", "Open", "High", "Low", "Close", "Volume"]]
-                 .reset_index(drop=True)
-                 .to_dict(orient="records")
-            )
-
-        tickers_level = daily6.columns.levels[1] if isinstance(daily6.columns, pd.MultiIndex) else []
+        now = time.time()
+        monthly = {}
+        missing = []
+        stale_monthly = {}
         for sym in monthly_syms:
-            if isinstance(daily6.columns, pd.MultiIndex) and sym in tickers_level:
-                tdf = daily6.xs(sym, axis=1, level=1).dropna(how="all")
-                monthly_list = to_monthly6(tdf) if not tdf.empty and set(["Open", "High", "Low", "Close", "Volume"]).issubset(tdf.columns) else []
+            cached = _monthly_cache.get(sym)
+            if cached and now < cached["exp"]:
+                record_cache("pricemap_monthly", True)
+                monthly[sym] = cached["data"]
             else:
-                monthly_list = []
+                record_cache("pricemap_monthly", False)
+                missing.append(sym)
+                if cached:
+                    stale_monthly[sym] = cached["data"]
+
+        if missing:
+            try:
+                with span("yfinance.download", kind="upstream"):
+                    daily6 = guarded_download(yf.download, missing, period="6mo", interval="1d", threads=True, auto_adjust=True, progress=False)
+            except Exception as e:
+                print(f"[PRICEMAP] monthly OHLC unavailable, using last-known-good: {e}")
+                daily6 = None
 
+        if missing and daily6 is None:
+            for sym in missing:
+                monthly[sym] = stale_monthly.get(sym, [])
+        elif missing:
+            # Fix MultiIndex if needed
+            if isinstance(daily6, pd.DataFrame) and not isinstance(daily6.columns, pd.MultiIndex):
+                sym = missing[0]
+                daily6 = pd.concat({sym: daily6}, axis=1).swaplevel(axis=1)
+            daily6 = daily6.sort_index()
+
+            tickers_level = daily6.columns.levels[1] if isinstance(daily6.columns, pd.MultiIndex) else []
+            expires_at = time.time() + daily_ttl(Config.CACHE_TTL_DAILY)
+            for sym in missing:
+                if isinstance(daily6.columns, pd.MultiIndex) and sym in tickers_level:
+                    tdf = daily6.xs(sym, axis=1, level=1).dropna(how="all")
+                    monthly_list = to_monthly6(tdf) if not tdf.empty and set(["Open", "High", "Low", "Close", "Volume"]).issubset(tdf.columns) else []
+                else:
+                    monthly_list = []
+                monthly[sym] = monthly_list or stale_monthly.get(sym, [])
+                if monthly_list:
+                    _monthly_cache[sym] = {"data": monthly_list, "ts": now, "exp": expires_at}
+
+        for sym in monthly_syms:
+            monthly_list = monthly.get(sym, [])
             key = sym if sym.startswith("^") else sym.split(".")[0]
             key_upper = key.upper()
             if key_upper in result:
@@ -134,8 +246,16 @@ def get_detailed_pricemap(tickers):
                     "ohlcv": [],
                     "monthly_ohlc": monthly_list,
                 }
-    except Exception:
-        # Ignore monthly OHLC errors silently
-        pass
+    except Exception as e:
+        # Monthly OHLC is supplementary; never fail the pricemap over it
+        print(f"[PRICEMAP] monthly OHLC error: {e}")
+
+    # Versions for HTTP validators (see utils/http_cache.py)
+    for v in result.values():
+        sym = v.get("raw_ticker")
+        for cache in (_price_cache, _monthly_cache):
+            entry = cache.get(sym)
+            if entry:
+                note_freshness(entry["ts"], entry["exp"], stale=bool(v.get("stale")), key=sym)
 
     return result
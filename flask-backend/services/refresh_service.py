@@ -0,0 +1,114 @@
+import math
+import os
+import threading
+import time
+from config import Config
+from utils.market_calendar import in_live_window
+from utils.metrics import REGISTRY
+from utils.tracing import span
+
+REFRESHED = REGISTRY.counter("portfolio_refresher_symbols_total", "Symbols refreshed by the background price refresher")
+
+
+class HotSymbolTracker:
+    """Exponentially decayed request counts per Yahoo symbol."""
+
+    def __init__(self, half_life: float, max_symbols: int = 5000):
+        self.decay = math.log(2) / max(1.0, half_life)
+        self.max_symbols = max_symbols
+        self._scores: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, ts: float, now: float) -> float:
+        return score * math.exp(-self.decay * (now - ts))
+
+    def touch(self, symbols: list[str], weight: float = 1.0):
+        now = time.time()
+        with self._lock:
+            for sym in symbols:
+                score, ts = self._scores.get(sym, (0.0, now))
+                self._scores[sym] = (self._decayed(score, ts, now) + weight, now)
+            if len(self._scores) > self.max_symbols:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        ranked = sorted(self._scores.items(), key=lambda kv: -self._decayed(kv[1][0], kv[1][1], now))
+        self._scores = dict(ranked[: self.max_symbols // 2])
+
+    def top(self, n: int, min_score: float = 0.05) -> list[tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            scored = [(s, self._decayed(v, ts, now)) for s, (v, ts) in self._scores.items()]
+        scored = [x for x in scored if x[1] >= min_score]
+        scored.sort(key=lambda x: -x[1])
+        return scored[:n]
+
+
+hot_symbols = HotSymbolTracker(half_life=Config.REFRESH_HALF_LIFE)
+
+
+class PriceRefresher:
+    """Keeps the hottest symbols in the pricemap cache warm during the trading session.
+
+    Every tick it picks the top-N hot symbols whose cache entry expires within
+    REFRESH_LEAD_SECONDS and refreshes them in a single batched download.
+
+    The price cache is per process, so every gunicorn worker runs its own
+    refresher; REFRESH_BUDGET_PER_MIN is the budget for the whole deployment
+    and each of the N workers gets 1/N of it per rolling minute.
+    """
+
+    def __init__(self):
+        self.budget = Config.REFRESH_BUDGET_PER_MIN
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stop = threading.Event()
+        self._window: list[tuple[float, int]] = []  # (ts, symbols refreshed)
+
+    def _budget_left(self, now: float) -> int:
+        self._window = [(ts, n) for ts, n in self._window if now - ts < 60]
+        return max(0, self.budget - sum(n for _, n in self._window))
+
+    def tick(self) -> list[str]:
+        from services.pricemap_service import expiring_within, refresh_prices
+
+        if not in_live_window():
+            return []
+        hot = [s for s, _ in hot_symbols.top(Config.REFRESH_TOP_N)]
+        due = expiring_within(hot, Config.REFRESH_LEAD_SECONDS)
+        now = time.time()
+        budget = self._budget_left(now)
+        due = due[:budget]
+        if not due:
+            return []
+        with span("price_refresh", kind="background"):
+            refresh_prices(due)
+        self._window.append((now, len(due)))
+        REFRESHED.inc(len(due))
+        return due
+
+    def _run(self):
+        print(f"[REFRESHER] pid={os.getpid()} started top_n={Config.REFRESH_TOP_N} budget/min={self.budget}")
+        while not self._stop.wait(Config.REFRESH_TICK_SECONDS):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[REFRESHER] refresh failed: {e}")
+
+    def start(self, workers: int = 1):
+        """Start the loop once per process (safe to call from every gunicorn worker); `workers` share the budget."""
+        if not Config.REFRESH_ENABLED:
+            return
+        self.budget = max(1, Config.REFRESH_BUDGET_PER_MIN // max(1, workers))
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+refresher = PriceRefresher()
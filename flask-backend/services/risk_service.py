@@ -0,0 +1,202 @@
+"""
+Portfolio tail risk: historical, parametric and Monte Carlo VaR / CVaR.
+
+- Historical: overlapping `horizon`-day portfolio returns from the daily history
+- Parametric: horizon log return normal from the mean/covariance of daily log
+  returns, so the simple return is lognormal (closed-form VaR and expected shortfall)
+- Monte Carlo: correlated normal log-return draws via Cholesky of the
+  covariance, generated in chunks of RISK_MC_CHUNK paths to bound memory;
+  portfolios with at least RISK_PROCESS_MIN_ASSETS assets spread chunks over a
+  process pool
+
+VaR/CVaR are reported as positive loss fractions of portfolio value (and as
+amounts when quantities are known). Results are cached per (holdings hash,
+horizon, confidence, paths).
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from statistics import NormalDist
+import numpy as np
+from config import Config
+from utils.cache_utils import get_cached, set_cached
+from utils.logging_utils import StepTimer
+from utils.market_calendar import daily_ttl
+from utils.montecarlo import correlated_factor, portfolio_returns_chunk
+from utils.ticker_utils import batch_normalize
+from utils.validation import parse_holdings
+from services.price_history_service import get_price_history
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def resolve_weights(holdings: list[dict], last_prices: dict[str, float]) -> tuple[dict[str, float], float | None]:
+    """Weights by explicit weight, else by market value (quantity x last price), else equal.
+
+    Returns ({symbol: weight}, portfolio value or None). Symbols without a price are dropped.
+    """
+    priced = [h for h in holdings if last_prices.get(h["symbol"]) is not None]
+    if not priced:
+        return {}, None
+    if all(h.get("weight") is not None for h in priced):
+        raw = {h["symbol"]: h["weight"] for h in priced}
+        value = None
+    elif all(h.get("quantity") is not None for h in priced):
+        raw = {h["symbol"]: h["quantity"] * last_prices[h["symbol"]] for h in priced}
+        value = sum(raw.values())
+    else:
+        raw = {h["symbol"]: 1.0 for h in priced}
+        value = None
+    total = sum(raw.values())
+    if not total:
+        return {}, value
+    return {s: v / total for s, v in raw.items()}, value
+
+
+def holdings_history(holdings: list, period: str | None = None):
+    """Parsed holdings, aligned daily history with complete rows only, and {symbol: last price}."""
+    parsed = parse_holdings(holdings)
+    if not parsed:
+        raise ValueError("holdings required")
+    norm = {h["symbol"]: batch_normalize([h["symbol"]])[0] for h in parsed}
+    hist = get_price_history(list(norm.values()), "1d", period or Config.RISK_LOOKBACK)
+    last_prices = {}
+    for sym, nt in norm.items():
+        col = hist.close[:, hist.column(nt)]
+        valid = col[~np.isnan(col)]
+        last_prices[sym] = float(valid[-1]) if len(valid) else None
+    return parsed, norm, hist, last_prices
+
+
+def _aligned_log_returns(hist, cols: list[int]) -> np.ndarray:
+    close = hist.close[:, cols]
+    close = close[~np.isnan(close).any(axis=1)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(close), axis=0)
+
+
+def _var_cvar(pnl: np.ndarray, confidence: float) -> tuple[float, float]:
+    """Loss fractions (positive numbers) at `confidence` from a sample of returns."""
+    q = np.quantile(pnl, 1 - confidence)
+    tail = pnl[pnl <= q]
+    return float(-q), float(-tail.mean()) if len(tail) else float(-q)
+
+
+def _historical(port: np.ndarray, horizon: int, confidence: float) -> dict:
+    if len(port) < horizon + 20:
+        return {"error": "not enough history"}
+    csum = np.concatenate([[0.0], np.cumsum(port)])
+    h = np.expm1(csum[horizon:] - csum[:-horizon])  # overlapping horizon-day simple returns
+    var, cvar = _var_cvar(h, confidence)
+    return {"var": var, "cvar": cvar, "observations": len(h)}
+
+
+def _parametric(mu: np.ndarray, cov: np.ndarray, w: np.ndarray, horizon: int, confidence: float) -> dict:
+    m = float(w @ mu) * horizon
+    s = float(np.sqrt(max(w @ cov @ w, 0.0) * horizon))
+    nd = NormalDist()
+    z = nd.inv_cdf(1 - confidence)
+    # Simple-return losses, like _historical and _monte_carlo: the log-return quantile
+    # m + z*s maps to expm1(m + z*s), and E[e^L | L <= m + z*s] = e^(m + s^2/2) * cdf(z - s) / (1 - c)
+    var = -float(np.expm1(m + z * s))
+    cvar = 1.0 - float(np.exp(m + s * s / 2)) * nd.cdf(z - s) / (1 - confidence)
+    return {"var": var, "cvar": cvar, "mean": m, "stdev": s}  # mean/stdev of the horizon log return
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: worker processes must not inherit the threads of a gunicorn worker
+            _pool = ProcessPoolExecutor(max_workers=Config.RISK_PROCESS_WORKERS, mp_context=get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _monte_carlo(mu: np.ndarray, cov: np.ndarray, w: np.ndarray, horizon: int, confidence: float, paths: int, seed: int | None) -> dict:
+    k = len(mu)
+    chol = correlated_factor(cov)
+    chunk = max(1000, Config.RISK_MC_CHUNK)
+    sizes = [min(chunk, paths - i) for i in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if k >= Config.RISK_PROCESS_MIN_ASSETS and len(sizes) > 1:
+        pool = _process_pool()
+        futures = [pool.submit(portfolio_returns_chunk, chol, mu, w, horizon, n, s) for n, s in zip(sizes, seeds)]
+        pnl = np.concatenate([f.result() for f in futures])
+        mode = "process_pool"
+    else:
+        pnl = np.concatenate([portfolio_returns_chunk(chol, mu, w, horizon, n, s) for n, s in zip(sizes, seeds)])
+        mode = "in_process"
+    var, cvar = _var_cvar(pnl, confidence)
+    return {"var": var, "cvar": cvar, "paths": paths, "chunks": len(sizes), "mode": mode}
+
+
+def holdings_key(weights: dict[str, float], value: float | None) -> str:
+    s = ";".join(f"{k}:{v:.6f}" for k, v in sorted(weights.items())) + f"|{value or 0:.2f}"
+    return hashlib.sha1(s.encode()).hexdigest()[:16]
+
+
+def get_portfolio_var(holdings: list, horizon_days: int = 1, confidence: float = 0.95,
+                      paths: int | None = None, seed: int | None = None) -> dict:
+    horizon = max(1, min(60, int(horizon_days or 1)))
+    confidence = float(confidence or 0.95)
+    if not 0.5 < confidence < 1:
+        raise ValueError("confidence must be between 0.5 and 1")
+    paths = max(1000, min(Config.RISK_MC_MAX_PATHS, int(paths or Config.RISK_MC_PATHS)))
+
+    tm = StepTimer("RISK_VAR")
+    tm.start(f"holdings={len(holdings)} horizon={horizon} confidence={confidence} paths={paths}")
+    parsed, norm, hist, last_prices = holdings_history(holdings)
+    weights, value = resolve_weights(parsed, last_prices)
+    if not weights:
+        raise ValueError("no price history for any holding")
+
+    params = {"h": holdings_key(weights, value), "horizon": horizon, "confidence": confidence, "paths": paths, "seed": seed}
+    cached = get_cached("risk_var", params)
+    if cached:
+        tm.end("cache hit")
+        return cached
+
+    symbols = list(weights)
+    cols = [hist.column(norm[s]) for s in symbols]
+    rets = _aligned_log_returns(hist, cols)
+    if len(rets) < 30:
+        raise ValueError("not enough overlapping history (need 30+ days)")
+    w = np.array([weights[s] for s in symbols])
+    mu = rets.mean(axis=0)
+    cov = np.cov(rets, rowvar=False).reshape(len(symbols), len(symbols))
+    port = np.log1p(np.expm1(rets) @ w)
+    tm.step(f"returns matrix {rets.shape}")
+
+    methods = {
+        "historical": _historical(port, horizon, confidence),
+        "parametric": _parametric(mu, cov, w, horizon, confidence),
+        "monte_carlo": _monte_carlo(mu, cov, w, horizon, confidence, paths, seed),
+    }
+    tm.step("simulation done")
+    for m in methods.values():
+        for k in ("var", "cvar", "mean", "stdev"):
+            if k in m:
+                m[k] = round(m[k], 6)
+        if value and "var" in m:
+            m["var_amount"] = round(m["var"] * value, 2)
+            m["cvar_amount"] = round(m["cvar"] * value, 2)
+
+    out = {
+        "as_of": str(hist.dates[-1].date()),
+        "horizon_days": horizon,
+        "confidence": confidence,
+        "lookback_days": len(rets),
+        "portfolio_value": round(value, 2) if value else None,
+        "volatility_annual": round(float(np.sqrt(max(w @ cov @ w, 0.0) * 252)), 6),
+        "weights": {s: round(v, 6) for s, v in weights.items()},
+        "missing": [h["symbol"] for h in parsed if h["symbol"] not in weights],
+        "methods": methods,
+    }
+    set_cached("risk_var", params, out, daily_ttl(Config.CACHE_TTL_DAILY))
+    tm.end()
+    return out
@@ -2,6 +2,9 @@ import requests
 from enum import Enum
 from datetime import datetime
 from config import Config
+from utils.cache_utils import set_cached
+from utils.resilience import guarded, serve_cached
+from utils.tracing import span
 
 class PeriodType(str, Enum):
     ANNUAL = "Annual"
@@ -32,9 +35,21 @@ def get_stock_forecasts(stock_id: str, measure_code: str, period_type: str, data
     url = f"{Config.INDIANAPI_BASE}/stock_forecasts"
     headers = {"X-Api-Key": Config.INDIANAPI_KEY}
     params = {"stock_id": stock_id, "measure_code": measure_code, "period_type": period_type, "data_type": data_type, "age": age}
+    return serve_cached("forecasts", params, lambda: _load_forecasts(url, headers, params))
+
+def _fetch(url: str, headers: dict, params: dict):
     r = requests.get(url, headers=headers, params=params, timeout=20)
+    if r.status_code != 404:
+        r.raise_for_status()
+    return r
+
+def _load_forecasts(url: str, headers: dict, params: dict) -> dict:
+    with span("indianapi.stock_forecasts", kind="upstream"):
+        r = guarded("indianapi", _fetch, url, headers, params)
     if r.status_code == 404:
-        return {"status": 404, "message": "No forecasts found"}
-    r.raise_for_status()
-    data = r.json()
-    return {"query": params, "data": data.get("data", data), "meta": {"source":"stock.indianapi.in", "retrieved_at": datetime.utcnow().isoformat()+"Z"}}
+        out = {"status": 404, "message": "No forecasts found"}
+    else:
+        data = r.json()
+        out = {"query": params, "data": data.get("data", data), "meta": {"source":"stock.indianapi.in", "retrieved_at": datetime.utcnow().isoformat()+"Z"}}
+    set_cached("forecasts", params, out, Config.CACHE_TTL_FORECASTS)
+    return out
@@ -1,6 +1,8 @@
 import requests
 from config import Config
-from utils.cache_utils import get_cached, set_cached
+from utils.cache_utils import set_cached
+from utils.resilience import guarded, serve_cached
+from utils.tracing import span
 
 def _strip_nulls(obj):
     if isinstance(obj, dict):
@@ -9,15 +11,21 @@ def _strip_nulls(obj):
         return [_strip_nulls(x) for x in obj if x not in [None, '', [], {}]]
     return obj
 
+def _get_ok(url: str, **kwargs):
+    # HTTP errors and timeouts count against the breaker; the caller still sees the exception
+    r = requests.get(url, **kwargs)
+    r.raise_for_status()
+    return r
+
 def get_trending(exchange: str = "NSE", limit: int = 3) -> dict:
     params = {"exchange": exchange, "limit": limit}
-    cached = get_cached("trending", params, 300)
-    if cached:
-        return cached
+    return serve_cached("trending", params, lambda: _load_trending(limit, params))
+
+def _load_trending(limit: int, params: dict) -> dict:
     url = f"{Config.INDIANAPI_BASE}/trending"
     headers = {"X-Api-Key": Config.INDIANAPI_KEY}
-    r = requests.get(url, headers=headers, timeout=15)
-    r.raise_for_status()
+    with span("indianapi.trending", kind="upstream"):
+        r = guarded("indianapi", _get_ok, url, headers=headers, timeout=15)
     data = r.json()
     if "trending_stocks" in data:
         data["trending_stocks"]["top_gainers"] = data["trending_stocks"].get("top_gainers", [])[:limit]
@@ -0,0 +1,175 @@
+"""
+Production serving helpers shared by gunicorn.conf.py and create_app().
+
+- worker class / worker count resolution
+- modules to import in the gunicorn master so forked workers share them (copy-on-write)
+- timeouts for the long-running routes (chat, ingest)
+- warmup hook run in each worker before it accepts traffic
+- per-worker background jobs (price refresher)
+"""
+import contextvars
+import os
+import threading
+import time
+from functools import wraps
+from flask import jsonify, copy_current_request_context
+from config import Config
+
+# gevent/eventlet are not offered: they are not dependencies, and preload
+# imports ssl/requests in the master before they could monkey-patch them.
+WORKER_CLASSES = {
+    "threaded": "gthread",
+    "gthread": "gthread",
+    "sync": "sync",
+}
+
+# Heavy imports pulled into the master when preload_app is on, so each forked
+# worker shares the pages instead of re-importing them.
+PRELOAD_MODULES = [
+    "pandas",
+    "numpy",
+    "yfinance",
+    "langgraph.graph",
+    "langchain_google_genai",
+    "langchain_community.vectorstores",
+    "pinecone",
+]
+
+# URL prefix -> timeout in seconds; the longest matching prefix wins. Only these
+# routes are wrapped: the wrapper costs a thread per request.
+ROUTE_TIMEOUTS = {
+    "/chat": Config.ROUTE_TIMEOUT_CHAT,
+    "/rag/query": Config.ROUTE_TIMEOUT_CHAT,
+    "/rag/agent": Config.ROUTE_TIMEOUT_CHAT,
+    "/rag/debug": Config.ROUTE_TIMEOUT_CHAT,
+    "/rag/ingest": Config.ROUTE_TIMEOUT_INGEST,
+}
+
+
+def worker_class() -> str:
+    if Config.WORKER_CLASS not in WORKER_CLASSES:
+        print(f"[SERVING] unsupported WORKER_CLASS={Config.WORKER_CLASS}; using gthread")
+    return WORKER_CLASSES.get(Config.WORKER_CLASS, "gthread")
+
+
+def worker_count() -> int:
+    if Config.WEB_CONCURRENCY > 0:
+        return Config.WEB_CONCURRENCY
+    cpus = os.cpu_count() or 1
+    return max(2, min(2 * cpus + 1, Config.MAX_WORKERS))
+
+
+def preload_heavy_modules():
+    import importlib
+    t0 = time.time()
+    loaded = []
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            print(f"[SERVING] preload skipped {name}: {e}")
+    print(f"[SERVING] preloaded {len(loaded)} modules in {(time.time() - t0) * 1000:.0f} ms")
+
+
+def route_timeout(rule: str) -> int | None:
+    best, timeout = "", None
+    for prefix, t in ROUTE_TIMEOUTS.items():
+        if rule.startswith(prefix) and len(prefix) > len(best):
+            best, timeout = prefix, t
+    return timeout
+
+
+def _with_timeout(view, seconds: int, rule: str):
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        result = {}
+        done = threading.Event()
+
+        @copy_current_request_context
+        def run():
+            try:
+                result["value"] = view(*args, **kwargs)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        # Carry contextvars (trace id) into the handler thread
+        ctx = contextvars.copy_context()
+        threading.Thread(target=ctx.run, args=(run,), daemon=True).start()
+        if not done.wait(seconds):
+            # The handler thread cannot be killed; it finishes in the background and its result is dropped.
+            print(f"[SERVING] {rule} exceeded {seconds}s timeout")
+            return jsonify({"error": f"request timed out after {seconds}s"}), 504
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+    return wrapped
+
+
+def apply_route_timeouts(app):
+    """Wrap the chat and ingest views so a client gets a 504 after the route's budget.
+
+    The handler thread cannot be stopped: after a 504 it keeps running (and holding
+    its upstream calls) until it finishes, so this bounds client latency, not server work.
+    """
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static" or rule.endpoint not in app.view_functions:
+            continue
+        seconds = route_timeout(rule.rule)
+        if seconds is None:
+            continue
+        view = app.view_functions[rule.endpoint]
+        if getattr(view, "_route_timeout", None) is not None:
+            continue
+        wrapped = _with_timeout(view, seconds, rule.rule)
+        wrapped._route_timeout = seconds
+        app.view_functions[rule.endpoint] = wrapped
+
+
+def max_route_timeout() -> int:
+    return max([Config.ROUTE_TIMEOUT_DEFAULT, *ROUTE_TIMEOUTS.values()])
+
+
+def warmup():
+    """Build the agent and retriever and prime hot tickers before the worker takes traffic."""
+    if not Config.WARMUP_ENABLED:
+        return
+    t0 = time.time()
+    print(f"[WARMUP] pid={os.getpid()} starting")
+
+    try:
+        from routes.langgraph_routes import ensure_langgraph_agent
+        ensure_langgraph_agent()
+        print("[WARMUP] agent ready")
+    except Exception as e:
+        print(f"[WARMUP] agent failed: {e}")
+
+    try:
+        from rag.retriever import get_retriever
+        get_retriever()
+        print("[WARMUP] retriever ready")
+    except Exception as e:
+        print(f"[WARMUP] retriever failed: {e}")
+
+    if Config.WARMUP_TICKERS:
+        try:
+            from services.pricemap_service import get_detailed_pricemap
+            get_detailed_pricemap(Config.WARMUP_TICKERS)
+            print(f"[WARMUP] primed {len(Config.WARMUP_TICKERS)} tickers")
+        except Exception as e:
+            print(f"[WARMUP] ticker priming failed: {e}")
+
+    print(f"[WARMUP] pid={os.getpid()} done in {(time.time() - t0) * 1000:.0f} ms")
+
+
+def start_background_jobs(workers: int = 1):
+    """Per-worker background threads; must run after fork (threads do not survive it).
+
+    `workers` is the number of processes running them, which split the refresh budget.
+    """
+    from services.refresh_service import refresher
+    from services.events_service import event_refresher
+    refresher.start(workers)
+    event_refresher.start()
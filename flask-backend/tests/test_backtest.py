@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backtest import metrics, segments, simulate, total_returns
+
+
+def reference(returns: np.ndarray, w: np.ndarray, seg: np.ndarray, cost_bps: float) -> np.ndarray:
+    """Day-by-day holdings, rebalanced (and charged on turnover) at each segment start."""
+    hold, out = w.copy(), []
+    for t, r in enumerate(returns):
+        if t and seg[t] != seg[t - 1]:
+            value = hold.sum()
+            value *= 1 - np.abs(w - hold / value).sum() * cost_bps / 1e4
+            hold = w * value
+        hold = hold * (1 + r)
+        out.append(hold.sum())
+    return np.array(out)
+
+
+def test_constant_returns_compound_under_any_schedule():
+    dates = pd.bdate_range("2024-01-01", periods=300)
+    returns = np.full((300, 3), 0.001)
+    w = np.array([[0.2, 0.3, 0.5], [1.0, 0.0, 0.0]])
+    want = 1.001 ** np.arange(1, 301)
+    for schedule in ("buy_and_hold", "monthly", "quarterly", "annual"):
+        v = simulate(returns, w, segments(dates, schedule), cost_bps=25)
+        # Weights never drift, so rebalancing costs nothing
+        np.testing.assert_allclose(v, np.column_stack([want, want]), rtol=1e-12)
+
+
+def test_segment_chaining_and_turnover_cost_match_a_daily_loop():
+    dates = pd.bdate_range("2023-01-02", periods=400)
+    returns = np.random.default_rng(3).normal(0.0004, 0.015, (400, 4))
+    w = np.array([[0.25, 0.25, 0.25, 0.25], [0.7, 0.1, 0.1, 0.1]])
+    seg = segments(dates, "monthly")
+    v = simulate(returns, w, seg, cost_bps=30)
+    for k in range(len(w)):
+        np.testing.assert_allclose(v[:, k], reference(returns, w[k], seg, 30), rtol=1e-10)
+
+
+def test_drawdown_dates_and_total_return():
+    dates = pd.bdate_range("2024-01-01", periods=6)  # start + 5 days
+    values = np.array([[1.1], [1.2], [0.9], [1.0], [1.3]])
+    m = metrics(values, dates, None)
+    assert m["max_drawdown"][0] == pytest.approx(0.9 / 1.2 - 1)
+    assert m["max_drawdown_peak"][0] == str(dates[2].date())
+    assert m["max_drawdown_trough"][0] == str(dates[3].date())
+    assert m["total_return"][0] == pytest.approx(0.3)
+
+
+def test_total_returns_add_dividends_and_apply_unadjusted_splits():
+    close = np.array([[100.0], [102.0], [51.0]])
+    dividends = np.array([[0.0], [1.0], [0.0]])
+    splits = np.array([[1.0], [1.0], [2.0]])  # 2:1 split: the close halves
+    r = total_returns(close, dividends, splits)
+    assert np.isnan(r[0, 0])
+    assert r[1, 0] == pytest.approx(0.03)
+    assert r[2, 0] == pytest.approx(0.0)
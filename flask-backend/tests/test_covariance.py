@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from utils.covariance import RollingCovariance
+
+
+def test_rank1_add_and_remove_match_np_cov():
+    rows = np.random.default_rng(0).normal(0, 0.01, (83, 5))
+    rc = RollingCovariance(list("ABCDE"), window=50)
+    for t, r in enumerate(rows):
+        rc.push(t, r)  # 50 adds, a rebuild, then 33 add/remove pairs
+    np.testing.assert_allclose(rc.covariance(), np.cov(rows[-50:], rowvar=False), rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(rc.correlation(), np.corrcoef(rows[-50:], rowvar=False), atol=1e-9)
+    assert rc.dates == list(range(33, 83))
+
+
+def test_missing_returns_use_pairwise_complete_rows():
+    rng = np.random.default_rng(1)
+    rows = rng.normal(0, 0.01, (70, 3))
+    rows[rng.random(rows.shape) < 0.2] = np.nan
+    rc = RollingCovariance(["A", "B", "C"], window=60)
+    rc.extend(list(range(65)), rows[:65])  # batch rebuild from the ring
+    for t in range(65, 70):
+        rc.push(t, rows[t])
+    want = pd.DataFrame(rows[-60:]).cov(min_periods=20).to_numpy()
+    np.testing.assert_allclose(rc.covariance(), want, rtol=1e-9, atol=1e-15)
+    assert (rc.counts() == (~np.isnan(rows[-60:])).astype(float).T @ (~np.isnan(rows[-60:]))).all()
@@ -0,0 +1,56 @@
+import gzip
+import time
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from config import Config
+from utils.cache_utils import note_freshness
+from utils.http_cache import install_http_cache
+
+
+@pytest.fixture
+def client():
+    bp = flask.Blueprint("market", __name__)
+    fetched = time.time() - 5  # one cache entry, shared by every request
+
+
+    @bp.route("/quotes", methods=["GET", "POST"])
+    def quotes():
+        note_freshness(fetched, fetched + 65, key="quotes:RELIANCE")
+        return flask.jsonify({"RELIANCE": {"close": 2900.5}, "pad": "x" * 2000})
+
+    @bp.route("/plain")
+    def plain():
+        return flask.jsonify({"ok": True})
+
+    app = flask.Flask(__name__)
+    app.register_blueprint(install_http_cache(bp))
+    return app.test_client()
+
+
+def test_matching_if_none_match_is_304(client):
+    first = client.get("/quotes")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    again = client.get("/quotes", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert client.get("/quotes", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+
+def test_post_body_is_part_of_the_validator(client):
+    a = client.post("/quotes", json={"tickers": ["RELIANCE"]}).headers["ETag"]
+    assert client.post("/quotes", json={"tickers": ["RELIANCE"]}, headers={"If-None-Match": a}).status_code == 304
+    assert client.post("/quotes", json={"tickers": ["TCS"]}, headers={"If-None-Match": a}).status_code == 200
+
+
+def test_cache_control_and_compression(client, monkeypatch):
+    monkeypatch.setattr(Config, "HTTP_COMPRESS_MIN_BYTES", 1024)
+    r = client.get("/quotes", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert b"RELIANCE" in gzip.decompress(r.data)
+    assert 0 < int(r.headers["Cache-Control"].split("max-age=")[1]) <= 60
+    # No cache entry involved: body-hash validator, revalidate every time
+    plain = client.get("/plain")
+    assert plain.headers["Cache-Control"] == "private, no-cache"
+    assert client.get("/plain", headers={"If-None-Match": plain.headers["ETag"]}).status_code == 304
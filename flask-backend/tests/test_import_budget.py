@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("flask")
+
+
+def test_create_app_within_import_budget():
+    """Cold-start gate: create_app() under the import budget, lazy subsystems not imported."""
+    proc = subprocess.run(
+        [sys.executable, os.path.join("scripts", "importtime.py"), "--check"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stdout[-4000:] + proc.stderr[-4000:]
+    assert "OK:" in proc.stdout
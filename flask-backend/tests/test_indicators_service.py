@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from services import indicators_service
+from services.price_history_service import PriceHistory
+
+
+def history(close: np.ndarray) -> PriceHistory:
+    dates = pd.bdate_range(start="2025-06-02", periods=len(close))
+    c = close.reshape(-1, 1)
+    return PriceHistory(["AAA.NS"], dates, c, c * 1.01, c * 0.99, c, np.full_like(c, 1e5), "1d", "1y")
+
+
+@pytest.fixture(autouse=True)
+def no_engines():
+    indicators_service._engines.clear()
+    yield
+    indicators_service._engines.clear()
+
+
+def test_adjusted_history_rebuilds_engine(monkeypatch):
+    close = 100 + np.cumsum(np.sin(np.arange(300) / 7.0))
+    monkeypatch.setattr(indicators_service, "get_price_history", lambda symbols, interval: history(close))
+    indicators_service.get_indicators(["AAA"])
+    # A dividend re-adjusts every past close; the next bar arrives on the new scale
+    adjusted = np.append(close * 0.97, close[-1] * 0.97 + 1)
+    monkeypatch.setattr(indicators_service, "get_price_history", lambda symbols, interval: history(adjusted))
+    got = indicators_service.get_indicators(["AAA"])["AAA"]
+    indicators_service._engines.clear()
+    want = indicators_service.get_indicators(["AAA"])["AAA"]
+    assert got["ema_20"] == want["ema_20"] and got["rsi_14"] == want["rsi_14"] and got["macd"] == want["macd"]
+
+
+def test_unchanged_history_steps_incrementally(monkeypatch):
+    close = 100 + np.cumsum(np.cos(np.arange(300) / 5.0))
+    monkeypatch.setattr(indicators_service, "get_price_history", lambda symbols, interval: history(close[:-1]))
+    indicators_service.get_indicators(["AAA"])
+    engine = next(iter(indicators_service._engines.values()))
+    monkeypatch.setattr(indicators_service, "get_price_history", lambda symbols, interval: history(close))
+    indicators_service.get_indicators(["AAA"])
+    assert next(iter(indicators_service._engines.values())) is engine and len(engine.dates) == len(close) - 1
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from utils import irr
+
+
+def test_single_cashflow_rates_in_one_batch():
+    amounts = np.array([[-100.0, 121.0], [-100.0, 81.0], [-50.0, 50.0], [100.0, 10.0]])
+    rates = irr.xirr(amounts, np.array([0.0, 2.0]))
+    np.testing.assert_allclose(rates[:3], [0.1, -0.1, 0.0], atol=1e-9)
+    assert np.isnan(rates[3])  # no outflow: undefined
+
+
+def test_bisection_recovers_when_newton_cannot(monkeypatch):
+    # From a 10000% guess the discount factors underflow and Newton never settles
+    amounts = np.array([[-1.0] + [0.0] * 9 + [3.0]])
+    years = np.arange(11.0)
+    calls = []
+    npv = irr._npv
+    monkeypatch.setattr(irr, "_npv", lambda *a: calls.append(1) or npv(*a))
+    rate = irr.xirr(amounts, years, guess=irr.HIGH)
+    assert len(calls) > 1  # went through the bisection loop
+    assert rate[0] == pytest.approx(3 ** 0.1 - 1, abs=1e-9)
+
+
+def test_no_root_in_bracket_is_nan():
+    # 1 -> 1e6 in one day is beyond the +10000% annual upper bound
+    assert np.isnan(irr.xirr(np.array([-1.0, 1e6]), np.array([0.0, 1 / 365]))[0])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from utils.optimizer import QPSolver, ledoit_wolf, risk_parity
+
+
+def test_ledoit_wolf_matches_the_per_row_formula():
+    x = np.random.default_rng(0).normal(0, 0.01, (40, 8)) @ np.diag(np.linspace(0.5, 2, 8))
+    t, n = x.shape
+    xc = x - x.mean(axis=0)
+    s = xc.T @ xc / t
+    mu = np.trace(s) / n
+    d2 = np.sum((s - mu * np.eye(n)) ** 2) / n
+    b2 = sum(np.sum((np.outer(r, r) - s) ** 2) for r in xc) / t ** 2 / n
+    want = min(b2, d2) / d2
+    cov, shrink = ledoit_wolf(x)
+    assert shrink == pytest.approx(want, rel=1e-9)
+    np.testing.assert_allclose(cov, want * mu * np.eye(n) + (1 - want) * s * t / (t - 1), rtol=1e-9)
+
+
+def test_ledoit_wolf_is_positive_definite_with_fewer_rows_than_assets():
+    cov, shrink = ledoit_wolf(np.random.default_rng(1).normal(0, 0.01, (10, 30)))
+    assert 0 < shrink <= 1 and np.linalg.eigvalsh(cov).min() > 0
+
+
+def _budget(n: int, lo: float = 0.0, hi: float = 1.0):
+    a = np.vstack([np.ones((1, n)), np.eye(n)])
+    return a, np.r_[1.0, np.full(n, lo)], np.r_[1.0, np.full(n, hi)]
+
+
+def test_qp_min_variance_matches_closed_form():
+    rng = np.random.default_rng(2)
+    f = rng.normal(size=(5, 5))
+    p = f @ f.T / 5 + np.diag(np.linspace(1, 2, 5))
+    a, l, u = _budget(5, lo=-10.0, hi=10.0)  # bounds inactive: only sum(w) = 1 binds
+    w, _ = QPSolver(p, a, l, u).solve(np.zeros(5))
+    want = np.linalg.solve(p, np.ones(5))
+    np.testing.assert_allclose(w, want / want.sum(), atol=1e-5)
+
+
+def test_qp_bounds_bind_and_warm_start_resolves():
+    p = np.diag([1.0, 2.0, 4.0])
+    a, l, u = _budget(3, hi=0.5)
+    solver = QPSolver(p, a, l, u)
+    w, _ = solver.solve(np.zeros(3))
+    want = 1 / np.diag(p)
+    np.testing.assert_allclose(w, [0.5, 1 / 3, 1 / 6], atol=1e-5)  # 4/7 on the first name is capped at 0.5
+    assert want[0] / want.sum() > 0.5
+    # A strong preference for the third name caps it; the rest splits by inverse variance
+    w, _ = solver.solve(np.array([0.0, 0.0, -10.0]))
+    np.testing.assert_allclose(w, [1 / 3, 1 / 6, 0.5], atol=1e-5)
+
+
+def test_risk_parity_contributions_are_equal():
+    cov = np.array([[0.04, 0.006, 0.0], [0.006, 0.09, 0.01], [0.0, 0.01, 0.01]])
+    w = risk_parity(cov)
+    rc = w * (cov @ w)
+    np.testing.assert_allclose(rc / rc.sum(), np.full(3, 1 / 3), atol=1e-8)
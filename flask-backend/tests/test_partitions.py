@@ -0,0 +1,33 @@
+import pytest
+from config import Config
+from rag import partitions
+
+
+class StatsIndex:
+    def __init__(self, counts):
+        self.counts = counts
+
+    def describe_index_stats(self):
+        return {"namespaces": {ns: {"vector_count": n} for ns, n in self.counts.items()}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_container(tmp_path, monkeypatch):
+    """No partitions.json on disk, as in a new container."""
+    monkeypatch.setattr(Config, "RAG_PARTITIONS_PATH", str(tmp_path / "partitions.json"))
+    monkeypatch.setattr(Config, "RAG_PARTITIONS_ENABLED", True)
+    partitions.forget_namespaces()
+    yield
+    partitions.forget_namespaces()
+
+
+def test_legacy_index_searches_default_namespace():
+    assert partitions.route("what is value investing", index=StatsIndex({"": 900})) == (None, {})
+
+
+def test_default_namespace_searched_alongside_partitions():
+    index = StatsIndex({"": 900, "market_reports": 40})
+    namespaces, filters = partitions.route("market reports on banks", index=index)
+    assert namespaces == ["market_reports", ""] and filters == {}
+    namespaces, filters = partitions.route("x", category="investment_principles", index=index)
+    assert "" in namespaces and filters == {"category": ["investment_principles"]}
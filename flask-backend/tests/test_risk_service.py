@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("yfinance")
+
+from services import risk_service
+
+
+def test_parametric_is_on_the_simple_return_scale():
+    mu, cov, w = np.array([0.0004]), np.array([[0.02 ** 2]]), np.array([1.0])
+    got = risk_service._parametric(mu, cov, w, horizon=10, confidence=0.95)
+    logs = np.random.default_rng(0).normal(got["mean"], got["stdev"], 2_000_000)
+    var, cvar = risk_service._var_cvar(np.expm1(logs), 0.95)
+    assert got["var"] == pytest.approx(var, rel=5e-3)
+    assert got["cvar"] == pytest.approx(cvar, rel=5e-3)
+    # The old log-scale figure overstated the loss
+    assert got["var"] < -(got["mean"] - 1.6448536 * got["stdev"])
@@ -0,0 +1,26 @@
+from utils.symbol_index import SymbolIndex
+
+ROWS = [
+    {"symbol": "RELIANCE", "name": "Reliance Industries Ltd", "sector": "Energy", "exchanges": "NS|BO"},
+    {"symbol": "TATAMOTORS", "name": "Tata Motors Ltd", "sector": "Automobile", "exchanges": "NS|BO"},
+    {"symbol": "HDFCBANK", "name": "HDFC Bank Ltd", "sector": "Financial Services", "exchanges": "NS|BO"},
+    {"symbol": "BAJAJFINSV", "name": "Bajaj Finserv Ltd", "sector": "Financial Services", "exchanges": "NS"},
+    {"symbol": "500325", "name": "Reliance Industrial Infrastructure Ltd", "sector": "Energy", "exchanges": "BO"},
+]
+
+
+def test_exact_symbol_and_prefix():
+    index = SymbolIndex(ROWS)
+    assert index.search("reliance")[0]["symbol"] == "RELIANCE"
+    assert index.search("tata")[0]["symbol"] == "TATAMOTORS"
+
+
+def test_transposition_typo_falls_back_to_trigrams():
+    index = SymbolIndex(ROWS)
+    assert index.search("relaince")[0]["symbol"] == "RELIANCE"
+    assert index.search("tata motros")[0]["symbol"] == "TATAMOTORS"
+    assert index.search("bajaj finsrev")[0]["symbol"] == "BAJAJFINSV"
+
+
+def test_unrelated_query_finds_nothing():
+    assert SymbolIndex(ROWS).search("zzqx") == []
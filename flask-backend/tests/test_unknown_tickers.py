@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from config import Config
+from utils import resilience
+from utils.cache_utils import clear_cache
+from services import market_data_service
+
+
+def fake_download(symbols, **kwargs):
+    """Bars for every symbol except unknown ZZ* tickers; empty frame if none are known."""
+    syms = [s for s in ([symbols] if isinstance(symbols, str) else symbols) if not s.startswith("ZZ")]
+    if not syms:
+        return pd.DataFrame()
+    idx = pd.bdate_range(end="2026-10-16", periods=5)
+    return pd.DataFrame(100.0, index=idx, columns=pd.MultiIndex.from_product([["Open", "High", "Low", "Close", "Volume"], syms]))
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(market_data_service.yf, "download", fake_download)
+    monkeypatch.setattr(resilience, "_yf_errors", lambda: {})
+    monkeypatch.setattr(market_data_service, "cached_prices", lambda symbols: {})
+    resilience._breakers.clear()
+    clear_cache()
+    yield
+    resilience._breakers.clear()
+    clear_cache()
+
+
+def test_unknown_tickers_are_null_and_do_not_trip_the_breaker():
+    for i in range(Config.BREAKER_FAILURE_THRESHOLD + 2):
+        out = market_data_service.get_quotes([f"ZZZ{i}"], ["close"])
+        assert out == {f"ZZZ{i}": {"close": None}}
+    assert resilience.get_breaker("yfinance").state == "closed"
+    assert market_data_service.get_quotes(["RELIANCE"], ["close"])["RELIANCE"]["close"] == 100.0
+    ranges = market_data_service.get_price_ranges(["TCS", "ZZZ9"])
+    assert ranges["TCS"]["window_days"] == 5 and ranges["ZZZ9"]["high"] is None
+    assert market_data_service.get_intraday(["ZZZ9"])["ZZZ9"]["data"] == []
+
+
+def test_transport_errors_trip_the_breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "_yf_errors", lambda: {"ZZZ0.NS": "ConnectionError('Connection timed out')"})
+    with pytest.raises(resilience.UpstreamError):
+        resilience.guarded_download(fake_download, ["ZZZ0.NS"])
+    assert resilience.get_breaker("yfinance").failures == 1
+
+
+class BrokenSnapshot:
+    symbol = "ZZZ0.NS"
+
+    def __init__(self, error):
+        self.error = error
+
+    def __getattr__(self, name):
+        raise self.error
+
+
+@pytest.mark.parametrize("service, load", [("corporate_actions_service", "_load_dividends_and_splits"),
+                                           ("analyst_service", "_load_analyst_summary")])
+def test_unknown_ticker_fundamentals_keep_per_symbol_error(monkeypatch, service, load):
+    import importlib
+    module = importlib.import_module(f"services.{service}")
+    monkeypatch.setattr(module, "load_snapshots", lambda symbols, fields: {s: BrokenSnapshot(KeyError("no data")) for s in symbols})
+    out = getattr(module, load)(["ZZZ0"], {"tickers": "ZZZ0"})
+    assert "error" in out["ZZZ0"]
+    monkeypatch.setattr(module, "load_snapshots", lambda symbols, fields: {s: BrokenSnapshot(resilience.CircuitOpenError("open")) for s in symbols})
+    with pytest.raises(resilience.CircuitOpenError):
+        getattr(module, load)(["ZZZ0"], {"tickers": "ZZZ0"})
+
+
+def test_lookup_errors_do_not_count_against_the_breaker():
+    def lookup(symbol):
+        raise KeyError(symbol)
+    for _ in range(Config.BREAKER_FAILURE_THRESHOLD + 1):
+        with pytest.raises(KeyError):
+            resilience.guarded_lookup("yfinance", lookup, "ZZZ0.NS")
+    assert resilience.get_breaker("yfinance").state == "closed"
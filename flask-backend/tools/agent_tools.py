@@ -0,0 +1,472 @@
+"""
+LangChain tool definitions for the agent (loaded lazily via tools.ALL_TOOLS)
+"""
+
+from .market_tools import (
+    tool_get_quotes,
+    tool_get_price_ranges,
+    tool_get_intraday,
+    tool_get_indicators,
+    tool_search_symbols
+)
+
+from .analysis_tools import (
+    tool_get_corporate_actions,
+    tool_get_upcoming_events,
+    tool_get_trending,
+    tool_get_stock_forecasts
+)
+
+from .portfolio_tools import (
+    tool_get_portfolio_risk,
+    tool_get_correlation,
+    tool_optimize_portfolio,
+    tool_backtest_portfolio,
+    tool_get_performance
+)
+
+# Import the RAG search tool
+from .rag_tool import search_knowledge_base
+
+# Import required LangChain components
+from langchain.tools import tool
+from pydantic import BaseModel, Field
+from utils.tracing import traced
+from typing import Dict, List, Optional
+import json
+
+# Define enhanced tool schemas
+class QuotesInput(BaseModel):
+    """Input schema for getting current stock quotes"""
+    tickers: List[str] = Field(
+        ..., 
+        description="List of stock symbols (e.g., ['RELIANCE', 'TCS', '^NSEI']). Use ^NSEI for Nifty, ^BSESN for Sensex"
+    )
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Specific fields to retrieve: 'close', 'previousClose', 'volume', 'open', 'high', 'low'"
+    )
+
+class RangesInput(BaseModel):
+    """Input schema for price range analysis"""
+    tickers: List[str] = Field(..., description="Stock symbols to analyze")
+    window_days: int = Field(
+        default=252,
+        description="Number of days for range analysis (252=1 year, 126=6 months)"
+    )
+
+class IntradayInput(BaseModel):
+    """Input schema for intraday price data"""
+    tickers: List[str] = Field(..., description="Stock symbols for intraday data")
+    interval: str = Field(
+        default="5m",
+        description="Price interval: '1m', '5m', '15m', or '1d'"
+    )
+    period: str = Field(
+        default="5d",
+        description="Time period: '1d', '5d', '1mo', '6mo', '1y'"
+    )
+    max_points: int = Field(
+        default=120,
+        description="Downsample each series to at most this many points (shape-preserving); 0 for every bar"
+    )
+
+class IndicatorsInput(BaseModel):
+    """Input schema for technical indicators"""
+    tickers: List[str] = Field(..., description="Stock symbols to analyze")
+    interval: str = Field(
+        default="1d",
+        description="Bar interval: '1d' (default), '1wk', '15m' or '5m'"
+    )
+
+class HoldingInput(BaseModel):
+    """One portfolio position"""
+    symbol: str = Field(..., description="Stock symbol, e.g. 'TCS'")
+    quantity: Optional[float] = Field(default=None, description="Number of shares held")
+    weight: Optional[float] = Field(default=None, description="Portfolio weight (any scale; normalised)")
+    avg_price: Optional[float] = Field(default=None, description="Average purchase price per share")
+    purchase_date: Optional[str] = Field(default=None, description="Purchase date, YYYY-MM-DD")
+
+class PortfolioRiskInput(BaseModel):
+    """Input schema for portfolio VaR/CVaR"""
+    holdings: List[HoldingInput] = Field(..., description="Positions; weights by quantity x price, explicit weight, or equal")
+    horizon_days: int = Field(default=1, description="Holding period in trading days (1-60)")
+    confidence: float = Field(default=0.95, description="Confidence level, e.g. 0.95 or 0.99")
+
+class CorrelationInput(BaseModel):
+    """Input schema for correlation / diversification analysis"""
+    holdings: List[HoldingInput] = Field(..., description="Positions; weights by quantity x price, explicit weight, or equal")
+    window: int = Field(default=252, description="Trading days of daily returns to use (60-756)")
+
+class OptimizeInput(BaseModel):
+    """Input schema for portfolio optimisation"""
+    holdings: List[HoldingInput] = Field(..., description="Positions to optimise over; quantities enable a share-level rebalance")
+    max_weight: Optional[float] = Field(default=None, description="Maximum weight per stock, e.g. 0.2 for 20%")
+    sector_caps: Optional[Dict[str, float]] = Field(default=None, description="Maximum weight per sector, e.g. {'IT': 0.3}")
+    long_only: bool = Field(default=True, description="Disallow short positions")
+    rebalance_to: Optional[str] = Field(
+        default=None,
+        description="Return share trades towards 'min_variance', 'max_sharpe' or 'risk_parity' (needs quantities)"
+    )
+
+class CandidateInput(BaseModel):
+    """A named alternative weighting to backtest"""
+    name: str = Field(..., description="Label for this weighting")
+    weights: Dict[str, float] = Field(..., description="Weight per held symbol, e.g. {'TCS': 0.5, 'INFY': 0.5}")
+
+class BacktestInput(BaseModel):
+    """Input schema for portfolio backtests"""
+    holdings: List[HoldingInput] = Field(..., description="Positions; weights by quantity x price, explicit weight, or equal")
+    years: float = Field(default=3, description="Years of history to backtest (1-10)")
+    strategies: Optional[List[str]] = Field(
+        default=None,
+        description="Any of 'buy_and_hold', 'monthly', 'quarterly', 'annual' rebalancing (default buy_and_hold + monthly)"
+    )
+    candidates: Optional[List[CandidateInput]] = Field(default=None, description="Alternative weightings to compare")
+
+class PerformanceInput(BaseModel):
+    """Input schema for realised portfolio performance"""
+    holdings: List[HoldingInput] = Field(..., description="Positions with quantity, and avg_price / purchase_date when known")
+    since: Optional[str] = Field(default=None, description="Start date (YYYY-MM-DD) for holdings without a purchase_date; default one year ago")
+
+class CorporateInput(BaseModel):
+    """Input schema for corporate actions"""
+    tickers: List[str] = Field(..., description="Stock symbols to check for corporate actions")
+    include_dividends: bool = Field(default=True, description="Include dividend history")
+    include_splits: bool = Field(default=True, description="Include stock split history")
+
+class EventsInput(BaseModel):
+    """Input schema for upcoming corporate events"""
+    tickers: List[str] = Field(..., description="Stock symbols to check for upcoming events")
+    days: int = Field(default=30, description="Days ahead to look (max 366)")
+
+class TrendingInput(BaseModel):
+    """Input schema for trending stocks"""
+    exchange: str = Field(default="NSE", description="Exchange: 'NSE' or 'BSE'")
+    limit: int = Field(default=3, description="Number of top gainers/losers to return")
+
+class ForecastsInput(BaseModel):
+    """Input schema for stock forecasts"""
+    stock_id: str = Field(..., description="Stock identifier for forecasts")
+    measure_code: str = Field(default="EPS", description="Forecast measure: 'EPS', 'SAL', 'ROE', etc.")
+    period_type: str = Field(default="Annual", description="'Annual' or 'Interim'")
+    data_type: str = Field(default="Estimates", description="'Estimates' or 'Actuals'")
+    age: str = Field(default="Current", description="Data age: 'Current', 'OneWeekAgo', etc.")
+
+class SymbolSearchInput(BaseModel):
+    """Input schema for resolving company names to tickers"""
+    queries: List[str] = Field(
+        ...,
+        description="Company names or partial tickers to resolve (e.g., ['Reliance', 'state bank', 'infosys'])"
+    )
+    exchange: Optional[str] = Field(default=None, description="Preferred exchange: 'NS' (NSE) or 'BO' (BSE)")
+    limit: int = Field(default=3, description="Number of candidates per query (1-10)")
+
+# Create enhanced tool definitions
+@tool("get_current_quotes", args_schema=QuotesInput)
+@traced("get_current_quotes")
+def get_current_quotes(tickers: List[str], fields: Optional[List[str]] = None) -> str:
+    """
+    Get real-time stock quotes and key metrics.
+    
+    Use this for:
+    - Current stock prices
+    - Previous day closing prices
+    - Trading volumes
+    - Basic OHLC data
+    """
+    try:
+        result = tool_get_quotes(json.dumps({"tickers": tickers, "fields": fields}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get quotes: {str(e)}"})
+
+@tool("resolve_symbols", args_schema=SymbolSearchInput)
+@traced("resolve_symbols")
+def resolve_symbols(queries: List[str], exchange: Optional[str] = None, limit: int = 3) -> str:
+    """
+    Resolve company names to NSE/BSE ticker symbols from the local symbol master.
+    
+    Use this for:
+    - Converting company names mentioned by the user into tickers
+    - Checking which exchange a stock is listed on
+    - Looking up a company's sector
+    """
+    try:
+        result = tool_search_symbols(json.dumps({"queries": queries, "exchange": exchange, "limit": limit}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to resolve symbols: {str(e)}"})
+
+@tool("get_price_ranges", args_schema=RangesInput)
+@traced("get_price_ranges")
+def get_price_ranges(tickers: List[str], window_days: int = 252) -> str:
+    """
+    Analyze price ranges over a specified time period.
+    
+    Use this for:
+    - 52-week high/low analysis
+    - Support and resistance levels
+    - Price volatility assessment
+    """
+    try:
+        result = tool_get_price_ranges(json.dumps({"tickers": tickers, "window_days": window_days}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get price ranges: {str(e)}"})
+
+@tool("get_intraday_data", args_schema=IntradayInput)
+@traced("get_intraday_data")
+def get_intraday_data(tickers: List[str], interval: str = "5m", period: str = "5d", max_points: int = 120) -> str:
+    """
+    Get detailed intraday price movement data.
+    
+    Use this for:
+    - Recent price trends
+    - Intraday volatility analysis
+    - Short-term trading patterns
+    """
+    try:
+        result = tool_get_intraday(json.dumps({"tickers": tickers, "interval": interval, "period": period, "max_points": max_points}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get intraday data: {str(e)}"})
+
+@tool("get_technical_indicators", args_schema=IndicatorsInput)
+@traced("get_technical_indicators")
+def get_technical_indicators(tickers: List[str], interval: str = "1d") -> str:
+    """
+    Get a compact technical summary per stock: SMA 20/50/200, EMA 20, RSI 14,
+    MACD, ATR and Bollinger bands, plus signals such as 'above_sma_200',
+    'rsi_overbought' or 'macd_bullish_cross'.
+    
+    Use this for:
+    - Trend and momentum questions
+    - Overbought/oversold checks
+    - Volatility (ATR %) comparisons
+    """
+    try:
+        result = tool_get_indicators(json.dumps({"tickers": tickers, "interval": interval}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get technical indicators: {str(e)}"})
+
+@tool("get_portfolio_risk", args_schema=PortfolioRiskInput)
+@traced("get_portfolio_risk")
+def get_portfolio_risk(holdings: List[HoldingInput], horizon_days: int = 1, confidence: float = 0.95) -> str:
+    """
+    Estimate portfolio tail risk: Value-at-Risk and CVaR (expected shortfall)
+    by historical simulation, the parametric (lognormal) method and Monte Carlo
+    with correlated returns, plus annualised volatility.
+    
+    Use this for:
+    - "How much could my portfolio lose in a day/week?"
+    - Downside risk and worst-case loss questions
+    - Comparing risk across methods or confidence levels
+    """
+    try:
+        rows = [h.model_dump() if hasattr(h, "model_dump") else dict(h) for h in holdings]
+        result = tool_get_portfolio_risk(json.dumps({"holdings": rows, "horizon_days": horizon_days, "confidence": confidence}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to compute portfolio risk: {str(e)}"})
+
+@tool("get_portfolio_correlation", args_schema=CorrelationInput)
+@traced("get_portfolio_correlation")
+def get_portfolio_correlation(holdings: List[HoldingInput], window: int = 252) -> str:
+    """
+    Analyse diversification: correlations between holdings and with the Nifty,
+    betas, portfolio volatility and diversification ratio, concentration (HHI,
+    effective number of holdings, sector weights) and clusters of holdings
+    that move together.
+    
+    Use this for:
+    - "Am I diversified?" / concentration questions
+    - Which holdings move together or duplicate each other
+    - Portfolio beta and market sensitivity
+    """
+    try:
+        rows = [h.model_dump() if hasattr(h, "model_dump") else dict(h) for h in holdings]
+        result = tool_get_correlation(json.dumps({"holdings": rows, "window": window}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to compute correlations: {str(e)}"})
+
+@tool("optimize_portfolio", args_schema=OptimizeInput)
+@traced("optimize_portfolio")
+def optimize_portfolio(holdings: List[HoldingInput], max_weight: Optional[float] = None,
+                       sector_caps: Optional[Dict[str, float]] = None, long_only: bool = True,
+                       rebalance_to: Optional[str] = None) -> str:
+    """
+    Optimise portfolio weights from historical returns: minimum variance,
+    maximum Sharpe and risk parity, next to the current weights, with the
+    efficient frontier and optional share trades to rebalance.
+    
+    Use this for:
+    - "How should I rebalance?" / target allocation questions
+    - Comparing the current mix with lower-risk or higher-Sharpe mixes
+    - Applying position or sector limits
+    """
+    try:
+        rows = [h.model_dump() if hasattr(h, "model_dump") else dict(h) for h in holdings]
+        result = tool_optimize_portfolio(json.dumps({
+            "holdings": rows, "max_weight": max_weight, "sector_caps": sector_caps,
+            "long_only": long_only, "rebalance_to": rebalance_to, "frontier_points": 8,
+        }))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to optimise portfolio: {str(e)}"})
+
+@tool("backtest_portfolio", args_schema=BacktestInput)
+@traced("backtest_portfolio")
+def backtest_portfolio(holdings: List[HoldingInput], years: float = 3, strategies: Optional[List[str]] = None,
+                       candidates: Optional[List[CandidateInput]] = None) -> str:
+    """
+    Backtest the portfolio (current weights, equal weights and any alternative
+    weightings) over past years with dividends reinvested, buy-and-hold or
+    periodically rebalanced. Reports CAGR, volatility, Sharpe, max drawdown and
+    tracking error, beta and excess return versus the Nifty 50.
+    
+    Use this for:
+    - "How would my portfolio have done over 3 years vs Nifty?"
+    - Comparing weightings or rebalancing frequencies historically
+    - Drawdown / worst-period questions
+    """
+    try:
+        rows = [h.model_dump() if hasattr(h, "model_dump") else dict(h) for h in holdings]
+        cands = [c.model_dump() if hasattr(c, "model_dump") else dict(c) for c in (candidates or [])]
+        result = tool_backtest_portfolio(json.dumps({
+            "holdings": rows, "years": years, "strategies": strategies, "candidates": cands, "top": 10,
+        }))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to backtest portfolio: {str(e)}"})
+
+@tool("get_portfolio_performance", args_schema=PerformanceInput)
+@traced("get_portfolio_performance")
+def get_portfolio_performance(holdings: List[HoldingInput], since: Optional[str] = None) -> str:
+    """
+    Actual performance of the holdings since purchase: price gain, dividend
+    income, total gain, time-weighted return (dividends reinvested) and
+    money-weighted return (XIRR) per holding and for the portfolio, with the
+    Nifty 50 over the same period.
+    
+    Use this for:
+    - "How much have I made?" / gains including dividends
+    - Annualised return (XIRR) of the portfolio or a holding
+    - Comparing the portfolio's return with the Nifty since purchase
+    """
+    try:
+        rows = [h.model_dump() if hasattr(h, "model_dump") else dict(h) for h in holdings]
+        result = tool_get_performance(json.dumps({"holdings": rows, "since": since}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to compute performance: {str(e)}"})
+
+@tool("get_corporate_actions", args_schema=CorporateInput)
+@traced("get_corporate_actions")
+def get_corporate_actions(tickers: List[str], include_dividends: bool = True, include_splits: bool = True) -> str:
+    """
+    Get corporate actions including dividends and stock splits.
+    
+    Use this for:
+    - Dividend history and yields
+    - Ex-dividend dates
+    - Stock split history
+    - Corporate event analysis
+    """
+    try:
+        result = tool_get_corporate_actions(json.dumps({
+            "tickers": tickers,
+            "include_dividends": include_dividends,
+            "include_splits": include_splits
+        }))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get corporate actions: {str(e)}"})
+
+@tool("get_upcoming_events", args_schema=EventsInput)
+@traced("get_upcoming_events")
+def get_upcoming_events(tickers: List[str], days: int = 30) -> str:
+    """
+    Upcoming ex-dividend and dividend payment dates for stocks, sorted by date.
+    Dates marked estimated are projected from last year's dividend dates.
+    
+    Use this for:
+    - "Any dividends coming up for my stocks?"
+    - Next ex-dividend date of a stock
+    - Events in the next N days for a portfolio
+    """
+    try:
+        result = tool_get_upcoming_events(json.dumps({"tickers": tickers, "days": days, "compact": True}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get upcoming events: {str(e)}"})
+
+@tool("get_trending_stocks", args_schema=TrendingInput)
+@traced("get_trending_stocks")
+def get_trending_stocks(exchange: str = "NSE", limit: int = 3) -> str:
+    """
+    Get top performing and worst performing stocks.
+    
+    Use this for:
+    - Market sentiment analysis
+    - Identifying top gainers/losers
+    - Market trend analysis
+    """
+    try:
+        result = tool_get_trending(json.dumps({"exchange": exchange, "limit": limit}))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get trending stocks: {str(e)}"})
+
+@tool("get_stock_forecasts", args_schema=ForecastsInput)
+@traced("get_stock_forecasts")
+def get_stock_forecasts(
+    stock_id: str,
+    measure_code: str = "EPS",
+    period_type: str = "Annual",
+    data_type: str = "Estimates",
+    age: str = "Current"
+) -> str:
+    """
+    Get analyst forecasts and estimates for stocks.
+    
+    Use this for:
+    - Earnings estimates (EPS)
+    - Revenue forecasts
+    - Growth projections
+    - Analyst consensus data
+    """
+    try:
+        result = tool_get_stock_forecasts(json.dumps({
+            "stock_id": stock_id,
+            "measure_code": measure_code,
+            "period_type": period_type,
+            "data_type": data_type,
+            "age": age
+        }))
+        return result
+    except Exception as e:
+        return json.dumps({"error": f"Failed to get stock forecasts: {str(e)}"})
+
+# Export all tools - THIS IS CRITICAL
+ALL_TOOLS = [
+    # Market data tools
+    resolve_symbols,
+    get_current_quotes,
+    get_price_ranges,
+    get_intraday_data,
+    get_technical_indicators,
+    get_portfolio_risk,
+    get_portfolio_correlation,
+    optimize_portfolio,
+    backtest_portfolio,
+    get_portfolio_performance,
+    get_corporate_actions,
+    get_upcoming_events,
+    get_trending_stocks,
+    get_stock_forecasts,
+    # Knowledge base search tool
+    search_knowledge_base,
+]
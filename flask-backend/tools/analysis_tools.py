@@ -1,30 +1,50 @@
-import json
+from utils.serialization import dumps, loads
 from services.corporate_actions_service import get_dividends_and_splits as _corp
 from services.trending_service import get_trending as _trend
 from services.stock_forecasts_service import get_stock_forecasts as _fore
+from services.events_service import get_upcoming_events as _events
 
-def tool_get_corporate_actions(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
+def corporate_actions_data(p: dict) -> dict:
     data = _corp(p.get("tickers", []))
+    drop = set()
     if not p.get("include_dividends", True):
-        for k in data:
-            data[k].pop("dividends", None)
-            data[k].pop("summary", None)
+        drop |= {"dividends", "summary"}
     if not p.get("include_splits", True):
-        for k in data:
-            data[k].pop("splits", None)
-    return json.dumps(data)
+        drop.add("splits")
+    if drop:
+        # Copy: the service result is the cached object
+        data = {k: {f: v for f, v in row.items() if f not in drop} for k, row in data.items()}
+    return data
 
-def tool_get_trending(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
-    return json.dumps(_trend(p.get("exchange", "NSE"), p.get("limit", 3)))
+def upcoming_events_data(p: dict) -> dict:
+    data = _events(p.get("tickers") or None, p.get("days", 30), p.get("past_days", 0), p.get("types"))
+    if p.get("compact"):
+        # One short row per event for the agent; drops the provenance fields
+        data = {"from": data["from"], "to": data["to"], "events": [
+            {"date": e["date"], "symbol": e["symbol"], "type": e["type"], "amount": e["amount"],
+             **({"estimated": True} if e["source"] == "estimated" else {})} for e in data["events"]]}
+    return data
 
-def tool_get_stock_forecasts(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
-    return json.dumps(_fore(
+def trending_data(p: dict) -> dict:
+    return _trend(p.get("exchange", "NSE"), p.get("limit", 3))
+
+def stock_forecasts_data(p: dict) -> dict:
+    return _fore(
         p.get("stock_id",""),
         p.get("measure_code","EPS"),
         p.get("period_type","Annual"),
         p.get("data_type","Estimates"),
         p.get("age","Current"),
-    ))
+    )
+
+def tool_get_corporate_actions(params_json: str) -> str:
+    return dumps(corporate_actions_data(loads(params_json or "{}")))
+
+def tool_get_upcoming_events(params_json: str) -> str:
+    return dumps(upcoming_events_data(loads(params_json or "{}")))
+
+def tool_get_trending(params_json: str) -> str:
+    return dumps(trending_data(loads(params_json or "{}")))
+
+def tool_get_stock_forecasts(params_json: str) -> str:
+    return dumps(stock_forecasts_data(loads(params_json or "{}")))
@@ -1,14 +1,41 @@
-import json
+from utils.serialization import dumps, loads
 from services.market_data_service import get_quotes as _q, get_price_ranges as _r, get_intraday as _i
+from services.indicators_service import get_indicators as _ind
+from utils.symbol_index import get_symbol_index
+
+# *_data(params) return objects for the HTTP routes; tool_*(params_json) return JSON strings for the agent tools.
+
+def quotes_data(p: dict) -> dict:
+    return _q(p.get("tickers", []), p.get("fields"))
+
+def price_ranges_data(p: dict) -> dict:
+    return _r(p.get("tickers", []), p.get("window_days", 252))
+
+def intraday_data(p: dict) -> dict:
+    return _i(p.get("tickers", []), p.get("interval", "5m"), p.get("period", "5d"), p.get("max_points"), p.get("method", "lttb"))
+
+def indicators_data(p: dict) -> dict:
+    return _ind(p.get("tickers", []), p.get("interval", "1d"), p.get("series", 0))
+
+def search_symbols_data(p: dict) -> dict:
+    index = get_symbol_index()
+    limit = max(1, min(10, int(p.get("limit", 3))))
+    out = {}
+    for q in p.get("queries", []):
+        out[q] = index.search(q, limit=limit, exchange=p.get("exchange"))
+    return out
 
 def tool_get_quotes(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
-    return json.dumps(_q(p.get("tickers", []), p.get("fields")))
+    return dumps(quotes_data(loads(params_json or "{}")))
 
 def tool_get_price_ranges(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
-    return json.dumps(_r(p.get("tickers", []), p.get("window_days", 252)))
+    return dumps(price_ranges_data(loads(params_json or "{}")))
 
 def tool_get_intraday(params_json: str) -> str:
-    p = json.loads(params_json or "{}")
-    return json.dumps(_i(p.get("tickers", []), p.get("interval", "5m"), p.get("period", "5d")))
+    return dumps(intraday_data(loads(params_json or "{}")))
+
+def tool_get_indicators(params_json: str) -> str:
+    return dumps(indicators_data(loads(params_json or "{}")))
+
+def tool_search_symbols(params_json: str) -> str:
+    return dumps(search_symbols_data(loads(params_json or "{}")))
@@ -0,0 +1,57 @@
+from utils.serialization import dumps, loads
+from services.risk_service import get_portfolio_var as _var
+from services.correlation_service import get_correlation as _corr
+from services.optimizer_service import get_optimized_portfolio as _opt
+from services.backtest_service import get_backtest as _bt
+from services.performance_service import get_performance as _perf
+
+# *_data(params) return objects for the HTTP routes; tool_*(params_json) return JSON strings for the agent tools.
+
+def portfolio_risk_data(p: dict) -> dict:
+    try:
+        return _var(p.get("holdings") or p.get("tickers") or [], p.get("horizon_days", 1),
+                    p.get("confidence", 0.95), p.get("paths"), p.get("seed"))
+    except ValueError as e:
+        return {"error": str(e)}
+
+def correlation_data(p: dict) -> dict:
+    try:
+        return _corr(p.get("holdings") or p.get("tickers") or [], p.get("window", 252),
+                     p.get("cluster_threshold", 0.5), p.get("include_matrix"))
+    except ValueError as e:
+        return {"error": str(e)}
+
+def optimize_data(p: dict) -> dict:
+    try:
+        return _opt(p.get("holdings") or p.get("tickers") or [], p.get("long_only", True), p.get("max_weight"),
+                    p.get("sector_caps"), p.get("frontier_points", 15), p.get("rebalance_to"))
+    except ValueError as e:
+        return {"error": str(e)}
+
+def backtest_data(p: dict) -> dict:
+    try:
+        return _bt(p.get("holdings") or p.get("tickers") or [], p.get("years", 3), p.get("strategies"),
+                   p.get("candidates"), p.get("cost_bps", 0), p.get("top", 20), p.get("include_curve", False))
+    except ValueError as e:
+        return {"error": str(e)}
+
+def performance_data(p: dict) -> dict:
+    try:
+        return _perf(p.get("holdings") or [], p.get("since"), p.get("include_series", False))
+    except ValueError as e:
+        return {"error": str(e)}
+
+def tool_get_portfolio_risk(params_json: str) -> str:
+    return dumps(portfolio_risk_data(loads(params_json or "{}")))
+
+def tool_get_correlation(params_json: str) -> str:
+    return dumps(correlation_data(loads(params_json or "{}")))
+
+def tool_optimize_portfolio(params_json: str) -> str:
+    return dumps(optimize_data(loads(params_json or "{}")))
+
+def tool_backtest_portfolio(params_json: str) -> str:
+    return dumps(backtest_data(loads(params_json or "{}")))
+
+def tool_get_performance(params_json: str) -> str:
+    return dumps(performance_data(loads(params_json or "{}")))
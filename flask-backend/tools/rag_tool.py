@@ -1,6 +1,7 @@
 from langchain.tools import tool
+from typing import Optional
 from pydantic import BaseModel, Field
-from rag.retriever import get_retriever
+from utils.tracing import span, traced
 
 class KnowledgeBaseSearchInput(BaseModel):
     """Input for searching the financial knowledge base"""
@@ -13,10 +14,19 @@ class KnowledgeBaseSearchInput(BaseModel):
         default=4,
         description="Number of relevant documents to retrieve (1-10)"
     )
+    category: Optional[str] = Field(
+        default=None,
+        description="Only search this knowledge-base category, e.g. 'investment_principles'"
+    )
+    source: Optional[str] = Field(
+        default=None,
+        description="Only search this source (book/report id), e.g. 'the_intelligent_investor'"
+    )
 
 
 @tool("search_knowledge_base", args_schema=KnowledgeBaseSearchInput)
-def search_knowledge_base(query: str, num_results: int = 4) -> str:
+@traced("search_knowledge_base")
+def search_knowledge_base(query: str, num_results: int = 4, category: Optional[str] = None, source: Optional[str] = None) -> str:
     """
     Search the financial knowledge base for concepts, principles, and educational content.
     
@@ -34,10 +44,13 @@ def search_knowledge_base(query: str, num_results: int = 4) -> str:
     - Portfolio analysis requiring current data
     """
     try:
+        from rag.lexical import best_window
+        from rag.retriever import get_retriever
         retriever = get_retriever()
         
         # Retrieve relevant documents
-        docs = retriever.invoke(query)
+        with span("pinecone.query", kind="upstream"):
+            docs = retriever.search(query, category, source) if (category or source) else retriever.invoke(query)
         
         if not docs:
             return "No relevant information found in knowledge base."
@@ -49,7 +62,7 @@ def search_knowledge_base(query: str, num_results: int = 4) -> str:
         content_pieces = []
         for i, doc in enumerate(docs, 1):
             source = doc.metadata.get('source', 'Unknown')
-            snippet = doc.page_content[:1000]  # Limit content length
+            snippet = best_window(doc.page_content, query, 1000)  # the part that matches the query
             content_pieces.append(f"Source: {source}\n{snippet}\n")
         
         combined_content = "\n---\n".join(content_pieces)
@@ -0,0 +1,119 @@
+"""
+Vectorised portfolio backtests over aligned (T, N) daily total returns.
+
+simulate() runs K candidate weightings at once for one rebalance schedule.
+Rows are grouped into segments (one for buy-and-hold, one per month, quarter
+or year otherwise). Within a segment each asset's growth since the segment
+start is a cumulative product, so portfolio value is a (T, N) @ (N, K)
+matmul. Segments are chained by the product of the earlier segments' end
+values, less turnover costs at each rebalance. There is no loop over dates or
+candidates.
+"""
+import numpy as np
+import pandas as pd
+
+SCHEDULES = {"buy_and_hold": None, "monthly": "M", "quarterly": "Q", "annual": "Y"}
+TRADING_DAYS = 252
+
+
+def total_returns(close: np.ndarray, dividends: np.ndarray, splits: np.ndarray) -> np.ndarray:
+    """(T, N) daily total returns from unadjusted closes.
+
+    `dividends` holds cash per share on ex-dates (0 elsewhere) and `splits` the
+    split ratio on ex-dates (1 elsewhere). Yahoo's Close is usually already
+    split-adjusted, so a ratio is applied only where the close actually gaps
+    by about 1/ratio. Row 0 and rows before a symbol's first close are NaN.
+    """
+    prev = pd.DataFrame(close).ffill().shift(1).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_rel = close / prev
+        gapped = np.abs(np.log(price_rel * splits)) < np.abs(np.log(price_rel))
+        factor = np.where((splits != 1.0) & gapped, splits, 1.0)
+        return (close * factor + dividends) / prev - 1.0
+
+
+def event_matrix(dates: pd.DatetimeIndex, per_column: list[list[dict]], field: str, multiply: bool = False) -> np.ndarray:
+    """(T, N) corporate-action values placed on the first trading date on/after each record's date;
+    summed (dividends, 0 elsewhere) or multiplied (split ratios, 1 elsewhere)."""
+    out = np.full((len(dates), len(per_column)), 1.0 if multiply else 0.0)
+    for j, records in enumerate(per_column):
+        for rec in records or []:
+            try:
+                i = dates.searchsorted(pd.Timestamp(rec["date"]))
+                val = float(rec[field])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if i < len(dates) and val > 0:
+                out[i, j] = out[i, j] * val if multiply else out[i, j] + val
+    return out
+
+
+def segments(dates: pd.DatetimeIndex, schedule: str) -> np.ndarray:
+    """Segment id per row; a new segment (rebalance) starts when the period changes."""
+    freq = SCHEDULES.get(schedule)
+    if freq is None:
+        return np.zeros(len(dates), dtype=int)
+    periods = dates.to_period(freq).asi8
+    return np.concatenate([[0], np.cumsum(periods[1:] != periods[:-1])])
+
+
+def simulate(returns: np.ndarray, weights: np.ndarray, seg: np.ndarray, cost_bps: float = 0.0) -> np.ndarray:
+    """(T, K) portfolio values (start = 1) for (K, N) weights rebalanced at segment starts."""
+    logg = np.log1p(np.nan_to_num(returns))
+    cum = np.cumsum(logg, axis=0)
+    starts = np.flatnonzero(np.r_[True, seg[1:] != seg[:-1]])
+    ends = np.r_[starts[1:] - 1, len(seg) - 1]
+    base = np.vstack([np.zeros((1, returns.shape[1])), cum])[starts]  # cumulative log growth before each segment
+    rel = np.exp(cum - base[seg])  # (T, N) growth since the segment start
+    v = rel @ weights.T  # (T, K) value per unit invested at the segment start
+    seg_end = v[ends]  # (S, K)
+    cost = np.ones_like(seg_end)
+    if cost_bps and len(starts) > 1:
+        # Drifted weights at each segment end vs the target weights at the next start
+        drift = rel[ends[:-1]][:, None, :] * weights[None, :, :] / seg_end[:-1, :, None]
+        turnover = np.abs(weights[None, :, :] - drift).sum(axis=2)  # (S-1, K)
+        cost[1:] = 1.0 - turnover * cost_bps / 1e4
+    prefix = np.cumprod(np.vstack([np.ones((1, v.shape[1])), seg_end[:-1]]) * cost, axis=0)
+    return prefix[seg] * v
+
+
+def metrics(values: np.ndarray, dates: pd.DatetimeIndex, bench: np.ndarray | None, rf: float = 0.0) -> dict[str, np.ndarray]:
+    """Per-column CAGR, volatility, Sharpe, max drawdown (with dates) and, given
+    benchmark values, tracking error, information ratio, beta and excess CAGR.
+
+    `values` and `bench` are (T, K) and (T,) values after each day's return;
+    `dates` has T + 1 entries, the first being the start (value 1).
+    """
+    v = np.vstack([np.ones((1, values.shape[1])), values])
+    r = v[1:] / v[:-1] - 1.0
+    years = max((dates[-1] - dates[0]).days / 365.25, 1 / TRADING_DAYS)
+    cagr = v[-1] ** (1 / years) - 1
+    vol = r.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (r.mean(axis=0) * TRADING_DAYS - rf) / vol
+    peak = np.maximum.accumulate(v, axis=0)
+    dd = v / peak - 1.0
+    trough = dd.argmin(axis=0)
+    before = np.arange(len(v))[:, None] <= trough[None, :]
+    peak_at = np.where(before, v, -np.inf).argmax(axis=0)
+    out = {
+        "total_return": v[-1] - 1,
+        "cagr": cagr,
+        "volatility": vol,
+        "sharpe": sharpe,
+        "max_drawdown": dd.min(axis=0),
+        "max_drawdown_peak": dates[peak_at].strftime("%Y-%m-%d").to_numpy(),
+        "max_drawdown_trough": dates[trough].strftime("%Y-%m-%d").to_numpy(),
+    }
+    if bench is not None:
+        b = np.r_[1.0, bench]
+        rb = b[1:] / b[:-1] - 1.0
+        active = r - rb[:, None]
+        te = active.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+        var_b = rb.var(ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["tracking_error"] = te
+            out["information_ratio"] = active.mean(axis=0) * TRADING_DAYS / te
+            out["beta"] = ((r - r.mean(axis=0)) * (rb - rb.mean())[:, None]).sum(axis=0) / (len(rb) - 1) / var_b
+        out["excess_cagr"] = cagr - (b[-1] ** (1 / years) - 1)
+    return out
@@ -1,24 +1,67 @@
 import time
+from contextvars import ContextVar
 from typing import Any, Optional
+from utils.metrics import record_cache
 
 _cache: dict[str, dict] = {}
 
-def _key(prefix: str, params: dict) -> str:
+
+class Freshness:
+    """Versions (fetch time, stale flag) and expiries of the cache entries a response was built from."""
+    __slots__ = ("versions", "exp", "ts", "stale")
+
+    def __init__(self):
+        self.versions: list[tuple] = []
+        self.exp: float | None = None
+        self.ts: float | None = None
+        self.stale = False
+
+
+# Holds a mutable Freshness so notes made in copied contexts (route timeout threads) are visible to the request
+_freshness: ContextVar[Freshness | None] = ContextVar("freshness", default=None)
+
+def track_freshness() -> Freshness:
+    f = Freshness()
+    _freshness.set(f)
+    return f
+
+def current_freshness() -> Freshness | None:
+    return _freshness.get()
+
+def note_freshness(ts: float, exp: float, stale: bool = False, key: str = ""):
+    f = _freshness.get()
+    if f is None:
+        return
+    f.versions.append((key, round(ts, 6), stale))
+    f.exp = exp if f.exp is None else min(f.exp, exp)
+    f.ts = ts if f.ts is None else max(f.ts, ts)
+    f.stale = f.stale or stale
+
+def cache_key(prefix: str, params: dict) -> str:
     items = sorted(params.items())
     return prefix + ":" + "&".join([f"{k}={v}" for k, v in items])
 
-def get_cached(prefix: str, params: dict, ttl: int) -> Optional[Any]:
-    key = _key(prefix, params)
+def get_cached(prefix: str, params: dict, ttl: int | None = None) -> Optional[Any]:
+    """Return cached data younger than `ttl`, or (ttl=None) not past the expiry set by set_cached."""
+    key = cache_key(prefix, params)
     entry = _cache.get(key)
-    if not entry:
-        return None
-    if time.time() - entry["ts"] < ttl:
+    now = time.time()
+    if entry and (now < entry["exp"] if ttl is None else now - entry["ts"] < ttl):
+        record_cache(prefix, True)
+        note_freshness(entry["ts"], entry["exp"] if ttl is None else entry["ts"] + ttl, key=key)
         return entry["data"]
+    record_cache(prefix, False)
     return None
 
+def get_entry(prefix: str, params: dict) -> Optional[dict]:
+    """Raw entry ({ts, ttl, exp, data}) even if expired; None if never cached."""
+    return _cache.get(cache_key(prefix, params))
+
 def set_cached(prefix: str, params: dict, data: Any, ttl: int):
-    key = _key(prefix, params)
-    _cache[key] = {"ts": time.time(), "ttl": ttl, "data": data}
+    key = cache_key(prefix, params)
+    now = time.time()
+    _cache[key] = {"ts": now, "ttl": ttl, "exp": now + ttl, "data": data}
+    note_freshness(now, now + ttl, key=key)
 
 def clear_cache(prefix: str | None = None):
     if not prefix:
@@ -0,0 +1,135 @@
+"""
+Rolling pairwise covariance over aligned (T, N) return rows, updated per bar.
+
+RollingCovariance keeps the last `window` return rows in a ring buffer together
+with three (N, N) moment matrices over pairwise-complete observations:
+
+- n[i, j]   = sum_t m_ti m_tj         (rows where both symbols have a return)
+- sx[i, j]  = sum_t x_ti m_tj         (sum of i's returns over those rows)
+- sxx[i, j] = sum_t x_ti x_tj
+
+A new bar is a rank-1 add (and, once the window is full, a rank-1 remove of the
+row leaving it), so keeping a 500-name matrix current costs O(N^2) per day
+instead of a full recompute. Large batches (first fill, catching up after a
+gap) and every `window` updates are recomputed from the ring with one matmul,
+which also bounds floating-point drift from the add/remove pairs.
+
+cluster_correlations() groups symbols by average-linkage hierarchical clustering
+on the correlation distance sqrt((1 - rho) / 2).
+"""
+import threading
+import numpy as np
+
+MIN_OBSERVATIONS = 20
+
+
+class RollingCovariance:
+    def __init__(self, symbols: list[str], window: int = 252):
+        self.symbols = list(symbols)
+        self.window = int(window)
+        n = len(self.symbols)
+        self.x = np.zeros((self.window, n))
+        self.m = np.zeros((self.window, n))
+        self.pos = 0
+        self.filled = 0
+        self.updates = 0
+        self.dates: list = []
+        self.lock = threading.Lock()
+        self._rebuild()
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    def _rebuild(self):
+        x, m = self.x, self.m
+        self.n = m.T @ m
+        self.sx = x.T @ m
+        self.sxx = x.T @ x
+        self.updates = 0
+
+    def _rank1(self, x: np.ndarray, m: np.ndarray, sign: float):
+        self.n += sign * np.outer(m, m)
+        self.sx += sign * np.outer(x, m)
+        self.sxx += sign * np.outer(x, x)
+
+    def _write(self, r: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        valid = ~np.isnan(r)
+        x, m = np.where(valid, r, 0.0), valid.astype(float)
+        old_x, old_m = self.x[self.pos].copy(), self.m[self.pos].copy()
+        self.x[self.pos], self.m[self.pos] = x, m
+        self.pos = (self.pos + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+        return x, m, old_x, old_m
+
+    def push(self, date, r: np.ndarray):
+        """Add one (N,) return row (NaN = no return for that symbol on `date`)."""
+        x, m, old_x, old_m = self._write(r)
+        if old_m.any():
+            self._rank1(old_x, old_m, -1.0)
+        self._rank1(x, m, 1.0)
+        self.dates.append(date)
+        del self.dates[:-self.window]
+        self.updates += 1
+        if self.updates >= self.window:
+            self._rebuild()
+
+    def extend(self, dates: list, rows: np.ndarray):
+        """Add many rows; recomputes from the ring when that is cheaper than rank-1 updates."""
+        if len(rows) > max(8, self.window // 16):
+            for r in rows[-self.window:]:
+                self._write(r)
+            self.dates.extend(dates)
+            del self.dates[:-self.window]
+            self._rebuild()
+        else:
+            for d, r in zip(dates, rows):
+                self.push(d, r)
+
+    def counts(self) -> np.ndarray:
+        return self.n.copy()
+
+    def covariance(self, min_obs: int = MIN_OBSERVATIONS) -> np.ndarray:
+        """(N, N) sample covariance over pairwise-complete rows; NaN where fewer than `min_obs` rows."""
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (self.sxx - self.sx * self.sx.T / n) / (n - 1)
+        return np.where(n >= min_obs, cov, np.nan)
+
+    def correlation(self, min_obs: int = MIN_OBSERVATIONS) -> np.ndarray:
+        cov = self.covariance(min_obs)
+        sd = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(sd, sd)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.isnan(np.diag(cov)), np.nan, 1.0))
+        return corr
+
+
+def cluster_correlations(corr: np.ndarray, threshold: float = 0.5) -> list[list[int]]:
+    """Average-linkage clusters of column indices; merging stops when the closest
+    clusters are further apart than `threshold` (distance sqrt((1 - rho) / 2),
+    so 0.5 is an average correlation of 0.5). NaN correlations count as 0."""
+    k = len(corr)
+    if k == 0:
+        return []
+    rho = np.nan_to_num(corr, nan=0.0)
+    d = np.sqrt(np.clip((1.0 - rho) / 2.0, 0.0, None))
+    np.fill_diagonal(d, np.inf)
+    sizes = np.ones(k)
+    members = {i: [i] for i in range(k)}
+    active = np.ones(k, dtype=bool)
+    while active.sum() > 1:
+        flat = int(np.argmin(d))
+        i, j = divmod(flat, k)
+        if d[i, j] > threshold:
+            break
+        # Lance-Williams update for average linkage: merge j into i
+        merged = (sizes[i] * d[i] + sizes[j] * d[j]) / (sizes[i] + sizes[j])
+        d[i], d[:, i] = merged, merged
+        d[i, i] = np.inf
+        d[j], d[:, j] = np.inf, np.inf
+        sizes[i] += sizes[j]
+        active[j] = False
+        members[i] += members.pop(j)
+    return sorted(members.values(), key=len, reverse=True)
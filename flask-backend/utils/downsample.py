@@ -0,0 +1,98 @@
+"""
+Chart downsampling for OHLCV record lists.
+
+- "lttb": Largest-Triangle-Three-Buckets on Close; keeps whole bars, so the
+  line shape (peaks, troughs) survives
+- "ohlc": fixed-width buckets aggregated to candles (first open, max high,
+  min low, last close, summed volume); vectorised with ufunc.reduceat
+"""
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "ohlc")
+MIN_POINTS = 3
+
+
+def _x_key(rec: dict) -> str | None:
+    for k in ("Datetime", "Date", "date", "Month"):
+        if k in rec:
+            return k
+    return None
+
+
+def _x_values(records: list[dict], key: str | None) -> np.ndarray:
+    if key is None:
+        return np.arange(len(records), dtype="float64")
+    ts = pd.to_datetime(pd.Series([r.get(key) for r in records]), errors="coerce", utc=True)
+    # Fall back to positions if any timestamp failed to parse
+    if ts.isna().any():
+        return np.arange(len(records), dtype="float64")
+    return ts.astype("int64").to_numpy(dtype="float64")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points LTTB keeps (always includes the first and last point)."""
+    n = len(x)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        # Average of the next bucket is the third triangle vertex
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _lttb_records(records: list[dict], max_points: int, x_key: str | None) -> list[dict]:
+    y = np.array([r.get("Close") if r.get("Close") is not None else np.nan for r in records], dtype="float64")
+    if np.isnan(y).any():
+        y = pd.Series(y).ffill().bfill().fillna(0.0).to_numpy()
+    idx = lttb_indices(_x_values(records, x_key), y, max_points)
+    return [records[i] for i in idx]
+
+
+def _ohlc_records(records: list[dict], max_points: int, x_key: str | None) -> list[dict]:
+    n = len(records)
+    starts = np.unique(np.floor(np.linspace(0, n, max_points, endpoint=False)).astype(int))
+    ends = np.append(starts[1:], n) - 1
+    col = lambda k: np.array([r.get(k) if r.get(k) is not None else np.nan for r in records], dtype="float64")
+    out_cols = {}
+    if "Open" in records[0]:
+        out_cols["Open"] = col("Open")[starts]
+    if "High" in records[0]:
+        out_cols["High"] = np.fmax.reduceat(col("High"), starts)
+    if "Low" in records[0]:
+        out_cols["Low"] = np.fmin.reduceat(col("Low"), starts)
+    if "Close" in records[0]:
+        out_cols["Close"] = col("Close")[ends]
+    if "Volume" in records[0]:
+        out_cols["Volume"] = np.add.reduceat(np.nan_to_num(col("Volume")), starts)
+    out = []
+    for j, s in enumerate(starts):
+        rec = {x_key: records[s][x_key]} if x_key else {}
+        for k, arr in out_cols.items():
+            v = arr[j]
+            rec[k] = None if np.isnan(v) else float(v)
+        rec["bars"] = int(ends[j] - s + 1)
+        out.append(rec)
+    return out
+
+
+def downsample_records(records: list[dict], max_points: int | None, method: str = "lttb") -> list[dict]:
+    """Reduce OHLCV records to at most `max_points`; returns `records` unchanged if already small enough."""
+    if not max_points or not records or len(records) <= max_points:
+        return records
+    max_points = max(MIN_POINTS, int(max_points))
+    x_key = _x_key(records[0])
+    if method == "ohlc":
+        return _ohlc_records(records, max_points, x_key)
+    return _lttb_records(records, max_points, x_key)
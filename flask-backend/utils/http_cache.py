@@ -0,0 +1,122 @@
+"""
+HTTP response caching for the market and tools blueprints.
+
+- ETag: weak validator built from the versions of the cache entries the
+  response was assembled from (utils.cache_utils.note_freshness) plus the
+  request; falls back to a body hash when no cache entry was involved
+- If-None-Match -> 304. Also honoured on the read-only POST query endpoints,
+  which is how the dashboard polls the pricemap.
+- Cache-Control max-age from the shortest remaining TTL; Last-Modified from
+  the newest fetch (If-Modified-Since honoured for GET)
+- gzip, or brotli when the optional `brotli` package is installed, above
+  HTTP_COMPRESS_MIN_BYTES
+"""
+import gzip
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from flask import request
+from config import Config
+from utils.cache_utils import track_freshness, current_freshness
+from utils.metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HTTP_BYTES = REGISTRY.counter("portfolio_http_response_bytes_total", "Response body bytes by blueprint and encoding (identity/gzip/br)")
+HTTP_NOT_MODIFIED = REGISTRY.counter("portfolio_http_not_modified_total", "304 responses by blueprint")
+
+
+def _etag(body_fn, freshness) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    h.update(request.method.encode())
+    h.update(request.full_path.encode())
+    h.update(request.get_data(cache=True))
+    if freshness and freshness.versions:
+        for v in sorted(set(freshness.versions)):
+            h.update(repr(v).encode())
+    else:
+        h.update(body_fn())
+    return f'W/"{h.hexdigest()}"'
+
+
+def _not_modified(etag: str, last_modified: float | None) -> bool:
+    inm = request.headers.get("If-None-Match")
+    if inm:
+        tags = {t.strip() for t in inm.split(",")}
+        # Weak comparison: compression variants share a validator
+        return "*" in tags or etag in tags or etag[2:] in tags
+    ims = request.headers.get("If-Modified-Since")
+    if ims and last_modified and request.method == "GET":
+        try:
+            return int(last_modified) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _choose_encoding() -> str | None:
+    accept = request.headers.get("Accept-Encoding", "").lower()
+    if brotli is not None and "br" in accept:
+        return "br"
+    if "gzip" in accept:
+        return "gzip"
+    return None
+
+
+def _compress(response, blueprint: str):
+    body = response.get_data()
+    encoding = _choose_encoding() if len(body) >= Config.HTTP_COMPRESS_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=Config.HTTP_BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=Config.HTTP_GZIP_LEVEL)
+    if encoding:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    HTTP_BYTES.inc(len(body), blueprint=blueprint, encoding=encoding or "identity")
+
+
+def install_http_cache(bp):
+    """Add validators, conditional responses and compression to every JSON response of `bp`."""
+
+    @bp.before_request
+    def _start_freshness():
+        track_freshness()
+
+    @bp.after_request
+    def _http_cache(response):
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != "application/json"
+            or "Content-Encoding" in response.headers
+            or request.method not in ("GET", "POST")
+        ):
+            return response
+        freshness = current_freshness()
+        now = time.time()
+        etag = _etag(response.get_data, freshness)
+        response.headers["ETag"] = etag
+        if freshness and freshness.exp is not None and not freshness.stale:
+            response.headers["Cache-Control"] = f"private, max-age={max(0, int(freshness.exp - now))}"
+        else:
+            response.headers["Cache-Control"] = "private, no-cache"
+        last_modified = freshness.ts if freshness else None
+        if last_modified:
+            response.headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+        if _not_modified(etag, last_modified):
+            response.status_code = 304
+            response.set_data(b"")
+            response.headers.pop("Content-Type", None)
+            HTTP_NOT_MODIFIED.inc(blueprint=bp.name)
+            return response
+
+        _compress(response, bp.name)
+        return response
+
+    return bp
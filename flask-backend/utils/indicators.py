@@ -0,0 +1,158 @@
+"""
+Incremental technical indicators over aligned (T, N) price matrices.
+
+IndicatorEngine keeps per-indicator state as (N,) arrays, so every bar is a
+handful of vectorised NumPy operations across all symbols, and a new bar costs
+O(N) instead of recomputing the history:
+
+- SMA 20/50/200 and Bollinger(20, 2): running sums over a 200-bar ring buffer
+- EMA 20, MACD(12, 26, 9): exponential recursions seeded with the first value
+- RSI 14, ATR 14: Wilder smoothing
+
+The last bar of a session is revised until the close, so callers commit() all
+complete bars and evaluate() the live one on a copy of the state.
+"""
+import copy
+import threading
+import numpy as np
+
+SMA_WINDOWS = (20, 50, 200)
+RING = max(SMA_WINDOWS)
+BB_WINDOW, BB_K = 20, 2.0
+RSI_N = ATR_N = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+HISTORY_LIMIT = 1000  # committed bars kept for series output
+
+OUTPUTS = (
+    "close", "sma_20", "sma_50", "sma_200", "ema_20", "rsi_14",
+    "macd", "macd_signal", "macd_hist", "atr_14", "bb_upper", "bb_middle", "bb_lower",
+)
+
+
+def _ema(prev: np.ndarray, x: np.ndarray, alpha: float) -> np.ndarray:
+    valid = ~np.isnan(x)
+    seeded = np.where(np.isnan(prev), x, prev + alpha * (x - prev))
+    return np.where(valid, seeded, prev)
+
+
+def _initial_state(n: int) -> dict:
+    nan = lambda: np.full(n, np.nan)
+    zeros = lambda: np.zeros(n)
+    return {
+        "count": np.zeros(n, dtype=np.int64),
+        "prev_close": nan(),
+        "ring": np.zeros((RING, n)),
+        "ring_valid": np.zeros((RING, n)),
+        "pos": 0,
+        "sum": {w: zeros() for w in SMA_WINDOWS},
+        "cnt": {w: zeros() for w in SMA_WINDOWS},
+        "sumsq": zeros(),
+        "ema_20": nan(),
+        "ema_fast": nan(),
+        "ema_slow": nan(),
+        "signal": nan(),
+        "avg_gain": nan(),
+        "avg_loss": nan(),
+        "atr": nan(),
+        "prev_hist": nan(),
+    }
+
+
+def step(state: dict, o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> dict:
+    """Advance `state` (in place) by one bar of (N,) arrays and return that bar's outputs."""
+    prev_close = state["prev_close"]
+    # A symbol with no bar at this timestamp carries its last close forward
+    gap = np.isnan(c) & ~np.isnan(prev_close)
+    c = np.where(gap, prev_close, c)
+    o, h, l = (np.where(gap | np.isnan(a), c, a) for a in (o, h, l))
+    valid = ~np.isnan(c)
+    x = np.where(valid, c, 0.0)
+    state["count"] += valid
+
+    pos = state["pos"]
+    ring, ring_valid = state["ring"], state["ring_valid"]
+    for w in SMA_WINDOWS:
+        out = (pos - w) % RING
+        state["sum"][w] += x - ring[out]
+        state["cnt"][w] += valid - ring_valid[out]
+    out = (pos - BB_WINDOW) % RING
+    state["sumsq"] += x * x - ring[out] ** 2
+    ring[pos], ring_valid[pos] = x, valid
+    state["pos"] = (pos + 1) % RING
+
+    outputs = {"close": np.where(valid, c, np.nan)}
+    for w in SMA_WINDOWS:
+        outputs[f"sma_{w}"] = np.where(state["cnt"][w] == w, state["sum"][w] / w, np.nan)
+    mean = outputs["sma_20"]
+    std = np.sqrt(np.maximum(state["sumsq"] / BB_WINDOW - mean ** 2, 0.0))
+    outputs.update(bb_middle=mean, bb_upper=mean + BB_K * std, bb_lower=mean - BB_K * std)
+
+    cnt = state["count"]
+    state["ema_20"] = _ema(state["ema_20"], c, 2 / 21)
+    outputs["ema_20"] = np.where(cnt >= 20, state["ema_20"], np.nan)
+
+    state["ema_fast"] = _ema(state["ema_fast"], c, 2 / (MACD_FAST + 1))
+    state["ema_slow"] = _ema(state["ema_slow"], c, 2 / (MACD_SLOW + 1))
+    macd = state["ema_fast"] - state["ema_slow"]
+    state["signal"] = _ema(state["signal"], np.where(cnt >= MACD_SLOW, macd, np.nan), 2 / (MACD_SIGNAL + 1))
+    hist = macd - state["signal"]
+    ready = cnt >= MACD_SLOW + MACD_SIGNAL
+    outputs["macd"] = np.where(cnt >= MACD_SLOW, macd, np.nan)
+    outputs["macd_signal"] = np.where(ready, state["signal"], np.nan)
+    outputs["macd_hist"] = np.where(ready, hist, np.nan)
+    outputs["macd_hist_prev"] = np.where(ready, state["prev_hist"], np.nan)
+    state["prev_hist"] = np.where(ready, hist, state["prev_hist"])
+
+    has_prev = valid & ~np.isnan(prev_close)
+    d = np.where(has_prev, c - prev_close, np.nan)
+    state["avg_gain"] = _ema(state["avg_gain"], np.where(has_prev, np.maximum(d, 0.0), np.nan), 1 / RSI_N)
+    state["avg_loss"] = _ema(state["avg_loss"], np.where(has_prev, np.maximum(-d, 0.0), np.nan), 1 / RSI_N)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = state["avg_gain"] / state["avg_loss"]
+        rsi = np.where(state["avg_loss"] == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    outputs["rsi_14"] = np.where(cnt > RSI_N, rsi, np.nan)
+
+    tr = np.where(
+        has_prev,
+        np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close))),
+        np.where(valid, h - l, np.nan),
+    )
+    state["atr"] = _ema(state["atr"], tr, 1 / ATR_N)
+    outputs["atr_14"] = np.where(cnt >= ATR_N, state["atr"], np.nan)
+
+    state["prev_close"] = np.where(valid, c, prev_close)
+    return outputs
+
+
+class IndicatorEngine:
+    """Committed indicator state for a fixed symbol list, plus a provisional evaluation of the live bar."""
+
+    def __init__(self, symbols: list[str]):
+        self.symbols = list(symbols)
+        self.state = _initial_state(len(self.symbols))
+        self.dates: list = []
+        self.history: dict[str, list[np.ndarray]] = {k: [] for k in OUTPUTS}
+        self.lock = threading.Lock()
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    def commit(self, date, o, h, l, c) -> dict:
+        outputs = step(self.state, o, h, l, c)
+        self.dates.append(date)
+        for k in OUTPUTS:
+            self.history[k].append(outputs[k])
+        if len(self.dates) > HISTORY_LIMIT:
+            del self.dates[:-HISTORY_LIMIT]
+            for k in OUTPUTS:
+                del self.history[k][:-HISTORY_LIMIT]
+        return outputs
+
+    def evaluate(self, o, h, l, c) -> dict:
+        return step(copy.deepcopy(self.state), o, h, l, c)
+
+    def series(self, name: str, last: int) -> np.ndarray:
+        """(last, N) committed values of one output."""
+        rows = self.history[name][-last:] if last else []
+        return np.vstack(rows) if rows else np.empty((0, len(self.symbols)))
@@ -0,0 +1,52 @@
+"""
+Money-weighted returns (XIRR) for many cashflow streams at once.
+
+Each row of `amounts` is one stream on the shared `years` time axis (negative =
+money in, positive = money out / value). Newton's method runs on all rows
+together; rows it can't settle fall back to bisection on [-99.99%, +10000%].
+"""
+import numpy as np
+
+LOW, HIGH = -0.9999, 100.0
+
+
+def _npv(amounts: np.ndarray, years: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    return (amounts * (1.0 + rate)[:, None] ** -years[None, :]).sum(axis=1)
+
+
+def xirr(amounts: np.ndarray, years: np.ndarray, guess: float = 0.1, tol: float = 1e-9) -> np.ndarray:
+    """(H,) annualised internal rates of return; NaN for rows without both an inflow and an outflow."""
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    years = np.asarray(years, dtype=float) - float(np.min(years))
+    h = amounts.shape[0]
+    valid = (amounts < 0).any(axis=1) & (amounts > 0).any(axis=1)
+    scale = np.maximum(np.abs(amounts).sum(axis=1), 1e-12)
+    rate = np.full(h, guess)
+    done = ~valid
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(50):
+            disc = (1.0 + rate)[:, None] ** -years[None, :]
+            f = (amounts * disc).sum(axis=1)
+            fp = (-years[None, :] * amounts * disc / (1.0 + rate)[:, None]).sum(axis=1)
+            step = np.where(done | (fp == 0), 0.0, f / fp)
+            rate = np.clip(rate - step, LOW, HIGH)
+            done |= np.abs(f) < tol * scale
+            if done.all():
+                break
+        ok = done & valid & (np.abs(_npv(amounts, years, rate)) < 1e-6 * scale)
+        # Bisection for the rest (requires a sign change over the bracket)
+        todo = valid & ~ok
+        if todo.any():
+            a = amounts[todo]
+            lo, hi = np.full(len(a), LOW), np.full(len(a), HIGH)
+            f_lo = _npv(a, years, lo)
+            bracketed = np.sign(f_lo) != np.sign(_npv(a, years, hi))
+            for _ in range(200):
+                mid = (lo + hi) / 2
+                f_mid = _npv(a, years, mid)
+                left = np.sign(f_mid) == np.sign(f_lo)
+                lo, f_lo = np.where(left, mid, lo), np.where(left, f_mid, f_lo)
+                hi = np.where(left, hi, mid)
+            rate[todo] = np.where(bracketed, (lo + hi) / 2, np.nan)
+    rate[~valid] = np.nan
+    return rate
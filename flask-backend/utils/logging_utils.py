@@ -1,10 +1,18 @@
-import time, uuid
+import time
+from utils.metrics import SPAN_DURATION
+from utils.tracing import current_trace_id, new_trace_id
 
 class StepTimer:
+    """Prints step timings and records the total in the span histogram (kind="step").
+
+    Use start()/step()/error() as before and end() when done, or as a context
+    manager: `with StepTimer("QUOTES") as tm: ...`.
+    """
     def __init__(self, label: str, req_id: str | None = None):
         self.label = label
-        self.req_id = req_id or str(uuid.uuid4())[:8]
+        self.req_id = req_id or current_trace_id() or new_trace_id()[:8]
         self.t0 = None
+        self._recorded = False
     def start(self, msg: str):
         self.t0 = time.time()
         print(f"[{self.req_id}] ⏳ {self.label} - {msg}")
@@ -15,3 +23,18 @@ class StepTimer:
     def error(self, msg: str):
         el = (time.time() - self.t0) * 1000 if self.t0 else 0
         print(f"[{self.req_id}] ❌ {self.label} - {msg} ({el:.0f} ms)")
+        self._record("error")
+    def end(self, msg: str | None = None):
+        if msg: self.step(msg)
+        self._record("ok")
+    def _record(self, status: str):
+        if self._recorded or self.t0 is None: return
+        self._recorded = True
+        SPAN_DURATION.observe(time.time() - self.t0, kind="step", name=self.label, status=status)
+    def __enter__(self):
+        if self.t0 is None: self.t0 = time.time()
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None: self.error(f"failed: {exc}")
+        else: self._record("ok")
+        return False
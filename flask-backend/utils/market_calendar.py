@@ -0,0 +1,157 @@
+"""
+IST trading calendar for NSE/BSE cash markets and calendar-aware cache TTLs.
+
+- quote_ttl(): short TTL while the session is live, valid until the next open otherwise
+- daily_ttl(): short TTL in session, valid until the next close otherwise
+
+Holidays come from NSE's trading-holiday circulars; add extra dates (or years
+not listed here) with MARKET_HOLIDAYS="2027-01-26,2027-03-22".
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from config import Config
+
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+
+NSE_HOLIDAYS = {
+    # 2025
+    date(2025, 2, 26),   # Mahashivratri
+    date(2025, 3, 14),   # Holi
+    date(2025, 3, 31),   # Id-Ul-Fitr
+    date(2025, 4, 10),   # Shri Mahavir Jayanti
+    date(2025, 4, 14),   # Dr. Baba Saheb Ambedkar Jayanti
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 5, 1),    # Maharashtra Day
+    date(2025, 8, 15),   # Independence Day
+    date(2025, 8, 27),   # Ganesh Chaturthi
+    date(2025, 10, 2),   # Mahatma Gandhi Jayanti / Dussehra
+    date(2025, 10, 21),  # Diwali Laxmi Pujan (muhurat session only)
+    date(2025, 10, 22),  # Diwali Balipratipada
+    date(2025, 11, 5),   # Guru Nanak Jayanti
+    date(2025, 12, 25),  # Christmas
+    # 2026
+    date(2026, 1, 26),   # Republic Day
+    date(2026, 3, 3),    # Holi
+    date(2026, 3, 26),   # Shri Ram Navami
+    date(2026, 3, 31),   # Shri Mahavir Jayanti
+    date(2026, 4, 3),    # Good Friday
+    date(2026, 4, 14),   # Dr. Baba Saheb Ambedkar Jayanti
+    date(2026, 5, 1),    # Maharashtra Day
+    date(2026, 5, 28),   # Bakri Id
+    date(2026, 6, 26),   # Muharram
+    date(2026, 9, 14),   # Ganesh Chaturthi
+    date(2026, 10, 2),   # Mahatma Gandhi Jayanti
+    date(2026, 10, 20),  # Dussehra
+    date(2026, 11, 10),  # Diwali Balipratipada
+    date(2026, 11, 24),  # Guru Nanak Jayanti
+    date(2026, 12, 25),  # Christmas
+}
+
+
+def _extra_holidays() -> set[date]:
+    out = set()
+    for s in Config.MARKET_HOLIDAYS:
+        try:
+            out.add(date.fromisoformat(s))
+        except ValueError:
+            print(f"[CALENDAR] ignoring bad MARKET_HOLIDAYS entry: {s}")
+    return out
+
+
+HOLIDAYS = NSE_HOLIDAYS | _extra_holidays()
+
+
+def now_ist() -> datetime:
+    return datetime.now(IST)
+
+
+def _ist(ts: datetime | None) -> datetime:
+    if ts is None:
+        return now_ist()
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=IST)
+    return ts.astimezone(IST)
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in HOLIDAYS
+
+
+def _session_bounds(d: date) -> tuple[datetime, datetime]:
+    return datetime.combine(d, SESSION_OPEN, IST), datetime.combine(d, SESSION_CLOSE, IST)
+
+
+def is_market_open(ts: datetime | None = None) -> bool:
+    ts = _ist(ts)
+    if not is_trading_day(ts.date()):
+        return False
+    open_, close = _session_bounds(ts.date())
+    return open_ <= ts < close
+
+
+def _settled_close(d: date) -> datetime:
+    # Vendors keep revising the last bar for a few minutes after the bell.
+    return _session_bounds(d)[1] + timedelta(minutes=Config.MARKET_SETTLE_MINUTES)
+
+
+def in_live_window(ts: datetime | None = None) -> bool:
+    """Session hours plus the post-close settle window."""
+    ts = _ist(ts)
+    if not is_trading_day(ts.date()):
+        return False
+    return _session_bounds(ts.date())[0] <= ts < _settled_close(ts.date())
+
+
+def next_trading_day(d: date) -> date:
+    d = d + timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+
+def next_open(ts: datetime | None = None) -> datetime:
+    ts = _ist(ts)
+    d = ts.date()
+    if is_trading_day(d) and ts < _session_bounds(d)[0]:
+        return _session_bounds(d)[0]
+    return _session_bounds(next_trading_day(d))[0]
+
+
+def next_close(ts: datetime | None = None) -> datetime:
+    ts = _ist(ts)
+    d = ts.date()
+    if is_trading_day(d) and ts < _settled_close(d):
+        return _settled_close(d)
+    return _settled_close(next_trading_day(d))
+
+
+def _seconds_until(target: datetime, ts: datetime) -> int:
+    return max(1, int((target - ts).total_seconds()))
+
+
+def quote_ttl(base: int, ts: datetime | None = None) -> int:
+    """TTL for quotes/intraday/pricemap: `base` in session (never past the settle window), else until the next open."""
+    ts = _ist(ts)
+    if in_live_window(ts):
+        return max(1, min(base, _seconds_until(_settled_close(ts.date()), ts)))
+    return max(base, _seconds_until(next_open(ts), ts))
+
+
+def daily_ttl(base: int, ts: datetime | None = None) -> int:
+    """TTL for daily-bar data: `base` in session, else until the next close."""
+    ts = _ist(ts)
+    if in_live_window(ts):
+        return max(1, min(base, _seconds_until(_settled_close(ts.date()), ts)))
+    return max(base, _seconds_until(next_close(ts), ts))
+
+
+def session_status(ts: datetime | None = None) -> dict:
+    ts = _ist(ts)
+    return {
+        "now": ts.isoformat(),
+        "is_trading_day": is_trading_day(ts.date()),
+        "is_open": is_market_open(ts),
+        "next_open": next_open(ts).isoformat(),
+        "next_close": next_close(ts).isoformat(),
+    }
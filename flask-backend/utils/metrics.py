@@ -0,0 +1,156 @@
+"""
+In-process counters and latency histograms with Prometheus text rendering.
+
+Histograms use fixed buckets (Prometheus-compatible); p50/p95/p99 for the JSON
+summary are interpolated from those buckets.
+"""
+import math
+import threading
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: tuple, extra: tuple = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {v:g}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {",".join(f"{k}={v}" for k, v in key): val for key, val in self._values.items()}
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            i = 0
+            while i < len(self.buckets) and value > self.buckets[i]:
+                i += 1
+            s["counts"][i] += 1
+            s["sum"] += value
+            s["count"] += 1
+
+    def quantile(self, q: float, **labels) -> float | None:
+        s = self._series.get(_labels_key(labels))
+        return self._quantile(s, q) if s else None
+
+    def _quantile(self, s: dict, q: float) -> float | None:
+        total = s["count"]
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(s["counts"]):
+            if seen + c >= rank and c > 0:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * ((rank - seen) / c)
+            seen += c
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, s in sorted(self._series.items()):
+                cum = 0
+                for b, c in zip(self.buckets, s["counts"]):
+                    cum += c
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', f'{b:g}'),))} {cum}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {s['count']}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {s['sum']:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {s['count']}")
+        return lines
+
+    def snapshot(self) -> dict:
+        out = {}
+        with self._lock:
+            for key, s in self._series.items():
+                label = ",".join(f"{k}={v}" for k, v in key)
+                ms = lambda x: None if x is None or math.isnan(x) else round(x * 1000, 2)
+                out[label] = {
+                    "count": s["count"],
+                    "mean_ms": ms(s["sum"] / s["count"]) if s["count"] else None,
+                    "p50_ms": ms(self._quantile(s, 0.50)),
+                    "p95_ms": ms(self._quantile(s, 0.95)),
+                    "p99_ms": ms(self._quantile(s, 0.99)),
+                }
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for m in list(self._metrics.values()):
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: m.snapshot() for name, m in list(self._metrics.items())}
+
+
+REGISTRY = Registry()
+
+SPAN_DURATION = REGISTRY.histogram(
+    "portfolio_span_duration_seconds",
+    "Duration of traced spans by kind (route, node, tool, upstream, step), name and status",
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "portfolio_cache_requests_total",
+    "In-process cache lookups by cache name and result (hit/miss)",
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,29 @@
+"""
+Correlated Monte Carlo kernels.
+
+Kept free of app imports: process-pool workers are started with "spawn" and
+re-import only this module (and NumPy) to run a chunk.
+"""
+import numpy as np
+
+
+def correlated_factor(cov: np.ndarray) -> np.ndarray:
+    """Lower Cholesky factor of `cov`, with a small diagonal jitter for near-singular matrices."""
+    k = len(cov)
+    jitter = 1e-12 * max(float(np.trace(cov)) / max(k, 1), 1e-12)
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + np.eye(k) * jitter)
+        except np.linalg.LinAlgError:
+            jitter *= 100
+    # Not positive definite even with jitter (e.g. more assets than observations): eigen clip
+    vals, vecs = np.linalg.eigh(cov)
+    return vecs * np.sqrt(np.clip(vals, 0.0, None))
+
+
+def portfolio_returns_chunk(chol: np.ndarray, mu: np.ndarray, w: np.ndarray, horizon: int, n: int, seed) -> np.ndarray:
+    """Portfolio simple returns for `n` paths: correlated horizon log returns per asset, then weighted."""
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((n, len(mu)))
+    x = z @ chol.T * np.sqrt(horizon) + mu * horizon
+    return np.expm1(x) @ w
@@ -0,0 +1,85 @@
+"""
+Portfolio construction primitives (NumPy only).
+
+- ledoit_wolf(): covariance shrunk towards a scaled identity, intensity from
+  the Ledoit-Wolf (2004) formula, computed without a per-row loop
+- QPSolver: min 1/2 w'Pw + q'w  s.t.  l <= Aw <= u, solved by ADMM (the OSQP
+  iteration). The linear system is inverted once per (P, A), so a frontier
+  sweep (same P and constraints, different q) costs a few matvecs per
+  iteration, and every solve starts from the previous solution
+- risk_parity(): equal-risk-contribution weights by cyclical coordinate descent
+"""
+import numpy as np
+
+
+def ledoit_wolf(x: np.ndarray) -> tuple[np.ndarray, float]:
+    """Shrunk covariance of (T, N) returns and the shrinkage intensity in [0, 1]."""
+    t, n = x.shape
+    xc = x - x.mean(axis=0)
+    s = xc.T @ xc / t
+    mu = np.trace(s) / n
+    target = mu * np.eye(n)
+    d2 = np.sum((s - target) ** 2) / n
+    # sum_t ||x_t x_t' - S||_F^2 = sum_t ||x_t||^4 - T ||S||_F^2
+    b2 = (np.sum(np.sum(xc ** 2, axis=1) ** 2) - t * np.sum(s ** 2)) / (t ** 2 * n)
+    shrink = float(min(max(b2, 0.0), d2) / d2) if d2 > 0 else 1.0
+    return shrink * target + (1 - shrink) * s * t / max(t - 1, 1), shrink
+
+
+class QPSolver:
+    """ADMM for a fixed (P, A, l, u); solve(q) may be called many times."""
+
+    def __init__(self, p: np.ndarray, a: np.ndarray, l: np.ndarray, u: np.ndarray,
+                 rho: float = 0.1, sigma: float = 1e-6, alpha: float = 1.6):
+        self.p, self.a, self.l, self.u = p, a, l, u
+        self.alpha, self.sigma = alpha, sigma
+        # Equality rows get a much stiffer penalty (as OSQP does)
+        self.rho = np.where(np.isclose(l, u), rho * 1e3, rho)
+        k = p + sigma * np.eye(p.shape[0]) + a.T @ (self.rho[:, None] * a)
+        self.k_inv = np.linalg.inv(k)
+        self.x = np.zeros(p.shape[0])
+        self.z = np.clip(np.zeros(a.shape[0]), l, u)
+        self.y = np.zeros(a.shape[0])
+
+    def solve(self, q: np.ndarray, max_iter: int = 4000, eps_abs: float = 1e-7, eps_rel: float = 1e-6) -> tuple[np.ndarray, int]:
+        p, a, l, u, rho = self.p, self.a, self.l, self.u, self.rho
+        x, z, y = self.x, self.z, self.y
+        it = 0
+        for it in range(1, max_iter + 1):
+            xt = self.k_inv @ (self.sigma * x - q + a.T @ (rho * z - y))
+            zt = a @ xt
+            x = self.alpha * xt + (1 - self.alpha) * x
+            zr = self.alpha * zt + (1 - self.alpha) * z
+            z_new = np.clip(zr + y / rho, l, u)
+            y = y + rho * (zr - z_new)
+            z = z_new
+            if it % 10 == 0:
+                ax, px, aty = a @ x, p @ x, a.T @ y
+                primal = np.max(np.abs(ax - z))
+                dual = np.max(np.abs(px + q + aty))
+                inf = lambda v: np.max(np.abs(v)) if len(v) else 0.0
+                if primal <= eps_abs + eps_rel * max(inf(ax), inf(z)) and \
+                        dual <= eps_abs + eps_rel * max(inf(px), inf(aty), inf(q)):
+                    break
+        self.x, self.z, self.y = x, z, y
+        return x.copy(), it
+
+
+def risk_parity(cov: np.ndarray, budget: np.ndarray | None = None, max_iter: int = 500, tol: float = 1e-10) -> np.ndarray:
+    """Long-only weights whose risk contributions w_i (Cov w)_i are proportional to `budget`."""
+    n = len(cov)
+    b = np.full(n, 1.0 / n) if budget is None else budget / budget.sum()
+    diag = np.diag(cov)
+    x = 1.0 / np.sqrt(np.maximum(diag, 1e-18))
+    cx = cov @ x
+    for _ in range(max_iter):
+        prev = x.copy()
+        for i in range(n):
+            # Root of diag_i x_i^2 + c_i x_i - b_i = 0, c_i = (Cov x)_i without the own term
+            c = cx[i] - diag[i] * x[i]
+            new = (-c + np.sqrt(c * c + 4 * diag[i] * b[i])) / (2 * diag[i])
+            cx += cov[:, i] * (new - x[i])
+            x[i] = new
+        if np.max(np.abs(x - prev)) < tol * np.max(x):
+            break
+    return x / x.sum()
@@ -0,0 +1,240 @@
+"""
+Resilience helpers for market services.
+
+- CircuitBreaker per upstream ("yfinance", "indianapi"): after
+  BREAKER_FAILURE_THRESHOLD consecutive failures calls fail fast for
+  BREAKER_RESET_SECONDS, then a single probe call is let through.
+  yf.download swallows per-ticker errors and returns an empty frame, so
+  guarded_download() counts a frame without any bars as a failure only when
+  yfinance recorded a transport/HTTP error; unknown or delisted symbols just
+  come back without bars (null per symbol) and never trip the breaker.
+- serve_cached(): stale-while-revalidate over utils.cache_utils. Expired entries
+  younger than SWR_MAX_STALE are returned immediately (marked stale) and
+  refreshed in the background; older ones are only used as a last-known-good
+  copy when the upstream call fails.
+
+Stale payloads carry `"stale": true` and `"as_of": <ISO time of the fetch>`.
+"""
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable
+from config import Config
+from utils.cache_utils import get_entry, cache_key, note_freshness
+from utils.metrics import REGISTRY, record_cache
+
+STALE_SERVED = REGISTRY.counter("portfolio_stale_served_total", "Responses served from stale or last-known-good data by cache name and reason")
+BREAKER_REJECTED = REGISTRY.counter("portfolio_circuit_rejected_total", "Upstream calls rejected by an open circuit breaker")
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class UpstreamError(RuntimeError):
+    """yfinance could not be reached (it reports this per ticker instead of raising)."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.time() - self.opened_at >= self.reset_timeout else "open"
+
+    def _allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def _success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def _failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"[BREAKER] {self.name} open after {self.failures} failures")
+                self.opened_at = time.time()
+            self._probing = False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if not self._allow():
+            BREAKER_REJECTED.inc(upstream=self.name)
+            raise CircuitOpenError(f"{self.name} circuit open; retry in {self.retry_after():.0f}s")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._failure()
+            raise
+        self._success()
+        return result
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.time() - self.opened_at))
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "retry_after_s": round(self.retry_after(), 1)}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream, Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_RESET_SECONDS)
+        return _breakers[upstream]
+
+
+def guarded(upstream: str, fn: Callable, *args, **kwargs):
+    """Call `fn` through the circuit breaker of `upstream`."""
+    return get_breaker(upstream).call(fn, *args, **kwargs)
+
+
+# yfinance's per-ticker error messages that mean "could not reach Yahoo" rather than "no such symbol"
+_TRANSPORT_ERROR = re.compile(r"timed? ?out|connect|ssl|rate.?limit|too many requests|\b429\b|\b5\d\d\b|curl", re.I)
+
+
+def _yf_errors() -> dict:
+    """{ticker: message} yfinance recorded during the last download."""
+    try:
+        from yfinance import shared
+    except ImportError:
+        return {}
+    return dict(getattr(shared, "_ERRORS", None) or {})
+
+
+def guarded_download(download: Callable, symbols: list[str], **kwargs):
+    """`download(symbols, **kwargs)` (yf.download) through the "yfinance" breaker.
+
+    A frame without any bars is raised as UpstreamError (a breaker failure, so
+    callers fall back to stale / last-known-good data) only when yfinance
+    recorded a transport/HTTP error; otherwise it is returned and the symbols
+    are simply missing from it.
+    """
+    def _call():
+        df = download(symbols, **kwargs)
+        if df is None or df.empty or df.dropna(how="all").empty:
+            transport = [m for m in map(str, _yf_errors().values()) if _TRANSPORT_ERROR.search(m)]
+            if transport:
+                raise UpstreamError(f"yfinance download failed: {transport[0]}")
+        return df
+    return guarded("yfinance", _call)
+
+
+def is_upstream_failure(e: Exception) -> bool:
+    """Open breaker or transport/HTTP error, as opposed to one symbol's lookup failing."""
+    return isinstance(e, (CircuitOpenError, UpstreamError)) or bool(_TRANSPORT_ERROR.search(f"{type(e).__name__}: {e}"))
+
+
+def guarded_lookup(upstream: str, fn: Callable, *args, **kwargs):
+    """guarded() for a per-symbol lookup: only is_upstream_failure() errors count against
+    the breaker, so a bad or delisted ticker cannot open it for everyone."""
+    def _call():
+        try:
+            return None, fn(*args, **kwargs)
+        except Exception as e:
+            if is_upstream_failure(e):
+                raise
+            return e, None
+    error, result = guarded(upstream, _call)
+    if error is not None:
+        raise error
+    return result
+
+
+def breaker_states() -> dict:
+    return {name: b.snapshot() for name, b in list(_breakers.items())}
+
+
+def as_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def mark_stale(payload: Any, ts: float, per_symbol: bool = False) -> Any:
+    """Copy of `payload` with stale/as_of markers (on every symbol row when `per_symbol`)."""
+    marker = {"stale": True, "as_of": as_of(ts)}
+    if not isinstance(payload, dict):
+        return payload
+    if per_symbol:
+        return {k: ({**v, **marker} if isinstance(v, dict) else v) for k, v in payload.items()}
+    return {**payload, **marker}
+
+
+_executor = ThreadPoolExecutor(max_workers=Config.SWR_WORKERS, thread_name_prefix="swr")
+_inflight: set[str] = set()
+_inflight_lock = threading.Lock()
+
+
+def revalidate(key: str, loader: Callable[[], Any]) -> bool:
+    """Run `loader` in the background unless a refresh for `key` is already in flight."""
+    with _inflight_lock:
+        if key in _inflight:
+            return False
+        _inflight.add(key)
+
+    def _run():
+        try:
+            loader()
+        except Exception as e:
+            print(f"[SWR] background refresh of {key} failed: {e}")
+        finally:
+            with _inflight_lock:
+                _inflight.discard(key)
+
+    _executor.submit(contextvars.copy_context().run, _run)
+    return True
+
+
+def serve_cached(prefix: str, params: dict, loader: Callable[[], Any], per_symbol: bool = False) -> Any:
+    """Fresh cache entry, else stale-while-revalidate, else `loader()` with last-known-good fallback.
+
+    `loader` fetches from the upstream and stores the result with set_cached().
+    """
+    entry = get_entry(prefix, params)
+    now = time.time()
+    key = cache_key(prefix, params)
+    if entry and now < entry["exp"]:
+        record_cache(prefix, True)
+        note_freshness(entry["ts"], entry["exp"], key=key)
+        return entry["data"]
+    record_cache(prefix, False)
+    if entry and now - entry["exp"] < Config.SWR_MAX_STALE:
+        revalidate(key, loader)
+        note_freshness(entry["ts"], now, stale=True, key=key)
+        STALE_SERVED.inc(cache=prefix, reason="revalidating")
+        return mark_stale(entry["data"], entry["ts"], per_symbol)
+    try:
+        return loader()
+    except Exception as e:
+        if entry and now - entry["ts"] < Config.LKG_MAX_AGE:
+            print(f"[SWR] {prefix} upstream failed ({e}); serving last-known-good from {as_of(entry['ts'])}")
+            STALE_SERVED.inc(cache=prefix, reason="upstream_error")
+            note_freshness(entry["ts"], now, stale=True, key=key)
+            return mark_stale(entry["data"], entry["ts"], per_symbol)
+        raise
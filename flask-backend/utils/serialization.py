@@ -0,0 +1,110 @@
+"""
+JSON serialization for market and tool payloads.
+
+Uses orjson when installed (optional; falls back to the stdlib encoder) with
+native handling of NumPy scalars/arrays, pandas Timestamps/NaT, datetimes,
+Decimals and sets. Routes return service objects straight through the app's
+JSON provider (install_json_provider); the LangChain tools still get strings
+from dumps().
+
+Datetimes are emitted as ISO 8601 and NaN/NaT as null (orjson) on both paths.
+"""
+import datetime as _dt
+import decimal
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+_ORJSON_OPTS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(obj):
+    if pd is not None:
+        if obj is pd.NaT:
+            return None
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return obj.tolist()
+        if isinstance(obj, pd.DataFrame):
+            return obj.to_dict(orient="records")
+    if np is not None:
+        if isinstance(obj, np.generic):
+            v = obj.item()
+            return None if isinstance(v, float) and not math.isfinite(v) else v
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    if isinstance(obj, (_dt.datetime, _dt.date, _dt.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_key(k):
+    return k if isinstance(k, (str, int, float, bool)) or k is None else str(_default(k))
+
+
+def _stdlib_prepare(obj):
+    # The stdlib encoder rejects non-string keys like Timestamps; orjson handles them natively
+    if isinstance(obj, dict):
+        return {_stdlib_key(k): _stdlib_prepare(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_stdlib_prepare(v) for v in obj]
+    return obj
+
+
+def dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTS)
+    return json.dumps(_stdlib_prepare(obj), default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(s: str | bytes):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def install_json_provider(app):
+    """Make jsonify/response serialization use dumps_bytes()."""
+    from flask.json.provider import DefaultJSONProvider
+
+    class FastJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            if kwargs:
+                kwargs.setdefault("default", _default)
+                return super().dumps(obj, **kwargs)
+            return dumps(obj)
+
+        def loads(self, s, **kwargs):
+            return super().loads(s, **kwargs) if kwargs else loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+    app.json = FastJSONProvider(app)
+    return app
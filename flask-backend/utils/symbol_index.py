@@ -0,0 +1,196 @@
+import csv
+import os
+import re
+import threading
+from config import Config
+
+_STOPWORDS = {"ltd", "limited", "the", "of", "and", "co"}
+_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _tokens(text: str) -> list[str]:
+    return [t for t in _SPLIT_RE.split(text.lower()) if t and t not in _STOPWORDS]
+
+
+def _grams(text: str, n: int = 3) -> set[str]:
+    s = f" {' '.join(_tokens(text))} "
+    if len(s) <= n:
+        return {s}
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.ids: list[int] = []
+
+
+class SymbolIndex:
+    """In-memory NSE/BSE symbol master with a prefix trie and a trigram index.
+
+    Exact symbols and name-token prefixes are answered from the trie; anything
+    else (typos, partial names) falls back to trigram Dice similarity.
+    """
+
+    def __init__(self, rows: list[dict]):
+        self.symbols: list[str] = []
+        self.names: list[str] = []
+        self.sectors: list[str] = []
+        self.exchanges: list[tuple[str, ...]] = []
+        self._by_symbol: dict[str, int] = {}
+        self._root = _TrieNode()
+        self._postings: dict[str, list[int]] = {}
+        self._keys: list[tuple[int, int]] = []  # (entry, gram count) per symbol, name and name token
+
+        for row in rows:
+            sym = (row.get("symbol") or "").strip().upper()
+            if not sym or sym in self._by_symbol:
+                continue
+            idx = len(self.symbols)
+            name = (row.get("name") or sym).strip()
+            self.symbols.append(sym)
+            self.names.append(name)
+            self.sectors.append((row.get("sector") or "").strip() or None)
+            self.exchanges.append(tuple(e for e in (row.get("exchanges") or "NS").split("|") if e))
+            self._by_symbol[sym] = idx
+
+            self._insert(sym.lower(), idx)
+            for tok in _tokens(name):
+                self._insert(tok, idx)
+
+            # Symbol, full name and each name token are scored separately, so a
+            # long name does not dilute a close match on one of its parts
+            for key in dict.fromkeys([sym, name] + _tokens(name)):
+                grams = _grams(key)
+                for g in grams:
+                    self._postings.setdefault(g, []).append(len(self._keys))
+                self._keys.append((idx, len(grams)))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _insert(self, key: str, idx: int):
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+        if idx not in node.ids:
+            node.ids.append(idx)
+
+    def _prefix(self, key: str, limit: int) -> list[int]:
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        out, stack = [], [node]
+        while stack and len(out) < limit:
+            n = stack.pop()
+            out.extend(i for i in n.ids if i not in out)
+            stack.extend(n.children.values())
+        return out[:limit]
+
+    def _entry(self, idx: int, score: float, exchange: str | None = None) -> dict:
+        sym = self.symbols[idx]
+        exchanges = self.exchanges[idx]
+        return {
+            "symbol": sym,
+            "name": self.names[idx],
+            "sector": self.sectors[idx],
+            "exchanges": list(exchanges),
+            "yf_symbol": self.yf_symbol(sym, exchange),
+            "score": round(score, 3),
+        }
+
+    def get(self, symbol: str) -> dict | None:
+        idx = self._by_symbol.get(symbol.strip().upper())
+        return None if idx is None else self._entry(idx, 1.0)
+
+    def yf_symbol(self, symbol: str, exchange: str | None = None) -> str:
+        """Yahoo symbol for `symbol`, preferring NSE and falling back to BSE."""
+        sym = symbol.strip().upper()
+        idx = self._by_symbol.get(sym)
+        if sym.startswith("^"):
+            return sym
+        exchanges = self.exchanges[idx] if idx is not None else ("NS",)
+        if exchange and exchange.upper() in exchanges:
+            return f"{sym}.{exchange.upper()}"
+        if "NS" in exchanges or "BO" not in exchanges:
+            return f"{sym}.NS"
+        return f"{sym}.BO"
+
+    def search(self, query: str, limit: int = 5, exchange: str | None = None, sector: str | None = None) -> list[dict]:
+        q = (query or "").strip()
+        if not q:
+            return []
+        scores: dict[int, float] = {}
+        similarity: dict[int, float] = {}  # summed over an entry's keys, breaks score ties
+
+        exact = self._by_symbol.get(q.upper())
+        if exact is not None:
+            scores[exact] = 1.0
+
+        for idx in self._prefix(q.lower(), limit * 4):
+            if self.symbols[idx].startswith(q.upper()):
+                scores[idx] = max(scores.get(idx, 0.0), 0.9)
+
+        toks = _tokens(q)
+        if toks:
+            hits = None
+            for tok in toks:
+                ids = set(self._prefix(tok, 256))
+                hits = ids if hits is None else hits & ids
+            for idx in hits or ():
+                scores[idx] = max(scores.get(idx, 0.0), 0.8)
+
+        if len(scores) < limit:
+            qgrams = _grams(q)
+            shared: dict[int, int] = {}
+            for g in qgrams:
+                for key in self._postings.get(g, ()):
+                    shared[key] = shared.get(key, 0) + 1
+            for key, n in shared.items():
+                idx, count = self._keys[key]
+                dice = 2.0 * n / (len(qgrams) + count)
+                similarity[idx] = similarity.get(idx, 0.0) + dice
+                if dice >= 0.3:
+                    scores[idx] = max(scores.get(idx, 0.0), 0.75 * dice)
+
+        if sector:
+            s = sector.lower()
+            scores = {i: v for i, v in scores.items() if (self.sectors[i] or "").lower() == s}
+        if exchange:
+            ex = exchange.upper()
+            scores = {i: v for i, v in scores.items() if ex in self.exchanges[i]}
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -similarity.get(kv[0], 0.0), len(self.symbols[kv[0]])))
+        return [self._entry(i, s, exchange) for i, s in ranked[:limit] if s > 0]
+
+    def resolve(self, query: str, exchange: str | None = None) -> dict | None:
+        hits = self.search(query, limit=1, exchange=exchange)
+        return hits[0] if hits else None
+
+
+_index: SymbolIndex | None = None
+_lock = threading.Lock()
+
+
+def load_symbol_index(path: str | None = None) -> SymbolIndex:
+    path = path or Config.SYMBOL_MASTER_PATH
+    rows = []
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        print(f"[SYMBOLS] symbol master not found: {path}")
+    return SymbolIndex(rows)
+
+
+def get_symbol_index() -> SymbolIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = load_symbol_index()
+    return _index
@@ -1,10 +1,23 @@
+from utils.symbol_index import get_symbol_index
+
 def normalize_ticker(ticker: str) -> str:
     t = ticker.strip().upper()
     if t.startswith("^"):
         return t
     if "." in t:
         return t
-    return f"{t}.NS"
+    return get_symbol_index().yf_symbol(t)
+
+def fallback_ticker(yf_ticker: str) -> str | None:
+    """Alternate-exchange symbol for a dual-listed ticker (RELIANCE.NS -> RELIANCE.BO)."""
+    if "." not in yf_ticker:
+        return None
+    base, ex = yf_ticker.rsplit(".", 1)
+    entry = get_symbol_index().get(base)
+    if not entry:
+        return None
+    alt = "BO" if ex == "NS" else "NS"
+    return f"{base}.{alt}" if alt in entry["exchanges"] else None
 
 def batch_normalize(tickers: list[str]) -> list[str]:
     return list(dict.fromkeys([normalize_ticker(t) for t in tickers]))
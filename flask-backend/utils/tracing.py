@@ -0,0 +1,171 @@
+"""
+Request-scoped trace ids and context-managed spans.
+
+    with span("yf.download", kind="upstream", upstream="yfinance"):
+        df = yf.download(...)
+
+Every span is recorded in the portfolio_span_duration_seconds histogram. The
+trace id lives in a contextvar so it follows the request through LangGraph
+nodes and tools (LangChain's executors copy the context). When
+OTEL_EXPORTER_OTLP_ENDPOINT is set and the OpenTelemetry SDK is installed,
+spans are also exported over OTLP/HTTP.
+"""
+import contextvars
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from config import Config
+from utils.metrics import SPAN_DURATION
+
+_trace_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_id", default=None)
+
+TRACE_HEADER = "X-Trace-Id"
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextmanager
+def trace_context(trace_id: str | None = None):
+    """Bind a trace id for the duration of the block (reuses the current one if none given)."""
+    tid = trace_id or _trace_id.get() or new_trace_id()
+    token = _trace_id.set(tid)
+    try:
+        yield tid
+    finally:
+        _trace_id.reset(token)
+
+
+# --- optional OpenTelemetry export -------------------------------------------
+
+_otel = {"pid": None, "tracer": None}
+_otel_lock = threading.Lock()
+
+
+def _otel_tracer():
+    if not Config.OTEL_EXPORTER_OTLP_ENDPOINT:
+        return None
+    # Initialise per process: the batch exporter thread does not survive a gunicorn fork.
+    if _otel["pid"] == os.getpid():
+        return _otel["tracer"]
+    with _otel_lock:
+        if _otel["pid"] == os.getpid():
+            return _otel["tracer"]
+        tracer = None
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            provider = TracerProvider(resource=Resource.create({"service.name": Config.OTEL_SERVICE_NAME}))
+            endpoint = Config.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/") + "/v1/traces"
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+            tracer = provider.get_tracer("portfolio-insight")
+            print(f"[TRACING] OTLP exporter -> {endpoint}")
+        except ImportError:
+            print("[TRACING] OTEL_EXPORTER_OTLP_ENDPOINT set but opentelemetry-sdk/exporter not installed")
+        except Exception as e:
+            print(f"[TRACING] OTLP exporter disabled: {e}")
+        _otel["pid"], _otel["tracer"] = os.getpid(), tracer
+        return tracer
+
+
+# --- spans --------------------------------------------------------------------
+
+class Span:
+    __slots__ = ("name", "kind", "attrs", "trace_id", "t0", "status", "duration")
+
+    def __init__(self, name: str, kind: str, attrs: dict):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.trace_id = current_trace_id()
+        self.t0 = time.perf_counter()
+        self.status = "ok"
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self):
+        self.status = "error"
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs):
+    s = Span(name, kind, attrs)
+    tracer = _otel_tracer()
+    otel_cm = tracer.start_as_current_span(name) if tracer else None
+    otel_span = otel_cm.__enter__() if otel_cm else None
+    try:
+        yield s
+    except BaseException:
+        s.fail()
+        raise
+    finally:
+        s.duration = time.perf_counter() - s.t0
+        SPAN_DURATION.observe(s.duration, kind=kind, name=name, status=s.status)
+        if otel_span is not None:
+            otel_span.set_attribute("app.trace_id", s.trace_id or "")
+            otel_span.set_attribute("app.kind", kind)
+            for k, v in s.attrs.items():
+                if isinstance(v, (str, bool, int, float)):
+                    otel_span.set_attribute(f"app.{k}", v)
+            if s.status == "error":
+                from opentelemetry.trace import Status, StatusCode
+                otel_span.set_status(Status(StatusCode.ERROR))
+            otel_cm.__exit__(None, None, None)
+
+
+def traced(name: str, kind: str = "tool"):
+    """Decorator form of span() for tool and helper functions."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# --- Flask integration ----------------------------------------------------------
+
+def install_flask_tracing(app):
+    """Open a route span per request, honouring an incoming X-Trace-Id / X-Request-ID header."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_trace():
+        tid = request.headers.get(TRACE_HEADER) or request.headers.get("X-Request-ID") or new_trace_id()
+        g._trace_token = _trace_id.set(tid[:64])
+        g._trace_t0 = time.perf_counter()
+
+    @app.after_request
+    def _finish_trace(response):
+        t0 = getattr(g, "_trace_t0", None)
+        if t0 is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            status = "error" if response.status_code >= 500 else "ok"
+            SPAN_DURATION.observe(time.perf_counter() - t0, kind="route", name=f"{request.method} {route}", status=status)
+        tid = current_trace_id()
+        if tid:
+            response.headers[TRACE_HEADER] = tid
+        return response
+
+    @app.teardown_request
+    def _reset_trace(_exc):
+        token = g.pop("_trace_token", None)
+        if token is not None:
+            try:
+                _trace_id.reset(token)
+            except ValueError:
+                pass
@@ -17,3 +17,44 @@ def validate_interval(i: str) -> str:
 
 def validate_period(p: str) -> str:
     return p if p in ALLOWED_PERIODS else "5d"
+
+DOWNSAMPLE_METHODS = {"lttb","ohlc"}
+
+def validate_max_points(n) -> int | None:
+    try:
+        n = int(n)
+    except Exception:
+        return None
+    return max(3, min(5000, n)) if n > 0 else None
+
+def validate_downsample_method(m: str | None) -> str:
+    return m if m in DOWNSAMPLE_METHODS else "lttb"
+
+HOLDING_ALIASES = {"quantity": ("quantity", "shares"), "avg_price": ("avg_price", "purchase_price"), "weight": ("weight",)}
+
+def parse_holdings(holdings: list) -> list[dict]:
+    """["TCS", ...] or [{"symbol": "TCS", "quantity": 10, "avg_price": 3500, "weight": 0.2, "purchase_date": "2023-04-03"}, ...]
+    -> list of dicts. The app's holding fields (ticker, shares, purchase_price) are accepted as aliases."""
+    out = []
+    for h in holdings or []:
+        if isinstance(h, str):
+            out.append({"symbol": h.strip().upper()})
+        elif isinstance(h, dict) and (h.get("symbol") or h.get("ticker")):
+            row = {"symbol": str(h.get("symbol") or h.get("ticker")).strip().upper()}
+            for k, names in HOLDING_ALIASES.items():
+                v = next((h[n] for n in names if h.get(n) is not None), None)
+                try:
+                    row[k] = float(v) if v is not None else None
+                except (TypeError, ValueError):
+                    row[k] = None
+            if h.get("purchase_date"):
+                row["purchase_date"] = str(h["purchase_date"])[:10]
+            out.append(row)
+    return [h for h in out if h["symbol"]]
+
+SNAPSHOT_FACETS = {"quotes","ranges","monthly","returns","ohlcv","corporate_actions","analyst"}
+DEFAULT_SNAPSHOT_FACETS = ["quotes","ranges","monthly","returns"]
+
+def validate_facets(facets: list[str] | None) -> list[str]:
+    facets = [f for f in (facets or []) if f in SNAPSHOT_FACETS]
+    return facets or list(DEFAULT_SNAPSHOT_FACETS)